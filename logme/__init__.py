@@ -5,19 +5,54 @@
 
 """
 
+import sys
+import types
 import inspect
 from typing import Callable
 
 from functools import wraps
 
-from .cli import cli
-
 from .utils import check_scope
 from .exceptions import LogmeError, MisMatchScope
-from .providers import LogProvider, ModuleLogger
+from . import context
+from .registry import LoggerRegistry, logger_registry
+from .handler_types import HandlerRegistry, handler_registry
+from .levels import LevelRules, level_rules
+from .providers import LogProvider, ModuleLogger, PackageLogProvider
 from .__version__ import __version__
 
 
+class _LogmeModule(types.ModuleType):
+    """
+    'logme.cli' is both the cli subpackage and the click command. The command is imported on first access,
+    so importing logme for logging does not pay for click and the cli modules.
+    """
+    @property
+    def cli(self):
+        # Value assigned to logme.cli, e.g. by mock.patch()
+        if 'cli' in self.__dict__:
+            return self.__dict__['cli']
+
+        from .cli import cli
+
+        return cli
+
+    @cli.setter
+    def cli(self, value):
+        # Importing the subpackage binds logme.cli to it, 'from logme import cli' keeps returning the command
+        if isinstance(value, types.ModuleType) and value.__name__ == f"{self.__name__}.cli":
+            return
+
+        self.__dict__['cli'] = value
+
+    @cli.deleter
+    def cli(self):
+        self.__dict__.pop('cli', None)
+
+
+sys.modules[__name__].__class__ = _LogmeModule
+
+
 def log(scope: str=None, config: str=None, name: str=None):
     """
     Returns a decorator or logger object based on the *scope*.
@@ -41,6 +76,18 @@ def log(scope: str=None, config: str=None, name: str=None):
         return wrapper
 
 
+def log_package(package, config: str=None) -> LoggerRegistry:
+    """
+    Configure a logger for every module in a package, in a single pass.
+
+    :param package: package object or dotted name of the package
+    :param config: name of the logging config specified in logme.ini, applies to all modules
+
+    :return: LoggerRegistry, logger lookup by module name
+    """
+    return PackageLogProvider(package, config=config).registry
+
+
 def _get_logger_decorator(callable_: callable, config: str=None, name: str=None, scope: str=None) -> Callable:
     """
     Get the logger decorator based on what kind of callable is being passed, class | function
@@ -0,0 +1,211 @@
+import os
+import re
+import mmap
+
+from pathlib import Path
+from collections import Counter
+from typing import Iterable, Union
+from concurrent.futures import ProcessPoolExecutor
+
+from .index import TimeIndex
+from .reader import COMPRESSED_OPENERS, LogEntry, LogParser, read_lines, filter_entries
+
+
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+
+# Variable parts of the messages, replaced to group the messages logged from the same call site,
+# with a character the part must contain so the patterns not matching a message are skipped cheaply
+_TEMPLATE_PATTERNS = [
+    ('-', re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), '<UUID>'),
+    ("'", re.compile(r"'[^']*'"), '<STR>'),
+    ('"', re.compile(r'"[^"]*"'), '<STR>'),
+    ('0x', re.compile(r"\b0x[0-9a-fA-F]+\b"), '<HEX>'),
+    ('', re.compile(r"(?<![\w.<])[-+]?\d+(?:\.\d+)*"), '<N>'),
+]
+
+
+def get_message_template(message: str) -> str:
+    """
+    Get the template of a message, the first line with the numbers, quoted strings, UUIDs and hex numbers masked,
+    e.g. "user 'bob' logged in after 3 attempts" -> "user <STR> logged in after <N> attempts"
+    """
+    template = message.split('\n', 1)[0]
+
+    for required, pattern, mask in _TEMPLATE_PATTERNS:
+        if required in template:
+            template = pattern.sub(mask, template)
+
+    return template
+
+
+class LogSummary:
+    """
+    Counts of the records by level, logger, message template and time bucket, mergeable across processes
+
+    :param bucket: seconds of each time bucket of the timeline, no timeline if None
+    """
+    __slots__ = ['total', 'levels', 'loggers', 'templates', 'timeline', 'bucket']
+
+    def __init__(self, bucket: int=None):
+        self.total = 0
+        self.levels = Counter()
+        self.loggers = Counter()
+        self.templates = Counter()
+        self.timeline = Counter()  # start of the bucket, epoch seconds -> records
+        self.bucket = bucket
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} total={self.total}>"
+
+    def add(self, entry: LogEntry):
+        self.total += 1
+        self.levels[entry.levelname] += 1
+        self.loggers[entry.name] += 1
+        self.templates[get_message_template(entry.message)] += 1
+
+        if self.bucket and entry.timestamp is not None:
+            self.timeline[entry.timestamp // self.bucket * self.bucket] += 1
+
+    def merge(self, other: 'LogSummary') -> 'LogSummary':
+        self.total += other.total
+        self.levels.update(other.levels)
+        self.loggers.update(other.loggers)
+        self.templates.update(other.templates)
+        self.timeline.update(other.timeline)
+
+        return self
+
+
+def summarize_entries(entries: Iterable, bucket: int=None) -> LogSummary:
+    summary = LogSummary(bucket=bucket)
+
+    for entry in entries:
+        summary.add(entry)
+
+    return summary
+
+
+def split_chunks(file_path: Union[str, Path], parser: LogParser, chunk_bytes: int=DEFAULT_CHUNK_BYTES,
+                 start: int=0, end: int=None) -> list:
+    """
+    Split a log file into byte ranges of about *chunk_bytes*, aligned to the start of the records,
+    so a record and its continuation lines are always in the same chunk. Compressed files are not split.
+
+    :param start: byte offset of the first chunk, the start of a record
+    :param end: byte offset of the end of the last chunk, the end of the file if None
+
+    :return: [(start, end)], see read_lines()
+    """
+    file_path = Path(file_path)
+
+    if file_path.suffix in COMPRESSED_OPENERS:
+        return [(start, end)]
+
+    size = file_path.stat().st_size
+    end = size if end is None else min(end, size)
+
+    if end - start <= chunk_bytes:
+        return [(start, end)]
+
+    boundaries = [start]
+
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        position = start + chunk_bytes
+
+        while position < end:
+            record_start = _find_record_start(mapped, parser, position, end)
+            if record_start >= end:
+                break
+
+            boundaries.append(record_start)
+            position = record_start + chunk_bytes
+
+    boundaries.append(end)
+
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def _find_record_start(mapped: mmap.mmap, parser: LogParser, position: int, end: int) -> int:
+    """
+    Get the offset of the first record starting at or after *position*, *end* if there is none
+    """
+    if mapped[position - 1:position] != b'\n':
+        newline = mapped.find(b'\n', position, end)
+        position = end if newline == -1 else newline + 1
+
+    while position < end:
+        newline = mapped.find(b'\n', position, end)
+        stop = end if newline == -1 else newline
+
+        if parser.parse_line(mapped[position:stop].rstrip(b'\r').decode('utf-8', 'replace')) is not None:
+            return position
+
+        position = stop + 1
+
+    return end
+
+
+def summarize_chunk(file_path: Union[str, Path], parser: LogParser, start: int=0, end: int=None,
+                    bucket: int=None, filters: dict=None) -> LogSummary:
+    """
+    Summarize the records in a byte range of a log file, run by the worker processes
+    """
+    entries = parser.parse(read_lines(file_path, start=start, end=end), source=str(file_path))
+
+    return summarize_entries(filter_entries(entries, **(filters or {})), bucket=bucket)
+
+
+def _summarize_task(task: tuple) -> LogSummary:
+    file_path, parser, start, end, bucket, filters = task
+
+    return summarize_chunk(file_path, parser, start=start, end=end, bucket=bucket, filters=filters)
+
+
+def analyze_files(files: Iterable, processes: int=None, chunk_bytes: int=DEFAULT_CHUNK_BYTES, bucket: int=None,
+                  **filters) -> LogSummary:
+    """
+    Summarize log files across a process pool. Files are split into chunks aligned to the records,
+    each chunk is summarized by a worker process, and the summaries are merged.
+
+    Usage:
+        >>> parser = LogParser.from_formatter('{asctime} - {name} - {levelname} - {message}')
+        >>> summary = analyze_files([(path, parser) for path in find_segments('logs/app.log')], level='ERROR')
+        >>> summary.templates.most_common(10)
+
+    :param files: (file path, LogParser) pairs
+    :param processes: number of worker processes, number of CPUs if None, 1 to summarize in the current process
+    :param chunk_bytes: size of the chunks the files are split into
+    :param bucket: seconds of each time bucket of the timeline
+    :param filters: arguments to be passed to logme.reader.filter_entries(), e.g. level, names, since, until
+
+    :return: LogSummary merged from all the chunks
+    """
+    since, until = filters.get('since'), filters.get('until')
+
+    tasks = []
+    for file_path, parser in files:
+        start, end = 0, None
+
+        # Only the part of the file around the time range is split
+        if since is not None or until is not None:
+            index = TimeIndex.load(file_path)
+            if index:
+                start, end = index.seek(since=since, until=until)
+
+        for chunk_start, chunk_end in split_chunks(file_path, parser, chunk_bytes=chunk_bytes, start=start, end=end):
+            tasks.append((str(file_path), parser, chunk_start, chunk_end, bucket, filters))
+
+    summary = LogSummary(bucket=bucket)
+    processes = processes or os.cpu_count() or 1
+
+    if processes == 1 or len(tasks) <= 1:
+        for task in tasks:
+            summary.merge(_summarize_task(task))
+
+        return summary
+
+    with ProcessPoolExecutor(max_workers=min(processes, len(tasks))) as executor:
+        for chunk_summary in executor.map(_summarize_task, tasks):
+            summary.merge(chunk_summary)
+
+    return summary
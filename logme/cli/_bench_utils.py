@@ -0,0 +1,469 @@
+import os
+import sys
+import time
+import logging
+import threading
+import itertools
+import subprocess
+import tracemalloc
+
+from pathlib import Path
+from copy import deepcopy
+from typing import Union
+from concurrent.futures import ProcessPoolExecutor
+
+from bnmutils import ConfigParser
+
+from ..ini import parse_ini
+from ..exceptions import LogmeError
+from ..utils import read_config
+from ..config import LoggerConfig
+from ..providers import LogmeLogger
+from ..registry import logger_registry
+from ..handlers import unwrap_handler
+from ..analysis import DEFAULT_CHUNK_BYTES, analyze_files
+
+
+NONLOGGER_CONFIGS = ['colors']
+
+DEFAULT_LEVEL_MIX = 'DEBUG=40,INFO=40,WARNING=15,ERROR=5'
+
+
+def parse_level_mix(level_mix: str) -> list:
+    """
+    Parse the level mix option into the sequence of levels to be logged
+
+    :param level_mix: comma separated level=weight, e.g. 'DEBUG=70,INFO=20,ERROR=10'
+
+    :return: list of level numbers, each level repeated by its weight
+    """
+    levels = []
+    try:
+        for item in level_mix.split(','):
+            level, _, weight = item.partition('=')
+            levels += [logging._nameToLevel[level.strip().upper()]] * int(weight or 1)
+    except (KeyError, ValueError):
+        raise LogmeError(f"'{level_mix}' is not a valid level mix, e.g. 'DEBUG=70,INFO=20,ERROR=10'")
+
+    if not levels:
+        raise LogmeError(f"'{level_mix}' is not a valid level mix, weights must be positive")
+
+    return levels
+
+
+def get_bench_configs(conf_path: Union[str, Path], sections: list=None) -> dict:
+    """
+    Get the logger configs to be benchmarked from logme.ini
+
+    :param conf_path: path of the logme.ini file
+    :param sections: config sections to be benchmarked, all logger configs if not set
+
+    :return: {section name: config dict}
+    """
+    config = read_config(conf_path)
+    logger_sections = [i for i in config if i not in NONLOGGER_CONFIGS]
+
+    for section in sections or []:
+        if section not in logger_sections:
+            raise LogmeError(f"'{section}' is not a logger config in {conf_path}")
+
+    return {i: config[i] for i in (sections or logger_sections)}
+
+
+def prepare_config(config: dict, output_dir: Union[str, Path]) -> dict:
+    """
+    Redirect the file paths of the handlers to *output_dir*, so the benchmark does not write to the actual logs
+    """
+    config = deepcopy(config)
+
+    for handler_name, handler_conf in config.items():
+        if isinstance(handler_conf, dict) and handler_conf.get('filename'):
+            handler_conf['filename'] = str(Path(output_dir) / f"{handler_name}.log")
+
+    return config
+
+
+def percentile(samples: list, q: float) -> float:
+    """
+    :param samples: sorted samples
+    :param q: 0 - 1
+    """
+    if not samples:
+        return 0.0
+
+    return samples[int(q * (len(samples) - 1))]
+
+
+class CountingStream:
+    """
+    Stream discarding the output, only counting the bytes written
+    """
+    def __init__(self):
+        self.bytes_written = 0
+
+    def write(self, text: str):
+        self.bytes_written += len(text.encode('utf-8'))
+
+    def flush(self):
+        pass
+
+
+class BenchLogger:
+    """
+    LogmeLogger with instrumented handlers, for measuring the emit latency and bytes written per handler
+
+    :param name: name of the logger
+    :param config: logger config, see prepare_config()
+    :param color_config: color config
+    """
+    def __init__(self, name: str, config: dict, color_config: dict=None):
+        self.logme_logger = LogmeLogger(name, config, color_config=color_config)
+        self.logme_logger.propagate = False
+
+        self.latencies = {}
+        self.streams = {}
+
+        for handler_name, handler in self.logme_logger.handlers.items():
+            output_handler = unwrap_handler(handler)
+
+            if type(output_handler) is logging.StreamHandler:
+                self.streams[handler_name] = CountingStream()
+                output_handler.setStream(self.streams[handler_name])
+
+            self.latencies[handler_name] = []
+            handler.handle = self._timed(handler.handle, self.latencies[handler_name])
+
+    @staticmethod
+    def _timed(handle, samples: list):
+        perf_counter = time.perf_counter
+
+        def timed_handle(record):
+            start = perf_counter()
+            result = handle(record)
+            samples.append(perf_counter() - start)
+
+            return result
+
+        return timed_handle
+
+    def log(self, records: int, levels: list, barrier: threading.Barrier=None):
+        logger = self.logme_logger.logger
+
+        # Threads start logging all at once, so the contention is measured from the first record
+        if barrier:
+            barrier.wait()
+
+        for _, level in zip(range(records), itertools.cycle(levels)):
+            logger.log(level, 'benchmark message %s', 'argument')
+
+    def close(self) -> dict:
+        """
+        Close the handlers, and get the bytes written per handler
+        """
+        bytes_written = {}
+
+        for handler_name, handler in self.logme_logger.handlers.items():
+            handler.flush()
+            handler.close()
+
+            file_name = getattr(unwrap_handler(handler), 'baseFilename', None)
+
+            if handler_name in self.streams:
+                bytes_written[handler_name] = self.streams[handler_name].bytes_written
+            elif file_name and os.path.exists(file_name):
+                bytes_written[handler_name] = os.path.getsize(file_name)
+
+        del logging.Logger.manager.loggerDict[self.logme_logger.name]
+
+        return bytes_written
+
+
+def run_bench(name: str, config: dict, color_config: dict, output_dir: Union[str, Path],
+              records: int, threads: int, levels: list) -> dict:
+    """
+    Log *records* records from each of the *threads* threads
+
+    :return: result dict, see format_report()
+    """
+    config = prepare_config(config, Path(output_dir) / name)
+    bench_logger = BenchLogger(name, config, color_config=color_config)
+
+    barrier = threading.Barrier(threads)
+    workers = [threading.Thread(target=bench_logger.log, args=(records, levels, barrier))
+               for _ in range(threads)]
+
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    bytes_written = bench_logger.close()
+
+    return {
+        'records': records * threads,
+        'elapsed': elapsed,
+        'bytes_written': bytes_written,
+        'latencies': bench_logger.latencies,
+    }
+
+
+def _run_process(name: str, config: dict, color_config: dict, output_dir: Union[str, Path],
+                 records: int, levels: list) -> dict:
+    return run_bench(name, config, color_config, output_dir, records, 1, levels)
+
+
+def run_processes(name: str, config: dict, color_config: dict, output_dir: Union[str, Path],
+                  records: int, processes: int, levels: list) -> dict:
+    """
+    Log *records* records from each of the *processes* processes, results are merged
+    """
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(_run_process, f"{name}.{i}", config, color_config, output_dir, records, levels)
+                   for i in range(processes)]
+        results = [future.result() for future in futures]
+
+    # Process start up time is excluded, processes log concurrently, so the slowest one is the elapsed time
+    elapsed = max(result['elapsed'] for result in results)
+
+    merged = {'records': records * processes, 'elapsed': elapsed, 'bytes_written': {}, 'latencies': {}}
+    for result in results:
+        for handler_name, value in result['bytes_written'].items():
+            merged['bytes_written'][handler_name] = merged['bytes_written'].get(handler_name, 0) + value
+
+        for handler_name, samples in result['latencies'].items():
+            merged['latencies'].setdefault(handler_name, []).extend(samples)
+
+    return merged
+
+
+def bench_config(section: str, config: dict, color_config: dict, output_dir: Union[str, Path],
+                 records: int, threads: Union[int, list], processes: int, levels: list) -> dict:
+    """
+    Benchmark a logger config with a single thread, *threads* threads and *processes* processes
+
+    :param output_dir: directory for the files written by the file handlers
+    :param threads: number of threads, or list of numbers of threads for comparing the contention, e.g. [8, 32]
+
+    :return: {mode: result dict}
+    """
+    name = f"logme.bench.{section}"
+
+    results = {'single thread': run_bench(f"{name}.single", config, color_config, output_dir,
+                                          records, 1, levels)}
+
+    for thread_count in ([threads] if isinstance(threads, int) else threads):
+        if thread_count > 1:
+            results[f"{thread_count} threads"] = run_bench(f"{name}.threads{thread_count}", config, color_config,
+                                                           output_dir, records, thread_count, levels)
+    if processes > 1:
+        results[f"{processes} processes"] = run_processes(f"{name}.processes", config, color_config, output_dir,
+                                                          records, processes, levels)
+
+    return results
+
+
+def format_report(section: str, results: dict) -> str:
+    """
+    Format the results of bench_config(), the throughput of the multi-thread and multi-process runs
+    is compared to the single thread run, e.g. '3.6x single thread'
+    """
+    lines = [f"[{section}]"]
+    single_rate = None
+
+    for mode, result in results.items():
+        rate = result['records'] / result['elapsed'] if result['elapsed'] else 0
+        total_bytes = sum(result['bytes_written'].values())
+
+        scaling = ''
+        if single_rate is None:
+            single_rate = rate
+        elif single_rate:
+            scaling = f" ({rate / single_rate:.1f}x single thread)"
+
+        lines.append(f"  {mode}: {result['records']} records in {result['elapsed']:.3f}s, "
+                     f"{rate:,.0f} records/s{scaling}, {total_bytes:,} bytes written")
+
+        for handler_name, samples in result['latencies'].items():
+            samples = sorted(samples)
+            handler_bytes = result['bytes_written'].get(handler_name)
+
+            lines.append(f"    {handler_name}: {len(samples)} emits, "
+                         f"p50 {percentile(samples, 0.5) * 1e6:.1f}us, "
+                         f"p99 {percentile(samples, 0.99) * 1e6:.1f}us, "
+                         f"bytes written: {'n/a' if handler_bytes is None else f'{handler_bytes:,}'}")
+
+    return '\n'.join(lines)
+
+
+def measure_import_time(module: str='logme') -> dict:
+    """
+    Measure the import time of *module* in a fresh interpreter, with 'python -X importtime'
+
+    :return: {imported module name: (self us, cumulative us)}, in import order
+    """
+    # Make sure the fresh interpreter imports this copy of logme
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(Path(__file__).parents[2]), env.get('PYTHONPATH')]))
+
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                             env=env, stderr=subprocess.PIPE, universal_newlines=True)
+    if process.returncode:
+        raise LogmeError(f"failed to import '{module}': {process.stderr.strip().splitlines()[-1]}")
+
+    timings = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+
+    return timings
+
+
+def format_import_time(module: str, timings: dict, top: int=10) -> str:
+    """
+    Format the result of measure_import_time(), with the *top* most expensive imports made by *module*
+    """
+    total = timings.get(module, (0, 0))[1]
+    lines = [f"import {module}: {total / 1e3:.1f}ms"]
+
+    imports = sorted(((value[1], name) for name, value in timings.items() if name != module), reverse=True)
+    for cumulative_us, name in imports[:top]:
+        lines.append(f"    {name}: {cumulative_us / 1e3:.1f}ms")
+
+    return '\n'.join(lines)
+
+
+def measure_parse_throughput(conf_path: Union[str, Path], rounds: int=1000) -> dict:
+    """
+    Measure how many times per second logme.ini is parsed into section dicts,
+    by the runtime parser (logme.ini) and by bnmutils.ConfigParser, file reading is excluded
+
+    :return: {parser name: parses per second}
+    """
+    with open(conf_path) as file:
+        content = file.read()
+
+    def parse_bnmutils(ini_content: str) -> dict:
+        config = ConfigParser()
+        config.read_string(ini_content)
+        return config.to_dict()
+
+    throughput = {}
+    for parser_name, parse in [('logme.ini', parse_ini), ('bnmutils', parse_bnmutils)]:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            parse(content)
+        elapsed = time.perf_counter() - start
+
+        throughput[parser_name] = rounds / elapsed if elapsed else 0
+
+    return throughput
+
+
+def format_parse_throughput(throughput: dict) -> str:
+    """
+    Format the result of measure_parse_throughput(), compared to bnmutils.ConfigParser
+    """
+    baseline = throughput.get('bnmutils')
+    lines = ['parse logme.ini:']
+
+    for parser_name, rate in throughput.items():
+        scaling = f" ({rate / baseline:.1f}x bnmutils)" if baseline and parser_name != 'bnmutils' else ''
+        lines.append(f"    {parser_name}: {rate:,.0f} parses/s{scaling}")
+
+    return '\n'.join(lines)
+
+
+def measure_analysis(files: list, processes: list, chunk_bytes: int=DEFAULT_CHUNK_BYTES, **filters) -> dict:
+    """
+    Measure the throughput of logme.analysis.analyze_files() with each number of processes,
+    1 is the single process path
+
+    :param files: (file path, LogParser) pairs
+    :param processes: numbers of processes to be compared, e.g. [1, 4, 8]
+
+    :return: {processes: (seconds, records)}
+    """
+    results = {}
+
+    for process_count in processes:
+        start = time.perf_counter()
+        summary = analyze_files(files, processes=process_count, chunk_bytes=chunk_bytes, **filters)
+        results[process_count] = (time.perf_counter() - start, summary.total)
+
+    return results
+
+
+def format_analysis(results: dict) -> str:
+    """
+    Format the result of measure_analysis(), compared to the single process path
+    """
+    baseline = results.get(1)
+    lines = ['analysis:']
+
+    for process_count, (elapsed, records) in results.items():
+        label = 'single process' if process_count == 1 else f"{process_count} processes"
+        rate = records / elapsed if elapsed else 0
+        scaling = f" ({baseline[0] / elapsed:.1f}x)" if baseline and process_count != 1 and elapsed else ''
+
+        lines.append(f"    {label}: {records:,} records in {elapsed:.2f}s, {rate:,.0f} records/s{scaling}")
+
+    return '\n'.join(lines)
+
+
+def measure_logger_memory(config: dict, color_config: dict=None, loggers: int=10000,
+                          shared_config: bool=True) -> dict:
+    """
+    Measure the memory allocated for *loggers* LogmeLogger objects configured from the same config with tracemalloc,
+    the loggers share their handlers, the same way as logme.log_package()
+
+    :param shared_config: pass the same LoggerConfig to all the loggers, otherwise a config dict is passed to each
+
+    :return: {'loggers': number of loggers, 'bytes': bytes allocated, 'bytes_per_logger': bytes per logger}
+    """
+    config = LoggerConfig.from_dict(config) if shared_config else config
+    names = [f"logme.bench.memory.logger{i}" for i in range(loggers)]
+    created = []
+
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+
+        shared_handlers = None
+        for name in names:
+            logger = LogmeLogger(name, config, color_config=color_config, shared_handlers=shared_handlers)
+            created.append(logger)
+
+            if shared_handlers is None:
+                shared_handlers = dict(logger.handlers)
+
+        allocated = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+
+    for handler in (shared_handlers or {}).values():
+        handler.close()
+
+    with logging._lock:
+        for logger in created:
+            logger_registry.unregister(logger)
+            logging.Logger.manager.loggerDict.pop(logger.name, None)
+
+    return {'loggers': loggers, 'bytes': allocated, 'bytes_per_logger': allocated / loggers if loggers else 0}
+
+
+def format_logger_memory(section: str, results: dict) -> str:
+    """
+    Format the results of measure_logger_memory(), {mode: result}
+    """
+    lines = [f"[{section}] memory"]
+
+    for mode, result in results.items():
+        lines.append(f"  {mode}: {result['loggers']} loggers, {result['bytes'] / 1024 ** 2:.1f}MiB, "
+                     f"{result['bytes_per_logger']:,.0f} bytes per logger")
+
+    return '\n'.join(lines)
@@ -1,6 +1,10 @@
+import json
 import click
+import logging
+import tempfile
 
 from pathlib import Path
+from typing import Iterator
 
 from bnmutils import ConfigParser
 
@@ -9,6 +13,16 @@ from ..__version__ import __version__
 
 from ._cli_utils import ensure_conf_exist, validate_conf, get_tpl, get_color_tpl
 from ._upgrade_utils import upgrade_to_latest
+from ._bench_utils import (DEFAULT_LEVEL_MIX, get_bench_configs, parse_level_mix,
+                           bench_config, format_report, measure_import_time, format_import_time,
+                           measure_parse_throughput, format_parse_throughput, prepare_config,
+                           measure_logger_memory, format_logger_memory, measure_analysis, format_analysis)
+from ._reader_utils import LogSource, get_log_sources, format_source, format_counts, format_summary
+from ..utils import get_color_config
+from ..profiler import format_profile
+from ..analysis import DEFAULT_CHUNK_BYTES, analyze_files
+from ..reader import (read_entries, follow_entries, filter_entries, tail_entries, count_entries,
+                      parse_time_option)
 
 _command_options = {
     'project_root': click.option('--project-root', '-p',
@@ -26,6 +40,28 @@ _command_options = {
                              default=None),
 }
 
+_reader_options = [
+    click.option('--config', '-c', 'configs',
+                 help='The logger config of the file handlers, can be passed multiple times. '
+                      'Default: all logger configs',
+                 multiple=True),
+    click.option('--handler', '-H', 'handlers',
+                 help='The file handler to read, can be passed multiple times. Default: all active file handlers',
+                 multiple=True),
+    click.option('--level', '-l',
+                 help='Only the records at this level or above',
+                 default=None),
+    click.option('--logger', '-L', 'loggers',
+                 help='Only the records of this logger and its children, can be passed multiple times',
+                 multiple=True),
+    click.option('--since', '-s',
+                 help="Only the records logged at or after this time, e.g. '2024-01-01 12:00' or '15m'",
+                 default=None),
+    click.option('--until', '-u',
+                 help="Only the records logged before this time, e.g. '2024-01-01 13:00' or '5m'",
+                 default=None),
+]
+
 
 def add_options(options: list=None):
 
@@ -52,6 +88,18 @@ def add_options(options: list=None):
     return add_options_wrapper
 
 
+def add_reader_options(command_func):
+    """
+    *decorator*
+
+    Options selecting the log files and filtering the records, for 'logme tail' and 'logme grep'
+    """
+    for option in reversed(_reader_options):
+        command_func = option(command_func)
+
+    return command_func
+
+
 @click.version_option(__version__, '--version', '-v', '-V')
 @click.group(context_settings={'help_option_names': ['-h', '--help']})
 def cli():
@@ -171,3 +219,233 @@ def upgrade(ctx, project_root):
         upgrade_to_latest(logme_conf)
 
     print(f"{logme_conf.resolve()} has been updated to {__version__}")
+
+
+@cli.command()
+@click.option('--config', '-c', 'configs',
+              help='The logger config to benchmark, can be passed multiple times. Default: all logger configs',
+              multiple=True)
+@click.option('--records', '-n',
+              help='Number of records logged by each thread/process',
+              default=10000, show_default=True)
+@click.option('--threads', '-t',
+              help='Number of threads for the multi-thread run, can be passed multiple times to compare the contention',
+              default=[4], show_default=True, multiple=True)
+@click.option('--processes', '-P',
+              help='Number of processes for the multi-process run',
+              default=2, show_default=True)
+@click.option('--level-mix', '-lm',
+              help='Levels of the records and their weights',
+              default=DEFAULT_LEVEL_MIX, show_default=True)
+@click.option('--import-time', '-it',
+              help='Also report the time taken by "import logme" in a fresh interpreter',
+              is_flag=True)
+@click.option('--parse-time', '-pt',
+              help='Also report the throughput of parsing logme.ini, compared to bnmutils.ConfigParser',
+              is_flag=True)
+@click.option('--memory', '-m', 'memory_loggers',
+              help='Also report the memory allocated for this number of loggers configured from each config, '
+                   'e.g. 10000',
+              default=0, type=int)
+@add_options(['project_root'])
+@click.pass_context
+def bench(ctx, project_root, configs, records, threads, processes, level_mix, import_time, parse_time,
+          memory_loggers):
+    """
+    Command for benchmarking the logger configurations in logme.ini
+
+    Each config is run with a single thread, multiple threads and multiple processes, reports records/s,
+    p50/p99 emit latency and bytes written per handler.
+    e.g. 'logme bench -t 8 -t 32' compares 1, 8 and 32 threads logging concurrently.
+    File handlers write to a temporary directory, stream handlers output is discarded.
+    """
+    levels = parse_level_mix(level_mix)
+
+    if import_time:
+        click.echo(format_import_time('logme', measure_import_time('logme')))
+
+    with ensure_conf_exist(project_root) as logme_conf:
+        if parse_time:
+            click.echo(format_parse_throughput(measure_parse_throughput(logme_conf)))
+
+        bench_configs = get_bench_configs(logme_conf, sections=list(configs))
+        color_config = get_color_config(logme_conf)
+
+        with tempfile.TemporaryDirectory(prefix='logme-bench-') as output_dir:
+            for section, config in bench_configs.items():
+                results = bench_config(section, config, color_config, output_dir,
+                                       records=records, threads=list(threads), processes=processes, levels=levels)
+
+                click.echo(format_report(section, results))
+
+                if memory_loggers:
+                    memory_config = prepare_config(config, Path(output_dir) / section)
+                    memory = {mode: measure_logger_memory(memory_config, color_config, memory_loggers,
+                                                          shared_config=mode == 'shared config')
+                              for mode in ['shared config', 'config per logger']}
+
+                    click.echo(format_logger_memory(section, memory))
+
+
+@cli.command()
+@click.argument('profile_path', required=1, type=click.Path(exists=True, dir_okay=False))
+@click.option('--top', '-n',
+              help='Number of the most expensive call sites to report. Default: all',
+              default=None, type=int)
+@click.pass_context
+def profile(ctx, profile_path, top):
+    """
+    Command for reporting a profile saved by logme.profiler.LoggingProfiler.save()
+    """
+    with open(profile_path) as file:
+        content = json.load(file)
+
+    click.echo(format_profile(content, top=top))
+
+
+@cli.command()
+@click.option('--lines', '-n',
+              help='Number of records to output from each file',
+              default=10, show_default=True)
+@click.option('--follow', '-f',
+              help='Output the records as they are appended to the file',
+              is_flag=True)
+@add_reader_options
+@add_options(['project_root'])
+@click.pass_context
+def tail(ctx, project_root, configs, handlers, level, loggers, since, until, lines, follow):
+    """
+    Command for outputting the last records of the log files written by the file handlers in logme.ini
+
+    Records are parsed with the formatter of the handler, including rotated and compressed files.
+    e.g. 'logme tail -H file -l ERROR -n 20'
+    """
+    with ensure_conf_exist(project_root) as logme_conf:
+        sources = get_log_sources(logme_conf, configs=list(configs), handlers=list(handlers))
+
+    if follow and len(sources) > 1:
+        raise LogmeError(f"Only one file can be followed, found {len(sources)}, please select one with '--handler'")
+
+    filters = _get_filters(level, loggers, since, until)
+
+    for source in sources:
+        if len(sources) > 1:
+            click.echo(format_source(source))
+
+        for entry in tail_entries(_read_source(source, filters), lines):
+            click.echo(entry.text)
+
+    if follow:
+        source = sources[0]
+        try:
+            for entry in filter_entries(follow_entries(source.file_path, source.parser), **filters):
+                click.echo(entry.text)
+        except KeyboardInterrupt:
+            pass
+
+
+@cli.command()
+@click.argument('pattern', required=False)
+@click.option('--count', '-C',
+              help='Output the number of matching records per level and logger, instead of the records',
+              is_flag=True)
+@click.option('--top', '-n',
+              help='Number of loggers to report with --count, most records first. Default: all',
+              default=None, type=int)
+@add_reader_options
+@add_options(['project_root'])
+@click.pass_context
+def grep(ctx, project_root, pattern, configs, handlers, level, loggers, since, until, count, top):
+    """
+    Command for searching the records of the log files written by the file handlers in logme.ini
+
+    PATTERN is a regular expression searched in the messages, all the records match if it is not given.
+    e.g. 'logme grep "timed out" -L myapp.db --since 1h --count'
+    """
+    with ensure_conf_exist(project_root) as logme_conf:
+        sources = get_log_sources(logme_conf, configs=list(configs), handlers=list(handlers))
+
+    filters = _get_filters(level, loggers, since, until)
+
+    if count:
+        entries = (entry for source in sources for entry in _read_source(source, filters, pattern=pattern))
+        click.echo(format_counts(count_entries(entries), top=top))
+        return
+
+    for source in sources:
+        if len(sources) > 1:
+            click.echo(format_source(source))
+
+        for entry in _read_source(source, filters, pattern=pattern):
+            click.echo(entry.text)
+
+
+@cli.command()
+@click.option('--processes', '-P',
+              help='Number of worker processes. Default: number of CPUs',
+              default=None, type=int)
+@click.option('--chunk-size', '-cs', 'chunk_size',
+              help='Size in MiB of the chunks large files are split into',
+              default=DEFAULT_CHUNK_BYTES // 1048576, show_default=True)
+@click.option('--top', '-n',
+              help='Number of loggers and message templates to report, most records first. Default: all',
+              default=None, type=int)
+@click.option('--timeline', '-t',
+              help='Also report the number of records in time buckets of this many seconds, e.g. 60',
+              default=None, type=int)
+@click.option('--bench', '-b', 'bench_processes',
+              help='Compare the time taken with this number of processes to the single process path, '
+                   'can be passed multiple times, instead of reporting the summary',
+              multiple=True, type=int)
+@add_reader_options
+@add_options(['project_root'])
+@click.pass_context
+def stats(ctx, project_root, configs, handlers, level, loggers, since, until, processes, chunk_size, top, timeline,
+          bench_processes):
+    """
+    Command for summarizing the log files written by the file handlers in logme.ini across multiple processes
+
+    Files and chunks of large files are split across a process pool, the records are counted per level,
+    logger and message template, e.g. "retry 3 of 5" -> "retry <N> of <N>".
+    e.g. 'logme stats -l ERROR --since 1d -n 20'
+    """
+    with ensure_conf_exist(project_root) as logme_conf:
+        sources = get_log_sources(logme_conf, configs=list(configs), handlers=list(handlers))
+
+    filters = _get_filters(level, loggers, since, until)
+    files = [(segment, source.parser) for source in sources for segment in source.segments]
+    chunk_bytes = chunk_size * 1048576
+
+    if bench_processes:
+        results = measure_analysis(files, [1] + [i for i in bench_processes if i != 1], chunk_bytes=chunk_bytes,
+                                   **filters)
+        click.echo(format_analysis(results))
+        return
+
+    summary = analyze_files(files, processes=processes, chunk_bytes=chunk_bytes, bucket=timeline, **filters)
+    click.echo(format_summary(summary, top=top))
+
+
+def _read_source(source: LogSource, filters: dict, pattern: str=None) -> Iterator:
+    """
+    Stream the matching entries of the log file and its rotated segments,
+    the time index of the files is used to skip to the time range
+    """
+    entries = read_entries(source.segments, source.parser, since=filters['since'], until=filters['until'])
+
+    return filter_entries(entries, pattern=pattern, **filters)
+
+
+def _get_filters(level: str, loggers: tuple, since: str, until: str) -> dict:
+    """
+    Get the arguments of logme.reader.filter_entries() from the reader options
+    """
+    if level and level.upper() not in logging._nameToLevel:
+        raise LogmeError(f"'{level}' is not a valid level")
+
+    return {
+        'level': level,
+        'names': list(loggers),
+        'since': parse_time_option(since) if since else None,
+        'until': parse_time_option(until) if until else None,
+    }
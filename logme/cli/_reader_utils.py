@@ -0,0 +1,120 @@
+import time
+import logging
+
+from pathlib import Path
+from typing import Union
+
+from ..utils import read_config
+from ..config import LoggerConfig
+from ..exceptions import LogmeError
+from ..reader import LogParser, find_segments
+from ..analysis import LogSummary
+
+from ._bench_utils import NONLOGGER_CONFIGS
+
+
+class LogSource:
+    """
+    Log file written by a file handler in logme.ini, with the parser of the handler formatter
+
+    :param config_name: config section of the handler
+    :param handler_name: name of the handler in the section
+    :param file_path: 'filename' of the handler, relative paths are resolved from the project root
+    :param parser: LogParser of the handler formatter, or the master formatter
+    """
+    __slots__ = ['config_name', 'handler_name', 'file_path', 'parser']
+
+    def __init__(self, config_name: str, handler_name: str, file_path: Path, parser: LogParser):
+        self.config_name = config_name
+        self.handler_name = handler_name
+        self.file_path = file_path
+        self.parser = parser
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} [{self.config_name}] {self.handler_name}: {self.file_path}>"
+
+    @property
+    def segments(self) -> list:
+        """
+        The log file and its rotated segments, oldest first
+        """
+        return find_segments(self.file_path)
+
+
+def get_log_sources(conf_path: Union[str, Path], configs: list=None, handlers: list=None) -> list:
+    """
+    Get the log files written by the file handlers in logme.ini
+
+    :param conf_path: path of the logme.ini file
+    :param configs: config sections to read the handlers from, all logger configs if not set
+    :param handlers: names of the handlers, all the active handlers with a 'filename' if not set
+
+    :return: list of LogSource, a file shared by multiple handlers is listed once
+    """
+    config = read_config(conf_path)
+    logger_sections = [i for i in config if i not in NONLOGGER_CONFIGS]
+
+    for section in configs or []:
+        if section not in logger_sections:
+            raise LogmeError(f"'{section}' is not a logger config in {conf_path}")
+
+    sources = {}
+    for section in configs or logger_sections:
+        logger_config = LoggerConfig.from_dict(config[section])
+
+        for handler_config in logger_config.handlers.values():
+            filename = handler_config.args.get('filename')
+
+            if not filename or (handlers and handler_config.name not in handlers) or \
+                    (not handlers and not handler_config.active):
+                continue
+
+            file_path = Path(conf_path).parent / filename
+            if file_path in sources:
+                continue
+
+            parser = LogParser.from_formatter(handler_config.formatter or logger_config.formatter)
+            sources[file_path] = LogSource(section, handler_config.name, file_path, parser)
+
+    if not sources:
+        raise LogmeError(f"No file handler found in {conf_path}")
+
+    return list(sources.values())
+
+
+def format_source(source: LogSource) -> str:
+    return f"==> [{source.config_name}] {source.handler_name}: {source.file_path} <=="
+
+
+def format_counts(counts: dict, top: int=None) -> str:
+    """
+    :param counts: see logme.reader.count_entries()
+    :param top: number of loggers to be reported, most records first. Default: all
+    """
+    lines = [f"total: {counts['total']}", 'levels:']
+
+    levels = sorted(counts['levels'].items(),
+                    key=lambda x: (-logging._nameToLevel.get(x[0], logging.NOTSET), str(x[0])))
+    lines += [f"    {level}: {count}" for level, count in levels]
+
+    lines.append('loggers:')
+    lines += [f"    {name}: {count}" for name, count in counts['loggers'].most_common(top)]
+
+    return '\n'.join(lines)
+
+
+def format_summary(summary: LogSummary, top: int=None) -> str:
+    """
+    :param top: number of loggers and message templates to be reported, most records first. Default: all
+    """
+    lines = [format_counts({'total': summary.total, 'levels': summary.levels, 'loggers': summary.loggers}, top=top)]
+
+    lines.append('templates:')
+    lines += [f"    {count}: {template}" for template, count in summary.templates.most_common(top)]
+
+    if summary.bucket:
+        lines.append(f"timeline ({summary.bucket}s):")
+        lines += [f"    {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(bucket))}: {count}"
+                  for bucket, count in sorted(summary.timeline.items())]
+
+    return '\n'.join(lines)
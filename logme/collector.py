@@ -0,0 +1,104 @@
+import gzip
+import json
+import threading
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class LocalCollector:
+    """
+    Local stand-in collector for logme.handlers.ShippingHandler, for testing shipping without network access
+
+    Usage:
+        >>> with LocalCollector() as collector:
+        ...     handler = ShippingHandler(collector.url)
+        ...     collector.wait_for(10)
+        ...     collector.records
+
+    :param host: host to bind to
+    :param port: port to bind to, a free port is picked when 0
+    """
+    def __init__(self, host: str='127.0.0.1', port: int=0):
+        self.records = []
+        self.batches = 0
+        self.connections = set()
+
+        # Set to False to reject batches with '503 Service Unavailable'
+        self.available = True
+
+        self._condition = threading.Condition()
+        self._server = ThreadingHTTPServer((host, port), self._get_request_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.url} records={len(self.records)}>"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/logs"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.1},
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def wait_for(self, count: int, timeout: float=5.0) -> bool:
+        """
+        Wait until at least *count* records are received
+
+        :return: True if the records are received before timeout
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: len(self.records) >= count, timeout)
+
+    def _receive(self, body: bytes, encoding: str, client_address: tuple) -> bool:
+        if not self.available:
+            return False
+
+        if encoding == 'gzip':
+            body = gzip.decompress(body)
+
+        records = [json.loads(line) for line in body.decode('utf-8').splitlines() if line]
+
+        with self._condition:
+            self.records.extend(records)
+            self.batches += 1
+            self.connections.add(client_address)
+            self._condition.notify_all()
+
+        return True
+
+    def _get_request_handler(self) -> type:
+        collector = self
+
+        class CollectorRequestHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length)
+
+                accepted = collector._receive(body, self.headers.get('Content-Encoding'), self.client_address)
+
+                self.send_response(200 if accepted else 503)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return CollectorRequestHandler
@@ -1,13 +1,27 @@
-import logging
+from typing import Union
 
+from .formatters import LogmeFormatter
 from .exceptions import InvalidColorConfig
 
-# Import colorama to allow ANSI code to work on windows systems
-try:
-    import colorama
-    colorama.init()
-except ModuleNotFoundError:
-    pass
+_colorama_initialized = False
+
+
+def init_colorama():
+    """
+    Initialize colorama to allow ANSI code to work on windows systems, only once,
+    when the first ColorFormatter is created, as colorama wraps sys.stdout and sys.stderr
+    """
+    global _colorama_initialized
+
+    if _colorama_initialized:
+        return
+
+    _colorama_initialized = True
+    try:
+        import colorama
+        colorama.init()
+    except ModuleNotFoundError:
+        pass
 
 
 class Color:
@@ -84,28 +98,59 @@ class Color:
         return color_code
 
 
-class ColorFormatter(logging.Formatter):
+class ColorFormatter(LogmeFormatter):
+    """
+    Wrap the formatted record with the color of its level,
+    the plain output is shared with the other handlers through the render cache
 
-    def __init__(self, fmt: str=None, datefmt: str=None, style: str='%', color_config: dict=None):
-        super().__init__(fmt, datefmt, style)
+    :param color_config: {level name: color}, or logme.config.ColorConfig
+    """
+    def __init__(self, fmt: str=None, datefmt: str=None, style: str='%', color_config=None,
+                 cache_time: bool=False, clock: str=None, render_cache: bool=True,
+                 exc_cache: Union[int, bool]=0, exc_collapse: bool=False):
+        super().__init__(fmt, datefmt, style, cache_time=cache_time, clock=clock, render_cache=render_cache,
+                         exc_cache=exc_cache, exc_collapse=exc_collapse)
         self.color_config = color_config
 
+        init_colorama()
+
+        # level name -> (color code, reset code), logme.config.ColorConfig has them computed already
+        self._color_codes = dict(getattr(color_config, 'codes', {}))
+
     def format(self, record):
         msg = super().format(record)
-        record_level = record.levelname
 
         if self.color_config:
-            color_style = self.color_config.get(record_level)
+            codes = self._get_color_codes(record.levelname)
 
-            if color_style:
-                if isinstance(color_style, dict):
-                    color = Color(**color_style).code
-                if isinstance(color_style, str):
-                    color = Color(color_style).code
+            if codes:
+                msg = f"{codes[0]}{msg}{codes[1]}"
 
-                # reset code after logging message
-                color_reset = Color('reset').code
+        return msg
 
-                msg = f"{color}{msg}{color_reset}"
+    def _get_color_codes(self, level_name: str) -> tuple:
+        """
+        Get the color code and reset code for the level, computed once per level
 
-        return msg
+        :return: None if no color is configured for the level
+        """
+        try:
+            return self._color_codes[level_name]
+        except KeyError:
+            pass
+
+        color_style = self.color_config.get(level_name)
+        codes = None
+
+        if color_style:
+            if isinstance(color_style, dict):
+                color = Color(**color_style).code
+            if isinstance(color_style, str):
+                color = Color(color_style).code
+
+            # reset code after logging message
+            codes = (color, Color('reset').code)
+
+        self._color_codes[level_name] = codes
+
+        return codes
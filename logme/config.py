@@ -0,0 +1,302 @@
+import copy
+import logging
+import threading
+
+from pathlib import Path
+from typing import Union
+from configparser import NoSectionError
+
+from . import formatters
+from .ini import read_ini
+from .handler_types import handler_registry
+from .color_provider import Color
+from .utils import get_ini_file_path
+from .exceptions import InvalidOption, InvalidLoggerConfig, InvalidColorConfig
+
+
+MASTER_OPTIONS = ['level', 'formatter']
+HANDLER_OPTIONS = ['type', 'active', 'level', 'formatter']
+
+_loaded = {}  # (logme.ini path, section name) -> (parsed sections, config object)
+_loaded_lock = threading.Lock()
+
+
+def resolve_level(level: Union[str, int]) -> Union[int, None]:
+    """
+    Get the level number from a level name or number
+
+    :return: None if *level* is not set
+    """
+    if isinstance(level, str):
+        try:
+            return logging._nameToLevel[level.upper()]
+        except KeyError:
+            raise InvalidOption(f"'{level}' is not a valid level option")
+    if isinstance(level, int):  # logging.ERROR is also type of int
+        return level
+
+
+def resolve_handler_class(handler_type: str) -> type:
+    """
+    Get the handler class from the handler type, see logme.handler_types.HandlerRegistry
+    """
+    return handler_registry.get_class(handler_type)
+
+
+def resolve_formatter_class(formatter_type: str) -> type:
+    """
+    Get the formatter class from logme.formatters by name
+    """
+    formatter_class = getattr(formatters, formatter_type, None)
+
+    if not (isinstance(formatter_class, type) and issubclass(formatter_class, logging.Formatter)):
+        raise InvalidOption(f"'{formatter_type}' is not a valid formatter type")
+
+    return formatter_class
+
+
+class _Frozen:
+    """
+    Read only slotted object, config objects are shared between the loggers configured from the same section
+    """
+    __slots__ = []
+
+    def __init__(self, **attrs):
+        for attr, value in attrs.items():
+            object.__setattr__(self, attr, value)
+
+    def __setattr__(self, attr, value):
+        raise AttributeError(f"{self.__class__.__name__} is read only")
+
+
+class FormatterConfig(_Frozen):
+    """
+    Formatter config with the formatter class and arguments resolved
+
+    :param formatter_class: class set with 'type' in the formatter dict, None for the handler default
+    :param args: arguments to be passed to the formatter class
+    :param source: formatter config as in logme.ini, string or dict
+    """
+    __slots__ = ['formatter_class', 'args', 'source']
+
+    def __init__(self, formatter_class: Union[type, None], args: dict, source: Union[str, dict]):
+        super().__init__(formatter_class=formatter_class, args=args, source=source)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.source!r}>"
+
+    @classmethod
+    def from_config(cls, formatter: Union[str, dict, 'FormatterConfig']) -> 'FormatterConfig':
+        """
+        :param formatter: '{' style format string, or dict of the formatter arguments
+        """
+        if isinstance(formatter, FormatterConfig):
+            return formatter
+
+        if isinstance(formatter, dict):
+            args = dict(formatter)
+        elif isinstance(formatter, str):
+            args = {'fmt': formatter, 'style': '{'}
+        else:
+            raise ValueError(f"Invalid formatter type: '{type(formatter)}', "
+                             f"formatter must be passed as either dict or string")
+
+        formatter_type = args.pop('type', None)
+        formatter_class = resolve_formatter_class(formatter_type) if formatter_type else None
+
+        return cls(formatter_class, args, formatter)
+
+    def build(self, default_class: type) -> logging.Formatter:
+        """
+        Get a new formatter object, *default_class* is used if 'type' is not set
+        """
+        return (self.formatter_class or default_class)(**self.args)
+
+
+class HandlerConfig(_Frozen):
+    """
+    Config of a handler in a logger config section
+
+    :param name: name of the handler, key in the config section
+    :param handler_type: e.g. StreamHandler, mypkg.handlers.FastHandler, the handler name for configs before v1.1.0
+    :param handler_class: resolved class of active handlers, None for inactive handlers
+    :param active: False if the handler is disabled in the config
+    :param level: level number, None to follow the master level
+    :param formatter: FormatterConfig, None to follow the master formatter
+    :param args: arguments to be passed to the handler class
+    :param deprecated: True if 'type' is not set, configs before v1.1.0
+    """
+    __slots__ = ['name', 'handler_type', 'handler_class', 'active', 'level', 'formatter', 'args', 'deprecated']
+
+    def __init__(self, name: str, handler_type: str, handler_class: Union[type, None], active: bool,
+                 level: Union[int, None], formatter: Union[FormatterConfig, None], args: dict, deprecated: bool):
+        super().__init__(name=name, handler_type=handler_type, handler_class=handler_class, active=active,
+                         level=level, formatter=formatter, args=args, deprecated=deprecated)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name} type={self.handler_type} active={self.active}>"
+
+    @classmethod
+    def from_dict(cls, name: str, config: dict) -> 'HandlerConfig':
+        if not isinstance(config, dict):
+            raise InvalidLoggerConfig(f"handler '{name}' must be configured with 'key: value' options")
+
+        handler_type = config.get('type', name)
+        active = config.get('active') is not False
+        formatter = config.get('formatter')
+
+        return cls(name=name,
+                   handler_type=handler_type,
+                   handler_class=resolve_handler_class(handler_type) if active else None,
+                   active=active,
+                   level=resolve_level(config.get('level')),
+                   formatter=FormatterConfig.from_config(formatter) if formatter else None,
+                   args={k: v for k, v in config.items() if k not in HANDLER_OPTIONS},
+                   deprecated='type' not in config)
+
+    def get_handler_class(self) -> type:
+        """
+        Handler class of inactive handlers are resolved on demand, e.g. handlers used as a target
+        """
+        return self.handler_class or resolve_handler_class(self.handler_type)
+
+
+class LoggerConfig(_Frozen):
+    """
+    Logger config section, validated and resolved once when it is loaded
+
+    Usage:
+        >>> config = LoggerConfig.from_dict(get_logger_config(__file__, 'my_config'))
+        >>> [handler_config.name for handler_config in config.active_handlers]
+
+    :param level: master level number
+    :param formatter: master FormatterConfig
+    :param handlers: {handler name: HandlerConfig}, in the order of the config
+    :param source: the config dict, *read only*
+    """
+    __slots__ = ['level', 'formatter', 'handlers', 'active_handlers', 'source']
+
+    def __init__(self, level: int, formatter: FormatterConfig, handlers: dict, source: dict):
+        super().__init__(level=level, formatter=formatter, handlers=handlers,
+                         active_handlers=tuple(i for i in handlers.values() if i.active), source=source)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} level={logging.getLevelName(self.level)} handlers={list(self.handlers)}>"
+
+    @classmethod
+    def from_dict(cls, config: Union[dict, 'LoggerConfig']) -> 'LoggerConfig':
+        """
+        :raises: InvalidLoggerConfig, if 'level' or 'formatter' is missing, or a handler config is not a dict
+        """
+        if isinstance(config, LoggerConfig):
+            return config
+
+        for option in MASTER_OPTIONS:
+            if config.get(option) is None:
+                raise InvalidLoggerConfig(f"'{option}' is not set in the logger config")
+
+        # Loggers keep a reference to the source, it is copied so that changes to the dict passed in don't apply
+        source = copy.deepcopy(config)
+
+        handlers = {name: HandlerConfig.from_dict(name, value) for name, value in source.items()
+                    if name not in MASTER_OPTIONS}
+
+        return cls(level=resolve_level(source['level']),
+                   formatter=FormatterConfig.from_config(source['formatter']),
+                   handlers=handlers,
+                   source=source)
+
+
+class ColorConfig(_Frozen):
+    """
+    'colors' section, with the color codes of the levels computed once when it is loaded
+
+    :param styles: {level name: color name or dict of color, style and bg}
+    :param codes: {level name: (color code, reset code)}, None for the levels without color
+    """
+    __slots__ = ['styles', 'codes']
+
+    def __init__(self, styles: dict, codes: dict):
+        super().__init__(styles=styles, codes=codes)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {list(self.styles)}>"
+
+    def __bool__(self):
+        return bool(self.styles)
+
+    def get(self, level_name: str, default=None):
+        return self.styles.get(level_name, default)
+
+    @classmethod
+    def from_dict(cls, colors: Union[dict, 'ColorConfig']) -> 'ColorConfig':
+        """
+        :raises: InvalidColorConfig, if a color or a style is not valid
+        """
+        if isinstance(colors, ColorConfig):
+            return colors
+
+        codes = {}
+        reset_code = Color('reset').code
+
+        for level_name, color_style in colors.items():
+            if not color_style:
+                codes[level_name] = None
+            elif isinstance(color_style, dict):
+                codes[level_name] = (Color(**color_style).code, reset_code)
+            elif isinstance(color_style, str):
+                codes[level_name] = (Color(color_style).code, reset_code)
+            else:
+                raise InvalidColorConfig(f"'{color_style}' is not a valid color for {level_name}")
+
+        return cls(styles=copy.deepcopy(colors), codes=codes)
+
+
+def load_logger_config(caller_file_path: Union[str, Path], name: str=None) -> LoggerConfig:
+    """
+    Get the LoggerConfig of a logme.ini section, loaded once and shared until logme.ini is modified
+
+    :param caller_file_path: file path of the caller, __file__
+    :param name: the name(section in logme.ini) of the config to be passed. (optional, default: 'logme')
+
+    :raises: InvalidLoggerConfig, if name is not in config, or name == 'colors'
+    """
+    if name == 'colors':
+        raise InvalidLoggerConfig("'colors' cannot be used as a logger configuration")
+
+    try:
+        return _load(caller_file_path, name or 'logme', LoggerConfig.from_dict)
+    except NoSectionError:
+        raise InvalidLoggerConfig(f"Invalid logger config '{name or 'logme'}'")
+
+
+def load_color_config(caller_file_path: Union[str, Path]) -> Union[ColorConfig, None]:
+    """
+    Get the ColorConfig of the 'colors' section, None if the section is not found
+    """
+    try:
+        return _load(caller_file_path, 'colors', ColorConfig.from_dict)
+    except NoSectionError:
+        return
+
+
+def _load(caller_file_path: Union[str, Path], name: str, factory):
+    ini_path = get_ini_file_path(caller_file_path)
+    sections = read_ini(ini_path)
+
+    # read_ini() returns the same sections until the file is modified
+    loaded = _loaded.get((ini_path, name))
+    if loaded and loaded[0] is sections:
+        return loaded[1]
+
+    try:
+        section = sections[name]
+    except KeyError:
+        raise NoSectionError(name)
+
+    config = factory(section)
+
+    with _loaded_lock:
+        _loaded[(ini_path, name)] = (sections, config)
+
+    return config
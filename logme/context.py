@@ -0,0 +1,108 @@
+import logging
+
+from types import MappingProxyType
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .exceptions import InvalidOption
+
+
+_EMPTY = MappingProxyType({})
+
+# Bound fields are stored as read only mappings, binding always creates a new mapping,
+# so the mapping can be shared by every record created in the same context without copying
+_context_fields = ContextVar('logme_context_fields', default=_EMPTY)
+
+# Attributes of the records which can't be overwritten by the bound fields, same as the 'extra' of Logger.makeRecord()
+RESERVED_FIELDS = frozenset(logging.LogRecord('', logging.NOTSET, '', 0, '', (), None).__dict__) | \
+    {'message', 'asctime', 'context'}
+
+
+def _check_fields(fields: dict):
+    reserved = sorted(RESERVED_FIELDS.intersection(fields))
+
+    if reserved:
+        raise InvalidOption(f"{reserved} can't be bound, they are attributes of the log records")
+
+
+def bind(**fields):
+    """
+    Bind the fields to the current context, they are added to all the records logged from the current
+    thread or asyncio task
+
+    Usage:
+        >>> logme.context.bind(request_id='abc', tenant_id=1)
+
+    :raises InvalidOption: if a field is an attribute of the log records, e.g. 'name', 'msg', 'args'
+    """
+    _check_fields(fields)
+
+    new_fields = dict(_context_fields.get())
+    new_fields.update(fields)
+
+    _context_fields.set(MappingProxyType(new_fields))
+
+
+def unbind(*keys: str):
+    """
+    Remove the fields from the current context
+    """
+    new_fields = {k: v for k, v in _context_fields.get().items()
+                  if k not in keys}
+
+    _context_fields.set(MappingProxyType(new_fields))
+
+
+def clear():
+    """
+    Remove all the fields from the current context
+    """
+    _context_fields.set(_EMPTY)
+
+
+def get_context() -> MappingProxyType:
+    """
+    Get the fields bound to the current context, as a read only mapping
+    """
+    return _context_fields.get()
+
+
+@contextmanager
+def scope(**fields):
+    """
+    Bind the fields only within the with-block
+
+    Usage:
+        >>> with logme.context.scope(request_id='abc'):
+        ...     logger.info('handling request')
+    """
+    _check_fields(fields)
+
+    token = _context_fields.set(MappingProxyType({**_context_fields.get(), **fields}))
+    try:
+        yield
+    finally:
+        _context_fields.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Inject the fields bound to the current context into the record.
+
+    *Attached to the logger by LogmeLogger, so each record is only enriched once, at creation*
+
+    - Fields are set as record attributes, to be used in formatters. e.g. '{request_id} - {message}'
+    - record.context holds a plain dict of all the bound fields, so the records stay picklable,
+      e.g. for SocketHandler and QueueHandler
+    """
+    def filter(self, record: logging.LogRecord) -> bool:
+        fields = _context_fields.get()
+
+        record.context = dict(fields)
+        if fields:
+            record.__dict__.update(fields)
+
+        return True
+
+
+context_filter = ContextFilter()
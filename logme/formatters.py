@@ -0,0 +1,361 @@
+import json
+import time
+import logging
+import weakref
+import builtins
+import threading
+import traceback
+
+from typing import Union
+from collections import OrderedDict
+
+from .exceptions import InvalidOption
+
+
+_TRACEBACK_HEADER = 'Traceback (most recent call last):\n'
+_CAUSE_HEADER = '\nThe above exception was the direct cause of the following exception:\n\n'
+_CONTEXT_HEADER = '\nDuring handling of the above exception, another exception occurred:\n\n'
+
+# Exception groups render nested tracebacks, they are not cached
+_EXCEPTION_GROUP = getattr(builtins, 'BaseExceptionGroup', None)
+
+# record -> {render key: formatted output}, kept out of the record attributes so pickled records do not carry it
+_render_caches = weakref.WeakKeyDictionary()
+
+
+class MonotonicClock:
+    """
+    Wall clock derived from time.monotonic() and an epoch offset captured once,
+    timestamps produced by this clock never go backwards when the system clock is adjusted.
+
+    Usage:
+        >>> clock = MonotonicClock()
+        >>> created = clock.time()
+    """
+    def __init__(self):
+        self.epoch_offset = time.time() - time.monotonic()
+
+    def time(self) -> float:
+        return self.epoch_offset + time.monotonic()
+
+
+# Shared by all the monotonic formatters, so they stamp the records from the same epoch offset
+monotonic_clock = MonotonicClock()
+
+
+def stamp_record(record: logging.LogRecord):
+    """
+    Overwrite the record creation time with the time of the shared monotonic clock, once per record
+    """
+    if getattr(record, '_logme_clock_stamped', False):
+        return
+
+    created = monotonic_clock.time()
+
+    record.created = created
+    record.msecs = (created - int(created)) * 1000
+    record.relativeCreated = (created - logging._startTime) * 1000
+    record._logme_clock_stamped = True
+
+
+class ClockFilter(logging.Filter):
+    """
+    Stamp the records with the shared monotonic clock.
+
+    *Attached by LogmeLogger to the loggers with a 'clock: monotonic' formatter, so the records are stamped
+    when they are created, not when they are formatted, e.g. after a RingBufferHandler flush*
+    """
+    def filter(self, record: logging.LogRecord) -> bool:
+        stamp_record(record)
+
+        return True
+
+
+clock_filter = ClockFilter()
+
+
+class TracebackCache:
+    """
+    Bounded LRU of the rendered stacks of exception chains, keyed by the fingerprint of the chain,
+    the type of each exception with the (code, line) of the frames of its traceback.
+    Each fingerprint is given an id when it is added, referenced by the collapsed tracebacks.
+
+    :param maxsize: maximum number of fingerprints kept, least recently used dropped first
+    """
+    def __init__(self, maxsize: int=256):
+        self.maxsize = maxsize
+
+        self._entries = OrderedDict()  # fingerprint -> (id, rendered stack of each exception in the chain)
+        self._lock = threading.Lock()
+        self._last_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, fingerprint: tuple) -> Union[tuple, None]:
+        """
+        :return: (id, stacks), None if the fingerprint is not cached
+        """
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is not None:
+                self._entries.move_to_end(fingerprint)
+
+        return entry
+
+    def add(self, fingerprint: tuple, stacks: tuple) -> int:
+        """
+        :return: id of the fingerprint
+        """
+        with self._lock:
+            self._last_id += 1
+            self._entries[fingerprint] = (self._last_id, stacks)
+
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+            return self._last_id
+
+
+def get_exception_chain(exc: BaseException, tb) -> list:
+    """
+    Get the chain of an exception in the order it is printed by traceback.print_exception(), oldest first
+
+    :return: [(exception, traceback, header printed before the exception)]
+    """
+    chain = []
+    seen = set()
+
+    while True:
+        seen.add(id(exc))
+        older, header = None, None
+
+        if exc.__cause__ is not None:
+            older, header = exc.__cause__, _CAUSE_HEADER
+        elif exc.__context__ is not None and not exc.__suppress_context__:
+            older, header = exc.__context__, _CONTEXT_HEADER
+
+        if older is not None and id(older) in seen:
+            older, header = None, None
+
+        chain.append((exc, tb, header))
+        if older is None:
+            break
+
+        exc, tb = older, older.__traceback__
+
+    chain.reverse()
+
+    return chain
+
+
+def get_traceback_frames(tb) -> tuple:
+    """
+    Get the (code, line, last instruction) of the frames of a traceback,
+    the last instruction tells the position of the error markers of the line
+    """
+    frames = []
+    while tb is not None:
+        frames.append((tb.tb_frame.f_code, tb.tb_lineno, tb.tb_lasti))
+        tb = tb.tb_next
+
+    return tuple(frames)
+
+
+class LogmeFormatter(logging.Formatter):
+    """
+    logging.Formatter with optional cached timestamp formatting.
+
+    The output is cached per record, keyed by the rendering settings (render_key),
+    so handlers of a logger with identical formats only format each record once.
+
+    :param cache_time: cache the formatted date prefix per second (and per datefmt),
+                       only the milliseconds are formatted for every record
+    :param clock: 'wall' (default) uses record.created as is,
+                  'monotonic' stamps the record with the time of the shared MonotonicClock, when it is created
+                  if logged through a LogmeLogger (see ClockFilter), otherwise when it is first formatted
+    :param render_cache: share the formatted output of a record between the handlers,
+                         disable it if handler filters modify the records
+    :param exc_cache: number of exception fingerprints (exception types and traceback frames) to keep the rendered
+                      traceback of, so a repeated traceback is only rendered once. True for the default size,
+                      0 to disable
+    :param exc_collapse: render the repeated tracebacks in the cache as a reference to the first one,
+                         e.g. 'ValueError: bad input (same traceback as #3)'
+    """
+    clock_options = ['wall', 'monotonic']
+    default_exc_cache_size = 256
+
+    def __init__(self, fmt: str=None, datefmt: str=None, style: str='%',
+                 cache_time: bool=False, clock: str=None, render_cache: bool=True,
+                 exc_cache: Union[int, bool]=0, exc_collapse: bool=False):
+        super().__init__(fmt, datefmt, style)
+
+        clock = clock.lower() if clock else 'wall'
+        if clock not in self.clock_options:
+            raise InvalidOption(f"'{clock}' is not a valid clock option, "
+                                f"please use one of {self.clock_options}")
+
+        self.cache_time = cache_time
+        self.clock = clock
+
+        # (second, datefmt, formatted date prefix), replaced as a whole so it is safe to share between threads
+        self._time_cache = None
+
+        if exc_cache is True:
+            exc_cache = self.default_exc_cache_size
+        if exc_collapse and not exc_cache:
+            raise InvalidOption("'exc_collapse' requires 'exc_cache' to be enabled")
+
+        self.exc_cache = exc_cache
+        self.exc_collapse = exc_collapse
+        self._traceback_cache = TracebackCache(exc_cache) if exc_cache else None
+
+        self.render_cache = render_cache
+        self.render_key = self._get_render_key()
+
+    def _get_render_key(self) -> tuple:
+        """
+        Formatters with the same render key produce the same output for a record,
+        the render method identifies the subclasses rendering differently, e.g. JsonFormatter.
+        Collapsed tracebacks reference the ones rendered by the same formatter, so its output is not shared.
+        """
+        return (type(self)._render, self._fmt, self.datefmt, type(self._style), self.clock,
+                id(self) if self.exc_collapse else None)
+
+    def format(self, record: logging.LogRecord) -> str:
+        # Records not created through a LogmeLogger, e.g. propagated from a plain child logger
+        if self.clock == 'monotonic':
+            stamp_record(record)
+
+        if not self.render_cache:
+            return self._render_record(record)
+
+        cache = _render_caches.get(record)
+        if cache is None:
+            cache = _render_caches[record] = {}
+
+        output = cache.get(self.render_key)
+        if output is None:
+            output = cache[self.render_key] = self._render_record(record)
+
+        return output
+
+    def _render_record(self, record: logging.LogRecord) -> str:
+        """
+        record.exc_text is reused by the other handlers and the ancestor loggers,
+        the collapsed tracebacks are kept out of it
+        """
+        if not self.exc_collapse:
+            return self._render(record)
+
+        exc_text = record.exc_text
+        record.exc_text = None
+        try:
+            return self._render(record)
+        finally:
+            record.exc_text = exc_text
+
+    def _render(self, record: logging.LogRecord) -> str:
+        return super().format(record)
+
+    def formatTime(self, record: logging.LogRecord, datefmt: str=None) -> str:
+        if not self.cache_time:
+            return super().formatTime(record, datefmt)
+
+        second = int(record.created)
+        cached = self._time_cache
+
+        if cached is None or cached[0] != second or cached[1] != datefmt:
+            time_struct = self.converter(second)
+            prefix = time.strftime(datefmt or self.default_time_format, time_struct)
+
+            cached = (second, datefmt, prefix)
+            self._time_cache = cached
+
+        if datefmt or not self.default_msec_format:
+            return cached[2]
+
+        return self.default_msec_format % (cached[2], record.msecs)
+
+    def formatException(self, ei) -> str:
+        """
+        Same output as logging.Formatter.formatException(), with the stacks of the exception chain rendered
+        once per fingerprint when 'exc_cache' is enabled, only the exception lines are rendered for each record
+        """
+        exc, tb = ei[1], ei[2]
+
+        if self._traceback_cache is None or exc is None or (_EXCEPTION_GROUP and isinstance(exc, _EXCEPTION_GROUP)):
+            return super().formatException(ei)
+
+        chain = get_exception_chain(exc, tb)
+        fingerprint = tuple((type(exc), get_traceback_frames(tb)) for exc, tb, _ in chain)
+
+        cached = self._traceback_cache.get(fingerprint)
+        if cached is not None and self.exc_collapse:
+            exception_lines = ''.join(traceback.format_exception_only(type(exc), exc)).rstrip('\n')
+            return f"{exception_lines} (same traceback as #{cached[0]})"
+
+        if cached is None:
+            stacks = tuple(''.join(traceback.extract_tb(tb).format()) if tb is not None else None
+                           for _, tb, _ in chain)
+            traceback_id = self._traceback_cache.add(fingerprint, stacks)
+        else:
+            traceback_id, stacks = cached
+
+        parts = []
+        for (exc, _, header), stack in zip(chain, stacks):
+            if header:
+                parts.append(header)
+            if stack is not None:
+                parts += [_TRACEBACK_HEADER, stack]
+
+            parts += traceback.format_exception_only(type(exc), exc)
+
+        output = ''.join(parts)
+        if output[-1:] == '\n':
+            output = output[:-1]
+
+        if self.exc_collapse:
+            output += f" (traceback #{traceback_id})"
+
+        return output
+
+
+class JsonFormatter(LogmeFormatter):
+    """
+    Format the record as a JSON object, including the fields bound with logme.context
+
+    :param fields: record attributes to be included, e.g. ['asctime', 'name', 'levelname', 'message']
+    """
+    default_fields = ['asctime', 'name', 'levelname', 'message']
+
+    def __init__(self, fmt: str=None, datefmt: str=None, style: str='%', fields: list=None,
+                 cache_time: bool=False, clock: str=None, render_cache: bool=True,
+                 exc_cache: Union[int, bool]=0, exc_collapse: bool=False):
+        if isinstance(fields, str):
+            fields = [i.strip() for i in fields.split(',')]
+
+        self.fields = fields if fields else self.default_fields
+
+        super().__init__(fmt, datefmt, style, cache_time=cache_time, clock=clock, render_cache=render_cache,
+                         exc_cache=exc_cache, exc_collapse=exc_collapse)
+
+    def _get_render_key(self) -> tuple:
+        return super()._get_render_key() + (tuple(self.fields),)
+
+    def _render(self, record: logging.LogRecord) -> str:
+        record.message = record.getMessage()
+        if 'asctime' in self.fields:
+            record.asctime = self.formatTime(record, self.datefmt)
+
+        output = {field: getattr(record, field, None) for field in self.fields}
+        output.update(getattr(record, 'context', {}))
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            output['exc_info'] = record.exc_text
+        if record.stack_info:
+            output['stack_info'] = self.formatStack(record.stack_info)
+
+        return json.dumps(output, default=str)
@@ -0,0 +1,58 @@
+import logging
+
+
+_gates = {}  # level -> LevelGate
+
+
+class LevelGate:
+    """
+    Precomputed level checks of a logger, as plain boolean attributes.
+    Hot loops can skip a disabled logging call with a single attribute read,
+    without going through the logger method lookup and logging.Logger.isEnabledFor().
+
+    Usage:
+        >>> if logger.gate.debug:
+        ...     logger.debug(f"state: {expensive_dump()}")
+
+    Gates are immutable, LogmeLogger swaps in a new gate whenever its levels change,
+    so the attributes of a gate are always consistent with each other.
+    *Read the gate from the logger, as a gate kept aside is not updated*
+
+    :param level: lowest level enabled, None if the logger is disabled
+    """
+    __slots__ = ['level', 'debug', 'info', 'warning', 'error', 'critical']
+
+    def __init__(self, level: int=None):
+        enabled = (lambda x: False) if level is None else (lambda x: x >= level)
+
+        for attr, value in [('level', level),
+                            ('debug', enabled(logging.DEBUG)),
+                            ('info', enabled(logging.INFO)),
+                            ('warning', enabled(logging.WARNING)),
+                            ('error', enabled(logging.ERROR)),
+                            ('critical', enabled(logging.CRITICAL))]:
+            object.__setattr__(self, attr, value)
+
+    def __setattr__(self, attr, value):
+        raise AttributeError(f"{self.__class__.__name__} is read only")
+
+    @classmethod
+    def get(cls, level: int=None) -> 'LevelGate':
+        """
+        Get the gate of the level shared by all the loggers at the same level
+        """
+        gate = _gates.get(level)
+        if gate is None:
+            gate = _gates.setdefault(level, cls(level))
+
+        return gate
+
+    def __repr__(self):
+        level = 'disabled' if self.level is None else logging.getLevelName(self.level)
+        return f"<{self.__class__.__name__} ({level})>"
+
+    def enabled_for(self, level: int) -> bool:
+        """
+        Level check for custom level numbers
+        """
+        return self.level is not None and level >= self.level
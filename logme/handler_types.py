@@ -0,0 +1,167 @@
+import inspect
+import logging
+import threading
+import importlib
+
+from typing import Union
+from logging import handlers as logging_handlers
+
+from . import handlers as logme_handlers
+from .exceptions import InvalidOption
+
+
+ENTRY_POINT_GROUP = 'logme.handlers'
+
+
+class HandlerType:
+    """
+    Resolved handler class, with the metadata needed for creating its handlers
+
+    :param name: handler type as in logme.ini, e.g. 'FileHandler', 'mypkg.handlers.FastHandler'
+    :param handler_class: the handler class
+    :param requires_filename: True if the handler class has a 'filename' argument without default
+    """
+    __slots__ = ['name', 'handler_class', 'requires_filename']
+
+    def __init__(self, name: str, handler_class: type):
+        self.name = name
+        self.handler_class = handler_class
+
+        try:
+            parameter = inspect.signature(handler_class).parameters.get('filename')
+        except (TypeError, ValueError):  # signature not available, e.g. some builtin classes
+            parameter = None
+
+        self.requires_filename = parameter is not None and parameter.default is parameter.empty
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name} class={self.handler_class.__qualname__}>"
+
+
+class HandlerRegistry:
+    """
+    Resolve the handler types in logme.ini to handler classes, once per handler type.
+
+    Handler types are looked up in this order:
+        - handler classes registered with register()
+        - logging, logging.handlers and logme.handlers, by class name
+        - entry points in the 'logme.handlers' group, by entry point name
+        - dotted path to the class, e.g. 'mypkg.handlers.FastHandler'
+
+    Usage:
+        >>> from logme import handler_registry
+        >>> handler_registry.register('FastHandler', FastHandler)
+
+    Third party packages can provide handler types with an entry point, e.g. in setup.py:
+
+        entry_points={'logme.handlers': ['FastHandler = mypkg.handlers:FastHandler']}
+    """
+    modules = [logging, logging_handlers, logme_handlers]
+
+    def __init__(self):
+        self._types = {}  # handler type -> HandlerType
+        self._classes = {}  # handler class -> HandlerType
+        self._entry_points = None  # entry point name -> entry point, loaded on the first miss
+
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} types={sorted(self._types)}>"
+
+    def __contains__(self, handler_type: str) -> bool:
+        return handler_type in self._types
+
+    def register(self, name: str, handler_class: type):
+        """
+        Register the handler class as a handler type, overriding the handler type of the same name
+        """
+        handler_type = self._get_handler_type(name, handler_class)
+
+        with self._lock:
+            self._types[name] = handler_type
+
+    def unregister(self, name: str):
+        with self._lock:
+            self._types.pop(name, None)
+
+    def get(self, handler_type: Union[str, type]) -> HandlerType:
+        """
+        :param handler_type: name of the handler type, or the handler class
+
+        :raises: InvalidOption, if the handler type cannot be resolved
+        """
+        if isinstance(handler_type, type):
+            return self._classes.get(handler_type) or self._get_handler_type(handler_type.__name__, handler_type)
+
+        resolved = self._types.get(handler_type)
+        if resolved is None:
+            resolved = self._get_handler_type(handler_type, self._resolve(handler_type))
+
+            with self._lock:
+                resolved = self._types.setdefault(handler_type, resolved)
+
+        return resolved
+
+    def get_class(self, handler_type: Union[str, type]) -> type:
+        return self.get(handler_type).handler_class
+
+    def _get_handler_type(self, name: str, handler_class: type) -> HandlerType:
+        if not (isinstance(handler_class, type) and issubclass(handler_class, logging.Handler)):
+            raise InvalidOption(f"'{name}' is not a valid handler type, {handler_class!r} is not a handler class")
+
+        # Handler types of the same class share the metadata
+        resolved = self._classes.get(handler_class)
+        if resolved is None:
+            with self._lock:
+                resolved = self._classes.setdefault(handler_class, HandlerType(name, handler_class))
+
+        return resolved
+
+    def _resolve(self, handler_type: str) -> type:
+        for module in self.modules:
+            handler_class = getattr(module, handler_type, None)
+
+            if handler_class:
+                return handler_class
+
+        entry_point = self._get_entry_points().get(handler_type)
+        if entry_point:
+            return entry_point.load()
+
+        if '.' in handler_type:
+            module_name, _, class_name = handler_type.rpartition('.')
+
+            try:
+                return getattr(importlib.import_module(module_name), class_name)
+            except (ImportError, AttributeError) as e:
+                raise InvalidOption(f"'{handler_type}' is not a valid handler type: {e}") from e
+
+        raise InvalidOption(f"'{handler_type}' is not a valid handler type")
+
+    def _get_entry_points(self) -> dict:
+        if self._entry_points is None:
+            self._entry_points = {entry_point.name: entry_point for entry_point in _iter_entry_points()}
+
+        return self._entry_points
+
+
+def _iter_entry_points():
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # Python 3.7
+        try:
+            import pkg_resources
+        except ImportError:
+            return []
+
+        return pkg_resources.iter_entry_points(ENTRY_POINT_GROUP)
+
+    all_entry_points = entry_points()
+
+    if hasattr(all_entry_points, 'select'):
+        return all_entry_points.select(group=ENTRY_POINT_GROUP)
+
+    return all_entry_points.get(ENTRY_POINT_GROUP, [])
+
+
+handler_registry = HandlerRegistry()
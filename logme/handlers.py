@@ -0,0 +1,852 @@
+import os
+import gzip
+import json
+import time
+import heapq
+import queue
+import signal
+import logging
+import threading
+import itertools
+import logging.handlers
+
+from pathlib import Path
+from collections import deque
+from operator import attrgetter
+from typing import Union
+from urllib.parse import urlsplit
+
+from .utils import ensure_dir
+from .spool import SpoolingHandler
+from .index import TimeIndexWriter, get_index_path, remove_orphan_indexes
+from .exceptions import InvalidOption
+
+
+def _to_level(level: Union[str, int]) -> int:
+    if isinstance(level, str):
+        level = level.upper()
+
+    return logging._checkLevel(level)
+
+
+def unwrap_handler(handler: logging.Handler) -> logging.Handler:
+    """
+    Get the handler doing the output, through the handlers wrapping a target with the same level and formatter,
+    e.g. SpoolingHandler, ConcurrentHandler, IndexingHandler, RingBufferHandler
+    """
+    while isinstance(handler, (SpoolingHandler, ConcurrentHandler, IndexingHandler, RingBufferHandler)) and \
+            handler.target is not None:
+        handler = handler.target
+
+    return handler
+
+
+def iter_handler_chain(handler: logging.Handler):
+    """
+    Iterate through the handler and the handlers it wraps, see unwrap_handler()
+    """
+    yield handler
+
+    while isinstance(handler, (SpoolingHandler, ConcurrentHandler, IndexingHandler, RingBufferHandler)) and \
+            handler.target is not None:
+        handler = handler.target
+        yield handler
+
+
+class RingBufferHandler(logging.Handler):
+    """
+    Keep the last *capacity* records in a fixed size ring buffer,
+    the buffer is flushed to the *target* handler only when a record at or above *flush_level* arrives,
+    or when flush() is called, e.g. from a signal.
+
+    Records are kept unformatted, they are only formatted by the target handler when flushed.
+
+    Usage in logme.ini:
+
+        ring =
+            type: RingBufferHandler
+            active: True
+            level: DEBUG
+            capacity: 1000
+            flush_level: ERROR
+            target: file
+
+    *target* names another handler in the same config section,
+    set 'active: False' on the target handler to only output records through the ring buffer.
+    The target follows the level and formatter of the ring buffer handler.
+
+    :param capacity: maximum number of records kept in the buffer, oldest records are dropped first
+    :param flush_level: level of the record which triggers the flush
+    :param target: the handler the records are flushed to
+    :param flush_signal: signal number or name which triggers the flush, e.g. 'SIGUSR1'.
+                         Installed with install_signal() once the handler is added to a logger.
+                         *can only be installed from the main thread*
+    """
+    def __init__(self, capacity: int=1000, flush_level: Union[str, int]=logging.ERROR,
+                 target: logging.Handler=None, flush_signal: Union[str, int]=None):
+        super().__init__()
+
+        self.capacity = capacity
+        self.buffer = deque(maxlen=capacity)
+        self.flush_level = _to_level(flush_level)
+        self.target = target
+        self.flush_signal = flush_signal
+
+        # Signals received, handed over to the flusher thread. SimpleQueue.put() is reentrant,
+        # so the signal handler never waits on a lock held by the thread it interrupted
+        self._signals = queue.SimpleQueue()
+        self._flusher = None
+
+    def __repr__(self):
+        level = logging.getLevelName(self.level)
+        return f"<{self.__class__.__name__} ({level}) capacity={self.capacity} target={self.target!r}>"
+
+    def setLevel(self, level: Union[str, int]):
+        super().setLevel(level)
+        if self.target:
+            self.target.setLevel(level)
+
+    def setFormatter(self, fmt: logging.Formatter):
+        super().setFormatter(fmt)
+        if self.target:
+            self.target.setFormatter(fmt)
+
+    def emit(self, record: logging.LogRecord):
+        self.buffer.append(record)
+
+        if record.levelno >= self.flush_level:
+            self.flush()
+
+    def flush(self):
+        """
+        Hand all the buffered records over to the target handler, records below the target level are skipped.
+        The buffer is emptied even without target
+        """
+        with self.lock:
+            buffer = self.buffer
+            target = self.target
+
+            while buffer:
+                record = buffer.popleft()
+
+                if target and record.levelno >= target.level:
+                    target.handle(record)
+
+            if target:
+                target.flush()
+
+    def set_target(self, target: logging.Handler):
+        with self.lock:
+            self.target = target
+
+    def install_signal(self, signum: Union[str, int]=None):
+        """
+        Flush the buffer when the signal is received, the existing signal handler is still called.
+        The flush runs on a flusher thread, the interrupted thread may be holding the handler locks.
+
+        :param signum: signal number or name, *flush_signal* if not set
+        """
+        signum = signum or self.flush_signal
+        if isinstance(signum, str):
+            signum = getattr(signal, signum.upper())
+
+        previous_handler = signal.getsignal(signum)
+
+        def flush_handler(received, frame):
+            self._signals.put(received)
+
+            if callable(previous_handler):
+                previous_handler(received, frame)
+
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_signals, name='logme-ring-buffer-flusher',
+                                             daemon=True)
+            self._flusher.start()
+
+        signal.signal(signum, flush_handler)
+
+    def close(self):
+        if self._flusher:
+            self._signals.put(None)
+            self._flusher.join()
+            self._flusher = None
+
+        super().close()
+
+    def _flush_signals(self):
+        while self._signals.get() is not None:
+            self.flush()
+
+
+class _ConnectionPool:
+    """
+    Persistent HTTP connections, kept alive between batches
+    """
+    def __init__(self, url: str, size: int, timeout: float):
+        # http.client pulls in ssl and email, imported here so only shipping handlers pay for it
+        from http.client import HTTPConnection, HTTPSConnection, HTTPException
+
+        parsed = urlsplit(url)
+
+        self.connection_class = HTTPSConnection if parsed.scheme == 'https' else HTTPConnection
+        self.errors = (OSError, HTTPException)
+        self.netloc = parsed.netloc
+        self.path = parsed.path or '/'
+        self.size = size
+        self.timeout = timeout
+
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+
+        if create:
+            return self.connection_class(self.netloc, timeout=self.timeout)
+
+        return self._idle.get()
+
+    def release(self, connection):
+        self._idle.put(connection)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class ShippingHandler(logging.Handler):
+    """
+    Ship records to a collector over HTTP in batches.
+
+    - Records are batched by count, bytes or time and posted as newline delimited JSON, gzip compressed.
+    - Batches are sent by background threads over persistent connections, logging calls never wait on the network.
+      With the default single sender, batches are delivered in order. With *pool_size* above 1, batches are sent
+      concurrently and can reach the collector out of order.
+    - Failed batches are retried with exponential backoff, then spooled to *spool_dir* while the collector
+      is unreachable. Spooled batches are sent in order once the collector is reachable again.
+      The spool is bounded by *spool_max_bytes*, the oldest batches are dropped first.
+
+    Usage in logme.ini:
+
+        ship =
+            type: ShippingHandler
+            active: True
+            url: http://127.0.0.1:9020/logs
+            batch_size: 500
+            flush_interval: 1.0
+            spool_dir: /var/spool/myapp
+
+    *logme.collector.LocalCollector can be used as the collector for testing*
+
+    :param url: http or https url of the collector
+    :param batch_size: maximum number of records in a batch
+    :param batch_bytes: maximum size of a batch before compression
+    :param flush_interval: seconds after which a partial batch is sent
+    :param compress: gzip compress the batches
+    :param pool_size: number of connections, and threads sending the batches, batches can be delivered out of order
+                      with more than one
+    :param max_retries: number of retries before the batch is spooled
+    :param backoff: delay of the first retry in seconds, doubled for every retry
+    :param max_backoff: maximum delay between retries, batches are spooled without retrying for this long
+                        after the collector is found unreachable
+    :param timeout: connection timeout in seconds
+    :param spool_dir: directory for batches which cannot be delivered, batches are dropped if not set
+    :param spool_max_bytes: maximum size of the spooled batches, the oldest batches are dropped above it
+    """
+    spool_suffix = '.batch'
+
+    def __init__(self, url: str, batch_size: int=500, batch_bytes: int=1048576, flush_interval: float=1.0,
+                 compress: bool=True, pool_size: int=1, max_retries: int=3, backoff: float=0.5,
+                 max_backoff: float=30.0, timeout: float=5.0, spool_dir: str=None,
+                 spool_max_bytes: int=104857600):
+        super().__init__()
+
+        if urlsplit(url).scheme not in ['http', 'https']:
+            raise InvalidOption(f"'{url}' is not a valid collector url, only http and https are supported")
+
+        self.url = url
+        self.batch_size = batch_size
+        self.batch_bytes = batch_bytes
+        self.flush_interval = flush_interval
+        self.compress = compress
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.spool_dir = spool_dir
+        self.spool_max_bytes = spool_max_bytes
+
+        if spool_dir:
+            ensure_dir(spool_dir, path_type='current')
+
+        self.stats = {'sent_records': 0, 'sent_batches': 0, 'retries': 0, 'spooled_batches': 0,
+                      'dropped_batches': 0}
+
+        self._pool = _ConnectionPool(url, pool_size, timeout)
+        self._batch = []
+        self._batch_size_bytes = 0
+        self._batches = queue.Queue()
+        self._threads = []
+        self._stopped = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._spool_lock = threading.Lock()
+        self._spool_seq = itertools.count()
+        self._unreachable_until = 0
+
+    def __repr__(self):
+        level = logging.getLevelName(self.level)
+        return f"<{self.__class__.__name__} {self.url} ({level})>"
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            line = self._encode(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        # Threads are started on the first record,
+        # so handler objects discarded by LogmeLogger duplicate check do not leave threads behind
+        if not self._threads:
+            self._start()
+
+        self._batch.append(line)
+        self._batch_size_bytes += len(line)
+
+        if len(self._batch) >= self.batch_size or self._batch_size_bytes >= self.batch_bytes:
+            self._enqueue_batch()
+
+    def flush(self, timeout: float=None):
+        """
+        Send the current batch, and wait for all the pending batches to be sent or spooled
+        """
+        with self.lock:
+            self._enqueue_batch()
+
+        if not self._threads or self._stopped.is_set():
+            return
+
+        with self._batches.all_tasks_done:
+            self._batches.all_tasks_done.wait_for(lambda: not self._batches.unfinished_tasks, timeout)
+
+    def close(self):
+        if self._stopped.is_set():
+            return
+
+        with self.lock:
+            self._enqueue_batch()
+
+        self._stopped.set()
+
+        for _ in self._threads:
+            self._batches.put(None)
+
+        for thread in self._threads:
+            thread.join()
+
+        self._pool.close()
+        super().close()
+
+    def _encode(self, record: logging.LogRecord) -> bytes:
+        data = {
+            'name': record.name,
+            'levelname': record.levelname,
+            'created': record.created,
+            'message': self.format(record),
+        }
+
+        context = getattr(record, 'context', None)
+        if context:
+            data['context'] = dict(context)
+
+        return (json.dumps(data, default=str) + '\n').encode('utf-8')
+
+    def _start(self):
+        with self.lock:
+            if self._threads:
+                return
+
+            threads = [threading.Thread(target=self._send_loop, daemon=True)
+                       for _ in range(self.pool_size)]
+            threads.append(threading.Thread(target=self._flush_loop, daemon=True))
+
+            for thread in threads:
+                thread.start()
+
+            self._threads = threads[:-1]
+
+    def _enqueue_batch(self):
+        """
+        Hand the current batch to the sender threads, *must be called with self.lock acquired*
+        """
+        if self._batch:
+            self._batches.put(self._batch)
+
+            self._batch = []
+            self._batch_size_bytes = 0
+
+    def _flush_loop(self):
+        while not self._stopped.wait(self.flush_interval):
+            with self.lock:
+                self._enqueue_batch()
+
+            # Retry the spooled batches even when no new records are logged
+            if self.spool_dir and time.monotonic() >= self._unreachable_until:
+                self._drain_spool()
+
+    def _send_loop(self):
+        while True:
+            batch = self._batches.get()
+
+            try:
+                if batch is None:
+                    return
+
+                self._ship(batch)
+            except Exception:
+                self._increase_stat('dropped_batches')
+            finally:
+                self._batches.task_done()
+
+    def _ship(self, batch: list):
+        payload = b''.join(batch)
+        if self.compress:
+            payload = gzip.compress(payload)
+
+        if time.monotonic() < self._unreachable_until:
+            self._spool(payload, len(batch))
+            return
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._increase_stat('retries')
+
+                delay = min(self.backoff * 2 ** (attempt - 1), self.max_backoff)
+                if self._stopped.wait(delay):  # Stop retrying when the handler is being closed
+                    break
+
+            if self._post(payload):
+                self._increase_stat('sent_batches')
+                self._increase_stat('sent_records', len(batch))
+
+                self._unreachable_until = 0
+                self._drain_spool()
+                return
+
+        self._unreachable_until = time.monotonic() + self.max_backoff
+        self._spool(payload, len(batch))
+
+    def _post(self, payload: bytes) -> bool:
+        """
+        :return: True if the batch is accepted by the collector
+        """
+        headers = {'Content-Type': 'application/x-ndjson'}
+        if self.compress:
+            headers['Content-Encoding'] = 'gzip'
+
+        connection = self._pool.acquire()
+        try:
+            connection.request('POST', self._pool.path, body=payload, headers=headers)
+
+            response = connection.getresponse()
+            response.read()
+
+            return response.status < 300
+        except self._pool.errors:
+            connection.close()
+            return False
+        finally:
+            self._pool.release(connection)
+
+    def _spool(self, payload: bytes, records: int):
+        """
+        Write the batch to the spool, the number of records is kept in the file name
+        """
+        if not self.spool_dir:
+            self._increase_stat('dropped_batches')
+            return
+
+        file_name = f"{time.time_ns():020d}-{next(self._spool_seq):08d}-{records}"
+        spool_file = Path(self.spool_dir) / f"{file_name}{self.spool_suffix}"
+        tmp_file = spool_file.with_suffix('.tmp')
+
+        tmp_file.write_bytes(payload)
+        tmp_file.rename(spool_file)
+
+        self._increase_stat('spooled_batches')
+        self._trim_spool()
+
+    def _get_spool_files(self) -> list:
+        """
+        :return: spooled batch files, oldest first
+        """
+        return sorted(Path(self.spool_dir).glob(f"*{self.spool_suffix}"))
+
+    def _trim_spool(self):
+        """
+        Drop the oldest spooled batches while the spool is over *spool_max_bytes*
+        """
+        sizes = []
+        for spool_file in self._get_spool_files():
+            try:
+                sizes.append((spool_file, spool_file.stat().st_size))
+            except FileNotFoundError:  # sent by _drain_spool() in the meantime
+                pass
+
+        total = sum(size for _, size in sizes)
+
+        for spool_file, size in sizes:
+            if total <= self.spool_max_bytes:
+                break
+
+            try:
+                spool_file.unlink()
+            except FileNotFoundError:
+                continue
+
+            total -= size
+            self._increase_stat('dropped_batches')
+
+    def _drain_spool(self):
+        """
+        Send the spooled batches in order, stop at the first failure
+        """
+        if not self.spool_dir or not self._spool_lock.acquire(blocking=False):
+            return
+
+        try:
+            for spool_file in self._get_spool_files():
+                try:
+                    payload = spool_file.read_bytes()
+                except FileNotFoundError:  # dropped by _trim_spool()
+                    continue
+
+                if not self._post(payload):
+                    self._unreachable_until = time.monotonic() + self.max_backoff
+                    break
+
+                try:
+                    spool_file.unlink()
+                except FileNotFoundError:
+                    pass
+
+                self._increase_stat('sent_batches')
+                self._increase_stat('sent_records', self._get_spooled_records(spool_file))
+        finally:
+            self._spool_lock.release()
+
+    def _get_spooled_records(self, spool_file: Path) -> int:
+        """
+        Number of records of a spooled batch, from its file name
+        """
+        records = spool_file.stem.rsplit('-', 2)[-1]
+
+        return int(records) if spool_file.stem.count('-') == 2 and records.isdigit() else 0
+
+    def _increase_stat(self, key: str, value: int=1):
+        with self._stats_lock:
+            self.stats[key] += value
+
+
+class ConcurrentHandler(logging.Handler):
+    """
+    Scale the emits of many threads to a single *target* handler.
+
+    - Logging threads format the records, then append them to sharded queues without taking the handler lock.
+      Each thread is assigned a shard on its first record, so threads only contend with the threads on the same shard.
+    - A single writer thread merges the shards and hands the records over to the target.
+      The output formatted by the logging threads is cached for the record (see 'render_cache' formatter option),
+      so the target does not format the records again.
+
+    Ordering:
+    - records logged from the same thread are written in order.
+    - records logged from different threads are ordered by creation time within each batch taken by the writer,
+      a record can be written before an earlier record of another thread only if they are in different batches.
+    - records logged after close() are dropped, and counted in *dropped_records*.
+
+    Usage in logme.ini, any handler can opt into the concurrent mode:
+
+        file =
+            type: FileHandler
+            active: True
+            filename: mylogpath/foo.log
+            concurrent: True
+            concurrent_shards: 8
+
+    :param target: the handler the records are handed to
+    :param shards: number of queues, number of CPUs if not set
+    :param flush_interval: maximum seconds between the writer runs
+    :param batch_size: number of records in a shard waking up the writer before *flush_interval*
+    :param max_pending: number of records in a shard after which the logging thread runs the writer itself,
+                        so the memory stays bounded when the target cannot keep up
+    """
+    # Handler options in logme.ini -> ConcurrentHandler arguments
+    config_options = {
+        'concurrent_shards': 'shards',
+        'concurrent_flush_interval': 'flush_interval',
+        'concurrent_batch_size': 'batch_size',
+        'concurrent_max_pending': 'max_pending',
+    }
+
+    def __init__(self, target: logging.Handler, shards: int=None, flush_interval: float=0.05,
+                 batch_size: int=256, max_pending: int=10000):
+        super().__init__(level=target.level)
+        self.formatter = target.formatter
+
+        self.target = target
+        self.shards = [deque() for _ in range(shards or os.cpu_count() or 1)]
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+
+        self._local = threading.local()
+        self._shard_seq = itertools.count()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._worker = None
+
+        self.dropped_records = 0
+
+    def __repr__(self):
+        level = logging.getLevelName(self.level)
+        return f"<{self.__class__.__name__} ({level}) shards={len(self.shards)} target={self.target!r}>"
+
+    def setLevel(self, level: Union[str, int]):
+        super().setLevel(level)
+        self.target.setLevel(level)
+
+    def setFormatter(self, fmt: logging.Formatter):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        """
+        Same as logging.Handler.handle(), without the handler lock
+        """
+        passed = self.filter(record)
+        if passed:
+            self.emit(record)
+
+        return passed
+
+    def emit(self, record: logging.LogRecord):
+        if self._stopped.is_set():
+            # The writer is gone and the target is closed
+            with self.lock:
+                self.dropped_records += 1
+            return
+
+        if not self._worker:
+            self._start()
+
+        try:
+            self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = self.shards[next(self._shard_seq) % len(self.shards)]
+
+        shard.append(record)
+
+        pending = len(shard)
+        if pending >= self.max_pending:
+            self._write()
+        elif pending == self.batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """
+        Hand all the pending records over to the target
+        """
+        self._write()
+        self.target.flush()
+
+    def close(self):
+        if self._stopped.is_set():
+            return
+
+        self._stopped.set()
+        self._wakeup.set()
+
+        if self._worker:
+            self._worker.join()
+
+        self.flush()
+        self.target.close()
+        super().close()
+
+    def _start(self):
+        with self.lock:
+            if not self._worker:
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+
+            self._write()
+
+    def _write(self):
+        """
+        Take the pending records from all the shards, and hand them over to the target in creation order
+        """
+        with self._write_lock:
+            batches = []
+            for shard in self.shards:
+                # Only the writer takes records from the shards, records appended meanwhile go to the next batch
+                batch = [shard.popleft() for _ in range(len(shard))]
+
+                if batch:
+                    # Threads sharing a shard interleave their records,
+                    # the sort is stable so each thread keeps its order
+                    batch.sort(key=attrgetter('created'))
+                    batches.append(batch)
+
+            records = batches[0] if len(batches) == 1 else heapq.merge(*batches, key=attrgetter('created'))
+
+            for record in records:
+                self.target.handle(record)
+
+
+class IndexingHandler(logging.Handler):
+    """
+    Maintain a sparse time index of the file written by the *target* file handler, in a sidecar file next to it,
+    e.g. .app.log.idx. Readers binary search the index to the start of a time range instead of scanning the file
+    from the start, see logme.index.TimeIndex.
+
+    A checkpoint (record time, byte offset) is added every *every_records* records or *every_bytes* bytes.
+    The index is rotated along with the file by RotatingFileHandler and TimedRotatingFileHandler,
+    e.g. app.log.1 and .app.log.1.idx, including the files renamed by a custom namer.
+
+    Usage in logme.ini, any file handler can opt into the index:
+
+        file =
+            type: RotatingFileHandler
+            active: True
+            filename: mylogpath/foo.log
+            maxBytes: 104857600
+            backupCount: 5
+            index: True
+            index_every_records: 1000
+
+    :param target: the file handler the records are handed to
+    :param every_records: number of records between the checkpoints
+    :param every_bytes: number of bytes between the checkpoints
+    """
+    # Handler options in logme.ini -> IndexingHandler arguments
+    config_options = {
+        'index_every_records': 'every_records',
+        'index_every_bytes': 'every_bytes',
+    }
+
+    def __init__(self, target: logging.Handler, every_records: int=1000, every_bytes: int=1048576):
+        if not isinstance(target, logging.FileHandler):
+            raise InvalidOption(f"'index' is only available for file handlers, not {type(target).__name__}")
+
+        super().__init__(level=target.level)
+        self.formatter = target.formatter
+
+        self.target = target
+        self.writer = TimeIndexWriter(target.baseFilename, every_records=every_records, every_bytes=every_bytes)
+
+        # Stream of the target the index is opened for, the index is checked again when the target reopens the file
+        self._stream = None
+        self._rotated = False
+
+        # The file is truncated when it is opened
+        if target.mode.startswith('w') and get_index_path(target.baseFilename).exists():
+            get_index_path(target.baseFilename).unlink()
+
+        if isinstance(target, logging.handlers.BaseRotatingHandler):
+            self._rotator = target.rotator
+            target.rotator = self._rotate
+
+    def __repr__(self):
+        level = logging.getLevelName(self.level)
+        return f"<{self.__class__.__name__} ({level}) target={self.target!r}>"
+
+    def setLevel(self, level: Union[str, int]):
+        super().setLevel(level)
+        self.target.setLevel(level)
+
+    def setFormatter(self, fmt: logging.Formatter):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def emit(self, record: logging.LogRecord):
+        if not self.target.handle(record):
+            return
+
+        stream = self.target.stream
+        if stream is None:
+            return
+
+        try:
+            offset = stream.tell()
+
+            if stream is not self._stream:
+                if self._rotated:
+                    remove_orphan_indexes(self.target.baseFilename)
+                    self._rotated = False
+
+                self.writer.open(offset)
+                self._stream = stream
+
+            self.writer.add(record.created, offset)
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        self.target.flush()
+
+    def close(self):
+        with self.lock:
+            self.writer.close()
+            self._stream = None
+
+        self.target.close()
+        super().close()
+
+    def _rotate(self, source: str, dest: str):
+        """
+        BaseRotatingHandler.rotator, moves the index along with the file
+        """
+        self.writer.close()
+        self._stream = None
+        self._rotated = True
+
+        target = self.target
+
+        # RotatingFileHandler shifts the backups before rotating the file
+        if isinstance(target, logging.handlers.RotatingFileHandler):
+            for i in range(target.backupCount - 1, 0, -1):
+                index_path = get_index_path(target.rotation_filename(f"{source}.{i}"))
+
+                if index_path.exists():
+                    os.replace(index_path, get_index_path(target.rotation_filename(f"{source}.{i + 1}")))
+
+        index_path = get_index_path(source)
+        if index_path.exists():
+            os.replace(index_path, get_index_path(dest))
+
+        if callable(self._rotator):
+            self._rotator(source, dest)
+        elif os.path.exists(source):
+            os.rename(source, dest)
@@ -0,0 +1,172 @@
+import glob
+import struct
+import bisect
+
+from pathlib import Path
+from typing import Union
+
+
+INDEX_SUFFIX = '.idx'
+
+_MAGIC = b'LOGMEIX1'
+_CHECKPOINT = struct.Struct('<dQ')  # record time, byte offset at the end of the record
+
+
+def get_index_path(file_path: Union[str, Path]) -> Path:
+    """
+    Path of the sidecar index of a log file or rotated segment, e.g. .app.log.idx, .app.log.1.gz.idx
+
+    *Indexes are hidden files, TimedRotatingFileHandler would take app.log.<time>.idx for a backup of app.log*
+    """
+    file_path = Path(file_path)
+
+    return file_path.with_name(f".{file_path.name}{INDEX_SUFFIX}")
+
+
+class TimeIndex:
+    """
+    Sparse time index of a log file, written by IndexingHandler (handler option 'index: True').
+
+    Each checkpoint is the time of a record and the byte offset at the end of it, the records after the offset
+    were logged at or after that time. Records are assumed to be written in time order, *slack* covers the records
+    written slightly out of order, e.g. by multiple threads.
+
+    Usage:
+        >>> index = TimeIndex.load('logs/app.log')
+        >>> start, end = index.seek(since=time.time() - 3600)
+        >>> lines = read_lines('logs/app.log', start=start, end=end)
+
+    :param checkpoints: [(timestamp, byte offset)], in the order of the file
+    """
+    __slots__ = ['checkpoints', '_timestamps']
+
+    def __init__(self, checkpoints: list):
+        self.checkpoints = checkpoints
+        self._timestamps = [timestamp for timestamp, _ in checkpoints]
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} checkpoints={len(self.checkpoints)}>"
+
+    def __len__(self) -> int:
+        return len(self.checkpoints)
+
+    @classmethod
+    def load(cls, file_path: Union[str, Path]) -> Union['TimeIndex', None]:
+        """
+        Load the index of a log file
+
+        :return: None if the log file has no index, or the index is not valid
+        """
+        try:
+            content = get_index_path(file_path).read_bytes()
+        except OSError:
+            return
+
+        if not content.startswith(_MAGIC):
+            return
+
+        # A checkpoint partially written when the process stopped is left out
+        body = content[len(_MAGIC):]
+        body = body[:len(body) - len(body) % _CHECKPOINT.size]
+
+        return cls(list(_CHECKPOINT.iter_unpack(body)))
+
+    def seek(self, since: float=None, until: float=None, slack: float=1.0) -> tuple:
+        """
+        Binary search the byte range of the records logged between *since* and *until*
+
+        :param since: epoch seconds
+        :param until: epoch seconds
+        :param slack: seconds the records can be written out of time order
+
+        :return: (start offset, end offset or None), the records starting in the range may be in the time range
+        """
+        start, end = 0, None
+
+        if since is not None:
+            # The last checkpoint before since
+            position = bisect.bisect_left(self._timestamps, since - slack)
+            if position:
+                start = self.checkpoints[position - 1][1]
+
+        if until is not None:
+            # The first checkpoint at or after until
+            position = bisect.bisect_left(self._timestamps, until + slack)
+            if position < len(self.checkpoints):
+                end = self.checkpoints[position][1]
+
+        return start, end
+
+
+class TimeIndexWriter:
+    """
+    Append the checkpoints of a log file to its sidecar index, every *every_records* records or *every_bytes* bytes
+
+    *Not thread safe, IndexingHandler calls it under the handler lock*
+    """
+    __slots__ = ['file_path', 'path', 'every_records', 'every_bytes', '_file', '_records', '_last_offset']
+
+    def __init__(self, file_path: Union[str, Path], every_records: int=1000, every_bytes: int=1048576):
+        self.file_path = Path(file_path)
+        self.path = get_index_path(file_path)
+        self.every_records = every_records
+        self.every_bytes = every_bytes
+
+        self._file = None
+        self._records = 0
+        self._last_offset = 0
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.path}>"
+
+    def open(self, file_size: int):
+        """
+        Open the index for appending, it is started over if it does not match the log file,
+        e.g. the log file is truncated or replaced
+
+        :param file_size: current size of the log file
+        """
+        self.close()
+
+        index = TimeIndex.load(self.file_path)
+        if index is not None and (not index.checkpoints or index.checkpoints[-1][1] <= file_size):
+            self._file = self.path.open('ab')
+            self._last_offset = index.checkpoints[-1][1] if index.checkpoints else 0
+        else:
+            self._file = self.path.open('wb')
+            self._file.write(_MAGIC)
+            self._last_offset = 0
+
+        self._records = 0
+
+    def add(self, timestamp: float, offset: int):
+        """
+        Count a record written, a checkpoint is added if it is due
+
+        :param timestamp: record.created
+        :param offset: byte offset at the end of the record
+        """
+        self._records += 1
+
+        if self._records >= self.every_records or offset - self._last_offset >= self.every_bytes:
+            self._file.write(_CHECKPOINT.pack(timestamp, offset))
+            self._file.flush()
+
+            self._records = 0
+            self._last_offset = offset
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def remove_orphan_indexes(file_path: Union[str, Path]):
+    """
+    Remove the indexes of the rotated segments of a log file which have been deleted, e.g. over the backup count
+    """
+    file_path = Path(file_path)
+
+    for index_path in file_path.parent.glob(f".{glob.escape(file_path.name)}*{INDEX_SUFFIX}"):
+        if not index_path.with_name(index_path.name[1:-len(INDEX_SUFFIX)]).exists():
+            index_path.unlink()
@@ -0,0 +1,222 @@
+import re
+import ast
+import copy
+import threading
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Union
+from configparser import (NoSectionError, DuplicateSectionError, DuplicateOptionError,
+                          MissingSectionHeaderError, ParsingError)
+
+from .exceptions import InvalidLoggerConfig
+
+
+DEFAULT_SECTION = 'DEFAULT'
+
+# Same patterns as configparser.RawConfigParser
+_SECTION_RE = re.compile(r"\[(?P<header>.+)\]")
+_OPTION_RE = re.compile(r"(?P<option>.*?)\s*(?P<vi>=|:)\s*(?P<value>.*)$")
+_NONSPACE_RE = re.compile(r"\S")
+
+# Values which can be python literals, everything else is kept as string without calling ast.literal_eval()
+_LITERAL_START = set("0123456789+-.([{'\"")
+_STRING_PREFIX_RE = re.compile(r"[rRbBuUfF]{1,2}['\"]")
+_CONSTANTS = {'True': True, 'False': False, 'None': None}
+
+_cache = {}  # path -> (mtime ns, size, sections)
+_cache_lock = threading.Lock()
+
+
+def parse_value(value: str):
+    """
+    Evaluate the value as a python literal, the value is returned stripped if it is not a literal.
+    Same as bnmutils.novelty.str_eval(), without the cost of ast.literal_eval() for plain strings
+    """
+    value = value.strip()
+
+    if not value:
+        return value
+
+    if value in _CONSTANTS:
+        return _CONSTANTS[value]
+
+    if value.isdigit() and value.isascii():
+        return int(value)
+
+    if value[0] in _LITERAL_START or _STRING_PREFIX_RE.match(value):
+        literal = _eval_literal(value)
+
+        # Cached containers must not be shared
+        return copy.deepcopy(literal) if isinstance(literal, (list, dict, set)) else literal
+
+    return value
+
+
+@lru_cache(maxsize=1024)
+def _eval_literal(value: str):
+    """
+    The same formats and handler options are repeated across the sections, the evaluation is cached
+    """
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):  # SyntaxError raised when passing in "{asctime}::{message}"
+        return value
+
+
+def parse_option(value: str) -> dict:
+    """
+    Parse a multi-line option of 'key: value' lines, e.g. a handler config, into a dict
+    """
+    option = {}
+
+    for line in value.strip().split('\n'):
+        key, delimiter, item = line.partition(':')
+
+        if not delimiter:
+            raise InvalidLoggerConfig(f"{value} is not a valid option, please follow the convention of 'key: value'")
+
+        option[parse_value(key)] = parse_value(item)
+
+    return option
+
+
+def parse_ini(content: str, source: str='<string>') -> dict:
+    """
+    Parse the content of a logme.ini file, with the same semantics as bnmutils.ConfigParser.to_dict():
+    option names are case sensitive, multi-line options are parsed into dicts and values are evaluated
+    as python literals.
+
+    :param content: content of the ini file
+    :param source: name of the file, for the error messages
+
+    :return: {section name: configuration dict}
+    :raises: configparser.Error subclasses on invalid syntax, the same as configparser
+    """
+    defaults = {}
+    sections = {}
+
+    section = None
+    section_name = None
+    option_name = None
+    indent_level = 0
+    error = None
+
+    for lineno, line in enumerate(content.splitlines(), start=1):
+        value = line.strip()
+
+        if not value or value[0] in '#;':
+            # Empty lines are part of a multi-line value, comment lines are skipped
+            if not value and section is not None and option_name:
+                section[option_name].append('')
+            continue
+
+        cur_indent_level = _NONSPACE_RE.search(line).start()
+
+        if section is not None and option_name and cur_indent_level > indent_level:
+            section[option_name].append(value)
+            continue
+
+        indent_level = cur_indent_level
+
+        match = _SECTION_RE.match(value)
+        if match:
+            section_name = match.group('header')
+
+            if section_name == DEFAULT_SECTION:
+                section = defaults
+            elif section_name in sections:
+                raise DuplicateSectionError(section_name, source, lineno)
+            else:
+                section = sections[section_name] = {}
+
+            option_name = None
+            continue
+
+        if section is None:
+            raise MissingSectionHeaderError(source, lineno, line)
+
+        match = _OPTION_RE.match(value)
+        option_name = match and match.group('option').rstrip()
+
+        if not option_name:
+            error = error or ParsingError(source)
+            error.append(lineno, repr(line))
+            continue
+
+        if option_name in section:
+            raise DuplicateOptionError(section_name, option_name, source, lineno)
+
+        section[option_name] = [match.group('value').strip()]
+
+    if error:
+        raise error
+
+    parsed = {}
+    for name, options in [(DEFAULT_SECTION, {})] + list(sections.items()):
+        parsed[name] = _parse_section({**defaults, **options})
+
+    return parsed
+
+
+def _parse_section(options: dict) -> dict:
+    parsed = {}
+
+    for name, lines in options.items():
+        value = '\n'.join(lines).rstrip()
+        parsed[name] = parse_option(value) if '\n' in value else parse_value(value)
+
+    return parsed
+
+
+def read_ini(file_path: Union[str, Path]) -> dict:
+    """
+    Read a logme.ini file, the parsed sections are cached until the file is modified
+
+    *The cached sections are shared, they must not be modified, use get_section() for a copy*
+
+    :return: {section name: configuration dict}, including 'DEFAULT'
+    :raises: InvalidLoggerConfig, if the file has no sections
+    """
+    file_path = str(file_path)
+
+    try:
+        stat = Path(file_path).stat()
+    except OSError:
+        raise InvalidLoggerConfig(f"Invalid config file: {file_path}.")
+
+    cached = _cache.get(file_path)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    with open(file_path) as file:
+        sections = parse_ini(file.read(), source=file_path)
+
+    if len(sections) == 1:
+        raise InvalidLoggerConfig(f"Invalid config file: {file_path}.")
+
+    with _cache_lock:
+        _cache[file_path] = (stat.st_mtime_ns, stat.st_size, sections)
+
+    return sections
+
+
+def get_section(file_path: Union[str, Path], name: str) -> dict:
+    """
+    Get a copy of the section of a logme.ini file
+
+    :raises: NoSectionError, if the section does not exist
+    """
+    try:
+        return copy.deepcopy(read_ini(file_path)[name])
+    except KeyError:
+        raise NoSectionError(name)
+
+
+def get_sections(file_path: Union[str, Path]) -> dict:
+    """
+    Get a copy of all the sections of a logme.ini file, excluding 'DEFAULT'
+    """
+    sections = read_ini(file_path)
+
+    return {name: copy.deepcopy(section) for name, section in sections.items() if name != DEFAULT_SECTION}
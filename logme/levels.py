@@ -0,0 +1,288 @@
+import os
+import threading
+
+from fnmatch import fnmatchcase
+from typing import Union
+
+from .config import resolve_level
+from .registry import logger_registry, handler_index
+from .exceptions import InvalidOption
+
+
+ENV_VAR = 'LOGME_LEVELS'
+
+_GLOB_CHARS = set('*?[')
+
+
+class _Node:
+    """
+    Node of the rule trie, one per pattern segment
+    """
+    __slots__ = ['children', 'globs', 'level', 'descendants_level']
+
+    def __init__(self):
+        self.children = {}  # literal segment -> _Node
+        self.globs = []  # [(glob segment, _Node)]
+        self.level = None  # (sequence, level) of the rule ending here, applies to the logger and its descendants
+        self.descendants_level = None  # (sequence, level) of the rule ending with '.*', descendants only
+
+
+class LevelRules:
+    """
+    Level overrides for logger subtrees, applied over the master level of the config when a LogmeLogger is created,
+    and to the live loggers whenever the rules change.
+
+    Patterns are dotted logger names:
+        - 'myapp.db': myapp.db and all of its descendants
+        - 'myapp.db.*': the descendants of myapp.db only
+        - 'myapp.*.db', 'myapp.worker_?': glob segments, each matching a single name segment
+
+    The most specific rule wins, the one matching the most segments, then the one with the most literal segments,
+    then the latest rule. Rules are compiled into a trie, a logger name is resolved in O(depth) and cached.
+
+    Rules are also read from the LOGME_LEVELS environment variable when the first logger is created,
+    e.g. LOGME_LEVELS='myapp.db=DEBUG,myapp.http.*=WARNING', these take precedence over the rules set with set()
+    for the same pattern.
+
+    Usage:
+        >>> from logme import level_rules
+        >>> level_rules.set('myapp.db.*', 'DEBUG')
+    """
+    def __init__(self, env_var: str=ENV_VAR):
+        self.env_var = env_var
+
+        self._rules = {}  # pattern -> level number
+        self._env_rules = None  # pattern -> level number, read on the first resolve()
+
+        self._root = _Node()
+        self._resolved = {}  # logger name -> level number or None
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.rules}>"
+
+    @property
+    def rules(self) -> dict:
+        """
+        {pattern: level number}, including the rules from the environment variable
+        """
+        return {**self._rules, **(self._env_rules or {})}
+
+    def set(self, pattern: str, level: Union[str, int]):
+        """
+        Add or replace the rule of the pattern, and apply it to the live loggers
+        """
+        level = self._get_level(pattern, level)
+
+        with self._lock:
+            previous = self._root
+            self._rules[pattern] = level
+            self._compile()
+
+        self._apply_changes(previous)
+
+    def update(self, rules: Union[dict, str]):
+        """
+        Add or replace multiple rules at once
+
+        :param rules: {pattern: level}, or rules in the format of the environment variable, 'pattern=level,...'
+        """
+        rules = self.parse(rules) if isinstance(rules, str) else {k: self._get_level(k, v) for k, v in rules.items()}
+
+        with self._lock:
+            previous = self._root
+            self._rules.update(rules)
+            self._compile()
+
+        self._apply_changes(previous)
+
+    def remove(self, pattern: str):
+        with self._lock:
+            previous = self._root
+            self._rules.pop(pattern, None)
+            self._compile()
+
+        self._apply_changes(previous)
+
+    def clear(self):
+        """
+        Remove all the rules set with set() or update(), the rules from the environment variable are kept
+        """
+        with self._lock:
+            previous = self._root
+            self._rules = {}
+            self._compile()
+
+        self._apply_changes(previous)
+
+    def load_env(self):
+        """
+        Read the rules from the environment variable again, e.g. after it is changed
+        """
+        with self._lock:
+            previous = self._root
+            self._env_rules = self.parse(os.environ.get(self.env_var, ''))
+            self._compile()
+
+        self._apply_changes(previous)
+
+    def resolve(self, name: str, default: int=None) -> Union[int, None]:
+        """
+        Get the level of the most specific rule matching the logger name
+
+        :return: *default* if no rule matches
+        """
+        if self._env_rules is None:
+            with self._lock:
+                if self._env_rules is None:
+                    self._env_rules = self.parse(os.environ.get(self.env_var, ''))
+                    self._compile()
+
+        resolved = self._resolved
+        try:
+            level = resolved[name]
+        except KeyError:
+            level = resolved[name] = self._match(self._root, name)
+
+        return default if level is None else level
+
+    def apply(self):
+        """
+        Set the master level of all the live loggers to the level of their rule, or the level of their config
+        if no rule matches
+        """
+        with handler_index.batch():
+            for logger in logger_registry:
+                level = self.resolve(logger.name, default=logger.logger_config.level)
+
+                if logger.master_level != level:
+                    logger.master_level = level
+
+    def _apply_changes(self, previous: _Node):
+        """
+        Apply the rules to the live loggers whose rule changed, loggers with master_level set since
+        they were created are left untouched otherwise
+        """
+        with handler_index.batch():
+            for logger in logger_registry:
+                level = self.resolve(logger.name)
+
+                if level != self._match(previous, logger.name):
+                    logger.master_level = logger.logger_config.level if level is None else level
+
+    @classmethod
+    def parse(cls, rules: str) -> dict:
+        """
+        Parse rules in the format of the environment variable, 'pattern=level' separated by ',' or ';'
+
+        :return: {pattern: level number}
+        """
+        parsed = {}
+
+        for item in rules.replace(';', ',').split(','):
+            if not item.strip():
+                continue
+
+            pattern, delimiter, level = item.partition('=')
+            if not delimiter:
+                raise InvalidOption(f"'{item.strip()}' is not a valid level rule, e.g. 'myapp.db=DEBUG'")
+
+            parsed[pattern.strip()] = cls._get_level(pattern, level.strip())
+
+        return parsed
+
+    @staticmethod
+    def _get_level(pattern: str, level: Union[str, int]) -> int:
+        level = resolve_level(level)
+
+        if level is None or not pattern:
+            raise InvalidOption(f"'{pattern}={level}' is not a valid level rule, e.g. 'myapp.db=DEBUG'")
+
+        return level
+
+    def _compile(self):
+        """
+        Build a new trie from the rules and swap it in, *must be called with self._lock acquired*
+        """
+        root = _Node()
+        rules = list(self._rules.items()) + list((self._env_rules or {}).items())
+
+        for sequence, (pattern, level) in enumerate(rules):
+            node = root
+            segments = pattern.split('.')
+
+            descendants = segments[-1] == '*'
+            if descendants:
+                segments = segments[:-1]
+
+            for segment in segments:
+                node = self._get_child(node, segment)
+
+            if descendants:
+                node.descendants_level = (sequence, level)
+            else:
+                node.level = (sequence, level)
+
+        self._root = root
+        self._resolved = {}
+
+    @staticmethod
+    def _get_child(node: _Node, segment: str) -> _Node:
+        if not _GLOB_CHARS.intersection(segment):
+            return node.children.setdefault(segment, _Node())
+
+        for glob, child in node.globs:
+            if glob == segment:
+                return child
+
+        child = _Node()
+        node.globs.append((segment, child))
+
+        return child
+
+    @staticmethod
+    def _match(root: _Node, name: str) -> Union[int, None]:
+        """
+        Walk the trie along the segments of the name
+
+        :return: level number of the most specific rule, None if no rule matches
+        """
+        segments = name.split('.')
+        best = None  # ((segments matched, literal segments, sequence), level)
+
+        def consider(depth, literals, rule):
+            nonlocal best
+            if rule:
+                score = (depth, literals, rule[0])
+                if best is None or score > best[0]:
+                    best = (score, rule[1])
+
+        nodes = [(root, 0)]  # (node, literal segments matched)
+        for depth, segment in enumerate(segments):
+            next_nodes = []
+
+            for node, literals in nodes:
+                # The name is a descendant of the node
+                consider(depth + 1, literals, node.descendants_level)
+                if depth:
+                    consider(depth, literals, node.level)
+
+                child = node.children.get(segment)
+                if child:
+                    next_nodes.append((child, literals + 1))
+
+                for glob, glob_child in node.globs:
+                    if fnmatchcase(segment, glob):
+                        next_nodes.append((glob_child, literals))
+
+            nodes = next_nodes
+            if not nodes:
+                break
+
+        for node, literals in nodes:
+            consider(len(segments), literals, node.level)
+
+        return best and best[1]
+
+
+level_rules = LevelRules()
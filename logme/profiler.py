@@ -0,0 +1,244 @@
+import json
+import time
+import logging
+import threading
+import itertools
+
+from pathlib import Path
+from typing import Union
+
+from .exceptions import InvalidOption
+
+
+PHASES = ['level_check', 'record', 'format', 'emit']
+
+
+class LoggingProfiler:
+    """
+    Sampling profiler attributing the time spent inside logging to the call sites.
+
+    For every sampled logging call, the time spent in the level check, record creation, formatting and handler emit
+    is aggregated by logger name and caller file:line.
+    Only calls at enabled levels are sampled, calls at disabled levels only pay the sampling counter.
+
+    Usage:
+        >>> profiler = LoggingProfiler(sample_rate=0.01)
+        >>> profiler.attach(logger)
+        >>> ...
+        >>> profiler.save('logging_profile.json')
+
+    The saved profile can be reported with 'logme profile logging_profile.json'
+
+    :param sample_rate: ratio of the logging calls to be sampled, 0 - 1
+    """
+    def __init__(self, sample_rate: float=0.01):
+        if not 0 < sample_rate <= 1:
+            raise InvalidOption(f"sample_rate must be between 0 and 1, not {sample_rate}")
+
+        self.sample_rate = sample_rate
+        self.interval = max(1, round(1 / sample_rate))
+
+        self._counter = itertools.count()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        self._sites = {}  # (logger name, pathname, lineno) -> [samples, level_check, record, format, emit]
+        self._loggers = []
+        self._handlers = []
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} sample_rate={self.sample_rate} sites={len(self._sites)}>"
+
+    # ---------------------------------------------------------------------------
+    # Instrumentation
+    # ---------------------------------------------------------------------------
+    def attach(self, logger):
+        """
+        Start profiling the logger and its handlers
+
+        :param logger: LogmeLogger or logging.Logger object
+        """
+        logger = getattr(logger, 'logger', logger)
+
+        if logger in self._loggers:
+            return
+
+        logger.isEnabledFor = self._wrap_level_check(logger.isEnabledFor)
+        logger.makeRecord = self._wrap_make_record(logger.makeRecord)
+        logger.handle = self._wrap_handle(logger.handle)
+
+        for handler in logger.handlers:
+            if handler not in self._handlers:
+                handler.format = self._wrap_phase(handler.format, 'format')
+                handler.emit = self._wrap_phase(handler.emit, 'emit')
+
+                self._handlers.append(handler)
+
+        self._loggers.append(logger)
+
+    def attach_all(self, prefix: str=None):
+        """
+        Start profiling all the live LogmeLogger objects matching the name prefix
+        """
+        from .registry import logger_registry
+
+        for logger in logger_registry.find(prefix=prefix):
+            self.attach(logger)
+
+    def detach(self):
+        """
+        Stop profiling all the attached loggers and handlers
+        """
+        for logger in self._loggers:
+            for attr in ['isEnabledFor', 'makeRecord', 'handle']:
+                logger.__dict__.pop(attr, None)
+
+        for handler in self._handlers:
+            for attr in ['format', 'emit']:
+                handler.__dict__.pop(attr, None)
+
+        self._loggers = []
+        self._handlers = []
+
+    def _wrap_level_check(self, is_enabled_for):
+        local = self._local
+        counter = self._counter
+        interval = self.interval
+        perf_counter = time.perf_counter
+
+        def profiled_is_enabled_for(level):
+            if next(counter) % interval:
+                return is_enabled_for(level)
+
+            start = perf_counter()
+            enabled = is_enabled_for(level)
+            end = perf_counter()
+
+            if enabled:
+                local.sample = (level, end - start, end)
+
+            return enabled
+
+        return profiled_is_enabled_for
+
+    def _wrap_make_record(self, make_record):
+        local = self._local
+        perf_counter = time.perf_counter
+
+        def profiled_make_record(name, level, *args, **kwargs):
+            record = make_record(name, level, *args, **kwargs)
+
+            sample = getattr(local, 'sample', None)
+            if sample:
+                local.sample = None
+
+                sampled_level, level_check, start = sample
+                if sampled_level == level:
+                    # Time since the level check covers finding the caller and creating the record
+                    record._logme_profile = [level_check, perf_counter() - start, 0.0, 0.0]
+
+            return record
+
+        return profiled_make_record
+
+    def _wrap_handle(self, handle):
+        def profiled_handle(record):
+            handle(record)
+
+            timings = getattr(record, '_logme_profile', None)
+            if timings:
+                self._add_sample(record, timings)
+
+        return profiled_handle
+
+    def _wrap_phase(self, method, phase: str):
+        index = PHASES.index(phase)
+        perf_counter = time.perf_counter
+
+        def profiled_method(record):
+            timings = getattr(record, '_logme_profile', None)
+            if timings is None:
+                return method(record)
+
+            start = perf_counter()
+            try:
+                return method(record)
+            finally:
+                timings[index] += perf_counter() - start
+
+        return profiled_method
+
+    def _add_sample(self, record: logging.LogRecord, timings: list):
+        # Formatting is called from within emit
+        timings[3] -= timings[2]
+
+        key = (record.name, record.pathname, record.lineno)
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None:
+                site = self._sites[key] = [0, 0.0, 0.0, 0.0, 0.0]
+
+            site[0] += 1
+            for i, value in enumerate(timings, 1):
+                site[i] += value
+
+    # ---------------------------------------------------------------------------
+    # Reporting
+    # ---------------------------------------------------------------------------
+    def reset(self):
+        with self._lock:
+            self._sites = {}
+
+    def dump(self) -> list:
+        """
+        Get the profile of all the call sites, most expensive call sites first
+
+        :return: list of dict, times are total seconds of the sampled calls
+        """
+        with self._lock:
+            sites = list(self._sites.items())
+
+        profile = []
+        for (name, pathname, lineno), (samples, *timings) in sites:
+            site = {
+                'logger': name,
+                'location': f"{pathname}:{lineno}",
+                'samples': samples,
+                'estimated_calls': samples * self.interval,
+                'total': sum(timings),
+            }
+            site.update(zip(PHASES, timings))
+
+            profile.append(site)
+
+        return sorted(profile, key=lambda x: x['total'], reverse=True)
+
+    def save(self, file_path: Union[str, Path]):
+        """
+        Save the profile as json, to be reported by 'logme profile'
+        """
+        content = {'sample_rate': self.sample_rate, 'sites': self.dump()}
+
+        with open(file_path, 'w') as file:
+            json.dump(content, file, indent=2)
+
+
+def format_profile(profile: dict, top: int=None) -> str:
+    """
+    Format the profile saved by LoggingProfiler.save() as a report
+
+    :param profile: content of the saved profile
+    :param top: number of the most expensive call sites to be reported
+    """
+    sites = profile['sites'][:top] if top else profile['sites']
+
+    lines = [f"sample rate: {profile['sample_rate']}, call sites: {len(profile['sites'])}"]
+    for site in sites:
+        per_call = site['total'] / site['samples'] * 1e6
+        phases = ', '.join(f"{phase} {site[phase] / site['samples'] * 1e6:.1f}us" for phase in PHASES)
+
+        lines.append(f"{site['location']} [{site['logger']}]")
+        lines.append(f"    ~{site['estimated_calls']} calls, {per_call:.1f}us per call "
+                     f"({phases}), total sampled {site['total'] * 1e3:.3f}ms")
+
+    return '\n'.join(lines)
@@ -1,15 +1,50 @@
+import pkgutil
 import inspect
+import threading
 import warnings
+import importlib
 
+from pathlib import Path
+from types import ModuleType
 from functools import partial
-from typing import Callable, Union
+from contextlib import contextmanager
+from typing import Callable, Union, Iterator
 
 import logging
-from logging import handlers as logging_handlers
 
+from .context import context_filter
+from . import handlers as logme_handlers
+from .gate import LevelGate
+from .spool import SpoolingHandler
+from .snapshot import LoggerSnapshot
+from .formatters import LogmeFormatter, clock_filter
+from .registry import LoggerRegistry, logger_registry, handler_index
+from .levels import level_rules
+from .handler_types import handler_registry
 from .color_provider import ColorFormatter
-from .utils import ensure_dir, get_logger_config, get_color_config
-from .exceptions import InvalidOption, DuplicatedHandler, LogmeError
+from .utils import ensure_dir, get_ini_file_path, read_config
+from .config import (LoggerConfig, ColorConfig, FormatterConfig, resolve_level, load_logger_config,
+                     load_color_config)
+from .exceptions import InvalidOption, DuplicatedHandler, LogmeError, InvalidLoggerConfig
+
+
+# Logging methods of logging.Logger -> level, discarded by LogmeLogger when the level gate is closed
+_LEVEL_METHODS = {
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'warning': logging.WARNING,
+    'warn': logging.WARNING,
+    'error': logging.ERROR,
+    'exception': logging.ERROR,
+    'critical': logging.CRITICAL,
+    'fatal': logging.CRITICAL,
+}
+
+
+def _discard(*args, **kwargs):
+    """
+    Logging method of a level no handler accepts
+    """
 
 
 class LogProvider:
@@ -37,11 +72,11 @@ class LogProvider:
 
         logger_name = name if name else module_obj.__name__
 
-        config_dict = get_logger_config(module_obj.__file__, name=config)
-        color_config = get_color_config(module_obj.__file__)
+        logger_config = load_logger_config(module_obj.__file__, name=config)
+        color_config = load_color_config(module_obj.__file__)
 
-        self.logger = LogmeLogger(logger_name, config_dict,
-                                  color_config=color_config)
+        self.logger = LogmeLogger(logger_name, logger_config,
+                                  color_config=color_config, config_name=config or 'logme')
 
 
 class ModuleLogger:
@@ -49,6 +84,8 @@ class ModuleLogger:
     Resolves to a LogmeLogger object based on the config and name passed from logme.log
 
     """
+    __slots__ = ['logger']
+
     def __init__(self, frame: int, config: str=None, name: str=None):
         """
 
@@ -62,11 +99,11 @@ class ModuleLogger:
 
         logger_name = name if name else module_obj.__name__
 
-        config_dict = get_logger_config(module_frame.filename, name=config)
-        color_config = get_color_config(module_frame.filename)
+        logger_config = load_logger_config(module_frame.filename, name=config)
+        color_config = load_color_config(module_frame.filename)
 
-        self.logger = LogmeLogger(logger_name, config_dict,
-                                  color_config=color_config)
+        self.logger = LogmeLogger(logger_name, logger_config,
+                                  color_config=color_config, config_name=config or 'logme')
 
     def __getattr__(self, attr):
         """
@@ -74,6 +111,98 @@ class ModuleLogger:
         """
         return getattr(self.logger, attr)
 
+    @property
+    def gate(self) -> LevelGate:
+        return self.logger.gate
+
+
+class PackageLogProvider:
+    """
+    Get LogmeLogger objects for every module of a package in a single pass
+
+    *logme.ini is resolved once per directory and read once per file,
+    loggers configured from the same logme.ini section share the same handler objects*
+    """
+    def __init__(self, package: Union[str, ModuleType], config: str=None):
+        """
+        :param package: package object or dotted name of the package, e.g. 'mypackage.models'
+        :param config: name of the logging config specified in logme.ini, applies to all modules
+        """
+        if isinstance(package, str):
+            package = importlib.import_module(package)
+
+        if not hasattr(package, '__path__'):
+            raise LogmeError(f"'{package.__name__}' is not a package")
+
+        if config == 'colors':
+            raise InvalidLoggerConfig("'colors' cannot be used as a logger configuration")
+
+        self.package = package
+        self.config_name = config if config else 'logme'
+        self.registry = LoggerRegistry()
+
+        self._ini_paths = {}  # module directory -> logme.ini path
+        self._configs = {}  # logme.ini path -> (LoggerConfig, ColorConfig)
+        self._handlers = {}  # logme.ini path -> handlers shared between the loggers
+
+        for module_name, module_file in self._iter_modules():
+            self._add_logger(module_name, module_file)
+
+    def _iter_modules(self) -> Iterator:
+        """
+        Iterate through the package and all of its submodules
+
+        :return: (module name, module file path)
+        """
+        if self.package.__file__:
+            yield self.package.__name__, self.package.__file__
+
+        for module_info in pkgutil.walk_packages(self.package.__path__, prefix=f"{self.package.__name__}.",
+                                                 onerror=lambda name: None):
+            spec = module_info.module_finder.find_spec(module_info.name)
+
+            if spec and spec.has_location:
+                yield module_info.name, spec.origin
+
+    def _get_configs(self, module_file: str) -> tuple:
+        """
+        Get the logme.ini path and its configs for the module, cached per directory and per logme.ini file
+
+        :return: (logme.ini path, LoggerConfig, ColorConfig)
+        """
+        directory = Path(module_file).parent
+
+        ini_path = self._ini_paths.get(directory)
+        if not ini_path:
+            ini_path = self._ini_paths[directory] = get_ini_file_path(module_file)
+
+        configs = self._configs.get(ini_path)
+        if configs is None:
+            sections = read_config(ini_path)
+
+            try:
+                logger_config = LoggerConfig.from_dict(sections[self.config_name])
+            except KeyError:
+                raise InvalidLoggerConfig(f"Invalid logger config '{self.config_name}'")
+
+            color_config = sections.get('colors')
+            configs = self._configs[ini_path] = (logger_config, color_config and ColorConfig.from_dict(color_config))
+
+        return (ini_path, ) + configs
+
+    def _add_logger(self, module_name: str, module_file: str):
+        ini_path, logger_config, color_config = self._get_configs(module_file)
+
+        shared_handlers = self._handlers.get(ini_path)
+
+        logger = LogmeLogger(module_name, logger_config, color_config=color_config,
+                             shared_handlers=shared_handlers, config_name=self.config_name)
+
+        if shared_handlers is None:
+            self._handlers[ini_path] = dict(logger.handlers)
+
+        self.registry.register(logger)
+
 
 # ---------------------------------------------------------------------------
 # Logger Object
@@ -84,25 +213,49 @@ class LogmeLogger:
     """
     Get a logger object with configured handlers
 
+    *The attributes are fixed with __slots__, as a logger is created for every module with logme.log_package(),
+    the configuration objects are shared between the loggers configured from the same section*
     """
-    def __init__(self, name: str, config: dict, color_config: dict=None):
+    __slots__ = ['_name', '_logger', '_config', 'config_name', 'color_config', '_config_lock', '_snapshot',
+                 '__weakref__']
+
+    def __init__(self, name: str, config: Union[dict, LoggerConfig], color_config: Union[dict, ColorConfig]=None,
+                 shared_handlers: dict=None, config_name: str=None):
         """
         :param name: name of the logger
-        :param config: configuration of the logger
+        :param config: configuration of the logger, dict or LoggerConfig shared with other loggers
+        :param color_config: 'colors' configuration, dict or ColorConfig shared with other loggers
+        :param shared_handlers: {handler name: handler object} already configured by another logger
+                                with the same config, these are added instead of creating new handlers
+        :param config_name: name of the config section in logme.ini, None if config is not from logme.ini
         """
 
         self._name = name
-        self.config = config
-        self.color_config = color_config
+        self._logger = logging.getLogger(name)
+        self._config = LoggerConfig.from_dict(config)
+        self.config_name = config_name
+        self.color_config = None if color_config is None else ColorConfig.from_dict(color_config)
+
+        # Guards the configuration changes, the configuration is published as an immutable LoggerSnapshot,
+        # so readers always get a consistent configuration without locking
+        self._config_lock = threading.RLock()
 
-        self.handlers = {}
-        self._set_master_properties()
-        self._set_handlers_from_conf()
+        with self._configure():
+            self._set_master_properties()
+            self._set_context_filter()
+            self._set_handlers_from_conf(shared_handlers=shared_handlers)
+
+        logger_registry.register(self)
 
     def __getattr__(self, attr):
         """
-        Delegate all the attributes and methods of logger to LogmeLogger Object
+        Delegate all the attributes and methods of logger to LogmeLogger Object,
+        the logging methods of the levels closed by the level gate return without creating a record
         """
+        level = _LEVEL_METHODS.get(attr)
+        if level is not None and not self._snapshot.gate.enabled_for(level):
+            return _discard
+
         try:
             return getattr(self.logger, attr)
         except AttributeError:
@@ -121,10 +274,47 @@ class LogmeLogger:
 
     @property
     def logger(self):
-        logger = logging.getLogger(self.name)
-        logger.setLevel(self.master_level)
+        """
+        The logging.Logger object, kept instead of looking it up from the logging module lock on every logging call
+        """
+        return self._logger
+
+    @property
+    def config(self) -> dict:
+        """
+        The configuration of the logger as dict, *read only*, it can be shared with other loggers
+        """
+        return self._config.source
+
+    @config.setter
+    def config(self, config: Union[dict, LoggerConfig]):
+        self._config = LoggerConfig.from_dict(config)
+
+    @property
+    def logger_config(self) -> LoggerConfig:
+        return self._config
+
+    @property
+    def handler_names(self) -> list:
+        return list(self._config.handlers)
 
-        return logger
+    @property
+    def snapshot(self) -> LoggerSnapshot:
+        """
+        The current effective configuration of the logger
+        """
+        return self._snapshot
+
+    @property
+    def handlers(self) -> dict:
+        """
+        {handler name: handler object}, *read only*
+        """
+        return self._snapshot.handlers
+
+    @property
+    def gate(self) -> LevelGate:
+        return self._snapshot.gate
 
     @property
     def disabled(self):
@@ -132,68 +322,277 @@ class LogmeLogger:
 
     @disabled.setter
     def disabled(self, val):
-        self.logger.disabled = val
+        with self._configure():
+            self.logger.disabled = val
+            self._update_level()
 
     @property
     def master_formatter(self):
-        return self._master_formatter
+        return self._snapshot.master_formatter
 
     @master_formatter.setter
     def master_formatter(self, formatter):
-        self._master_formatter = formatter
-        self._set_handlers_from_conf(reconfig=True)
+        with self._configure():
+            snapshot = self._snapshot.replace(master_formatter=formatter)
+            self._publish(self._reconfig_handlers(snapshot))
 
     @property
     def master_level(self):
-        return self._get_level(self._master_level)
+        return self._snapshot.master_level
 
     @master_level.setter
     def master_level(self, level):
-        self._master_level = level
-        self._set_handlers_from_conf(reconfig=True)
+        with self._configure():
+            snapshot = self._snapshot.replace(master_level=self._get_level(level))
+            self._publish(self._reconfig_handlers(snapshot))
+
+    @property
+    def propagate(self):
+        return self.logger.propagate
+
+    @propagate.setter
+    def propagate(self, val):
+        with self._configure():
+            self.logger.propagate = val
+            self._update_level()
+
+    def addHandler(self, handler: logging.Handler):
+        """
+        Add a handler to self.logger without handler name, the level gate of the logger is updated accordingly
+        """
+        with self._configure():
+            self.logger.addHandler(handler)
+            self._update_level()
+
+    def removeHandler(self, handler: logging.Handler):
+        with self._configure():
+            snapshot = self._snapshot
+
+            self.logger.removeHandler(handler)
+
+            handlers = {k: v for k, v in snapshot.handlers.items() if v is not handler}
+            if len(handlers) != len(snapshot.handlers):
+                handler_configs = {k: v for k, v in snapshot.handler_configs.items() if k in handlers}
+                self._publish(snapshot.replace(handlers=handlers, handler_configs=handler_configs))
+
+            self._update_level()
+
+    @contextmanager
+    def _configure(self):
+        """
+        Acquire self._config_lock for a configuration change, the other loggers sharing the handlers changed
+        meanwhile are updated once the lock is released, see logme.registry.HandlerIndex
+        """
+        with handler_index.batch():
+            with self._config_lock:
+                yield
+
+    def _get_effective_level(self, snapshot: LoggerSnapshot) -> int:
+        """
+        Get the lowest level worth creating a record for, the level of the level gate.
+
+        If the logger doesn't propagate, records below the level of all of its handlers would only be discarded,
+        so the gate is raised to the lowest handler level.
+        Propagating loggers stay at master_level, as handlers can be added to the ancestors at any time,
+        e.g. logging.basicConfig() or pytest caplog.
+
+        *The level of self.logger stays at master_level, the loggers below it inherit that level*
+        """
+        logger = self.logger
+        level = snapshot.master_level
+
+        if not logger.propagate and logger.handlers:
+            level = max(level, min(handler.level for handler in logger.handlers))
+
+        return level
+
+    def _publish(self, snapshot: LoggerSnapshot):
+        """
+        Publish the snapshot built off to the side, *must be called with self._config_lock acquired*
+
+        - the changed handler configs are applied, each handler switches to its new level and formatter
+          under the handler lock, so an emit never sees one without the other
+        - the handler list of self.logger is replaced as a whole
+        - the level of self.logger and the level gate are updated, then the snapshot is swapped in
+        - the handlers changed or attached differently are marked, to update the other loggers sharing them
+          at the end of the configuration change
+        """
+        old_snapshot = self._snapshot
+        changed = []
+
+        for handler_name, handler_config in snapshot.handler_configs.items():
+            if old_snapshot.handler_configs.get(handler_name) != handler_config:
+                handler = snapshot.handlers[handler_name]
+                if self._apply_handler_config(handler, *handler_config):
+                    changed.append(handler)
+
+        handler_index.changed(changed)
+
+        old_handlers = set(old_snapshot.handlers.values())
+        new_handlers = set(snapshot.handlers.values())
+
+        handler_index.unlink(self, old_handlers - new_handlers)
+        handler_index.link(self, new_handlers - old_handlers)
+
+        # Shared handlers already attached to an ancestor the records propagate to would write the records twice
+        logger = self.logger
+        inherited = self._get_inherited_handlers()
+        attached = [i for i in snapshot.handlers.values() if i not in inherited]
+
+        # Handlers added to self.logger outside of logme are kept
+        published = old_handlers | new_handlers
+        handler_list = attached + [i for i in logger.handlers if i not in published]
+
+        if handler_list != logger.handlers:
+            # The loggers below inherit the handlers attached to this logger
+            handler_index.changed(set(handler_list).symmetric_difference(logger.handlers), below=self.name)
+
+            with logging._lock:
+                logger.handlers = handler_list
+
+        self._set_clock_filter(snapshot)
+        self._snapshot = snapshot.replace(gate=self._get_gate(snapshot))
+
+    def _get_inherited_handlers(self) -> set:
+        """
+        Get the handlers of the ancestors of self.logger the records propagate to
+        """
+        handlers = set()
+
+        logger = self.logger
+        while logger.propagate and logger.parent is not None:
+            logger = logger.parent
+            handlers.update(logger.handlers)
+
+        return handlers
+
+    def _get_gate(self, snapshot: LoggerSnapshot) -> LevelGate:
+        """
+        Set the level of self.logger to master_level, and get the level gate of the logger
+        """
+        logger = self.logger
+
+        if logger.level != snapshot.master_level:
+            handler_index.set_logger_level(logger, snapshot.master_level)
+
+        # logging.disable() is left to the logging calls, a cached gate would go stale when it changes
+        return LevelGate.get(None if logger.disabled else self._get_effective_level(snapshot))
+
+    def _update_level(self):
+        """
+        Update the level gate and the attached handlers of self.logger from the current handlers.
+        *Called whenever the handlers change, including by the other loggers sharing them*
+        """
+        with self._config_lock:
+            snapshot = self._snapshot
+
+            # Shared handlers can be reconfigured by another logger
+            handler_configs = {handler_name: (handler.level, handler.formatter)
+                               for handler_name, handler in snapshot.handlers.items()}
+
+            if handler_configs != snapshot.handler_configs:
+                self._snapshot = snapshot = snapshot.replace(handler_configs=handler_configs)
+
+            self._publish(snapshot)
 
     def _set_master_properties(self):
-        master_properties = {
-            '_master_formatter': self.config['formatter'],
-            '_master_level': self.config['level'],
-            'handler_names':  [i for i in self.config.keys()
-                               if i not in ['level', 'formatter']]
+        # Level rules, see logme.levels.LevelRules, take precedence over the level of the config
+        master_level = level_rules.resolve(self.name, default=self._config.level)
+
+        self._snapshot = LoggerSnapshot(master_level=master_level, master_formatter=self._config.formatter.source,
+                                        handlers={}, handler_configs={}, gate=LevelGate.get(master_level))
+
+    def _set_context_filter(self):
+        """
+        Add the filter injecting the fields bound with logme.context into the records of this logger
+        """
+        logger = self.logger
+
+        if context_filter not in logger.filters:
+            logger.addFilter(context_filter)
 
-        }
+    def _set_clock_filter(self, snapshot: LoggerSnapshot):
+        """
+        Add the filter stamping the records with the monotonic clock at creation if a handler formatter
+        uses 'clock: monotonic', remove it otherwise
+        """
+        logger = self.logger
+        monotonic = any(getattr(formatter, 'clock', None) == 'monotonic'
+                        for _, formatter in snapshot.handler_configs.values())
 
-        for k, v in master_properties.items():
-            setattr(self, k, v)
+        if monotonic and clock_filter not in logger.filters:
+            logger.addFilter(clock_filter)
+        elif not monotonic and clock_filter in logger.filters:
+            logger.removeFilter(clock_filter)
 
-    def _set_handlers_from_conf(self, reconfig=False):
+    def _set_handlers_from_conf(self, reconfig=False, shared_handlers: dict=None):
         """
         Iterate through the config dict, set the active handlers
         """
-        for handler_name in self.handler_names:
-            if self.config[handler_name]['active'] is False:
-                continue
+        with self._config_lock:
+            if reconfig:  # If true, reconfigure the existing handlers
+                self._publish(self._reconfig_handlers(self._snapshot))
+                return
 
-            level = self.config[handler_name].get('level')
-            formatter = self.config[handler_name].get('formatter')
+            for handler_config in self._config.active_handlers:
+                handler_name = handler_config.name
 
-            parse_args = self._get_handler_args(handler_name)
+                if shared_handlers and handler_name in shared_handlers:
+                    handler = shared_handlers[handler_name]
 
-            if reconfig:  # If true, reconfigure the existing handlers
-                handler_obj = self.handlers[handler_name]
-                self._config_handler(handler_obj, level=level,
-                                     formatter=formatter, set_from_master=True)
-            else:
-                handler_type = self._get_handler_type(handler_name)
-                self.add_handler(handler_name, handler_type, level=level, formatter=formatter,
-                                 skip_duplicate=True, **parse_args)
+                    # The level of a handler set from the master levels covers the master level of this logger
+                    if handler_config.level is None:
+                        level = min(handler.level, self._snapshot.master_level)
+                    else:
+                        level = handler.level
+
+                    self._add_handler_obj(handler_name, handler, level=level)
+                else:
+                    if handler_config.deprecated:
+                        self._warn_deprecated_config()
+
+                    self.add_handler(handler_name, handler_config.handler_class, level=handler_config.level,
+                                     formatter=handler_config.formatter, skip_duplicate=True, **handler_config.args)
+
+            self._update_level()
+
+    def _get_active_handler_names(self) -> list:
+        return [i.name for i in self._config.active_handlers]
+
+    def _reconfig_handlers(self, snapshot: LoggerSnapshot) -> LoggerSnapshot:
+        """
+        Build the handler configs of the active handlers from the master level and formatter of the snapshot,
+        without applying them
+
+        :return: the new snapshot to be published
+        """
+        handler_configs = dict(snapshot.handler_configs)
+
+        for handler_config in self._config.active_handlers:
+            handler_configs[handler_config.name] = self._build_handler_config(
+                snapshot.handlers[handler_config.name], level=handler_config.level,
+                formatter=handler_config.formatter, set_from_master=True, snapshot=snapshot)
+
+        return snapshot.replace(handler_configs=handler_configs)
+
+    def _add_handler_obj(self, handler_name: str, handler: logging.Handler, level: int=None):
+        """
+        Publish a new snapshot including the configured handler, *must be called with self._config_lock acquired*
+
+        :param level: the level to set on the handler, the current level of the handler if not set
+        """
+        snapshot = self._snapshot
+        level = handler.level if level is None else level
+
+        self._publish(snapshot.replace(handlers={**snapshot.handlers, handler_name: handler},
+                                       handler_configs={**snapshot.handler_configs,
+                                                        handler_name: (level, handler.formatter)}))
 
     def _get_handler_args(self, handler_name):
         """
         Get the args passed into handler from config
         """
-        parse_args = {k: v for k, v in self.config[handler_name].items()
-                      if k not in ['type', 'active', 'level', 'formatter']}
-
-        return parse_args
+        return dict(self._config.handlers[handler_name].args)
 
     def _get_handler_type(self, handler_name) -> str:
         """
@@ -201,17 +600,18 @@ class LogmeLogger:
 
         :return: e.g. StreamHandler, SocketHandler
         """
-        try:
-            handler_type = self.config[handler_name]['type']
-        except KeyError:
-            # Deprecation warning
-            warnings.warn("Current configuration is deprecated, run 'logme upgrade' in your "
-                          "project root to upgrade your logme.ini file",
-                          category=DeprecationWarning)
+        handler_config = self._config.handlers[handler_name]
+
+        if handler_config.deprecated:
+            self._warn_deprecated_config()
 
-            handler_type = handler_name
+        return handler_config.handler_type
 
-        return handler_type
+    @staticmethod
+    def _warn_deprecated_config():
+        warnings.warn("Current configuration is deprecated, run 'logme upgrade' in your "
+                      "project root to upgrade your logme.ini file",
+                      category=DeprecationWarning)
 
     def _config_handler(self, handler: logging.Handler, level: Union[str, int]=None,
                         formatter: Union[str, dict]=None, set_from_master: bool=False):
@@ -226,58 +626,118 @@ class LogmeLogger:
         :param set_from_master: Set *level* or *formatter* from obj.master_level and obj.master_formatter
 
         """
-        # Set level
-        if level:
+        self._apply_handler_config(handler, *self._build_handler_config(handler, level=level, formatter=formatter,
+                                                                        set_from_master=set_from_master))
+
+    def _build_handler_config(self, handler: logging.Handler, level: Union[str, int]=None,
+                              formatter: Union[str, dict]=None, set_from_master: bool=False,
+                              snapshot: LoggerSnapshot=None) -> tuple:
+        """
+        Build the handler's level and formatter, without applying them to the handler
+
+        :param snapshot: snapshot with the master level and formatter, the current snapshot if not set
+
+        :return: (level number, formatter object), the current ones of the handler if not changed
+        """
+        snapshot = snapshot or self._snapshot
+
+        # Level, NOTSET from the config is a level set
+        if level is not None:
             log_level = self._get_level(level)
-            handler.setLevel(log_level)
         elif set_from_master:
-            handler.setLevel(self.master_level)
+            log_level = self._get_handler_master_level(handler, snapshot)
+        else:
+            log_level = handler.level
 
-        # Set formatter
-        if type(handler) == logging.StreamHandler:
+        # Formatter, wrapping handlers such as spooled handlers are formatted by the target handler
+        formatted_handler = logme_handlers.unwrap_handler(handler)
+
+        if type(formatted_handler) == logging.StreamHandler:
             formatter_class = partial(ColorFormatter,
                                       color_config=self.color_config)
         else:
-            formatter_class = logging.Formatter
+            formatter_class = LogmeFormatter
 
         if formatter:
-            self._set_formatter(handler, formatter_class, formatter)
+            formatter_object = self._build_formatter(formatter_class, formatter)
         elif set_from_master:
-            self._set_formatter(handler, formatter_class, self.master_formatter)
+            formatter_object = self._build_formatter(formatter_class, self._get_master_formatter(snapshot))
+        else:
+            formatter_object = handler.formatter
+
+        return log_level, formatter_object
+
+    def _get_handler_master_level(self, handler: logging.Handler, snapshot: LoggerSnapshot) -> int:
+        """
+        Get the level of a handler set from the master level. A handler shared with other loggers,
+        e.g. with logme.log_package(), is set to the lowest master level of the loggers sharing it,
+        so the master level of one logger does not change the records written for the others.
+        Each logger still drops the records below its own master level.
+        """
+        level = snapshot.master_level
+
+        if handler_index.count(handler) < 2:
+            return level
+
+        # Raising the master level of the logger at the lowest level raises the handler at the end of the batch,
+        # once the master levels of all the loggers are known
+        if self._snapshot.master_level <= handler.level < level:
+            handler_index.raise_level(handler)
+
+        return min(level, handler.level)
+
+    @staticmethod
+    def _apply_handler_config(handler: logging.Handler, level: int, formatter: logging.Formatter) -> bool:
+        """
+        Set the level and formatter of the handler at once, emits holding the handler lock see either both
+        the old ones or both the new ones
+
+        :return: True if the handler is changed
+        """
+        changed = False
+
+        handler.acquire()
+        try:
+            if handler.level != level:
+                handler.setLevel(level)
+                changed = True
+            if handler.formatter is not formatter:
+                handler.setFormatter(formatter)
+                changed = True
+        finally:
+            handler.release()
+
+        return changed
 
     def _get_level(self, level: Union[str, int]) -> int:
         """
         Get the level number of the logger
         """
-        if isinstance(level, str):
-            try:
-                return logging._nameToLevel[level.upper()]
-            except KeyError:
-                raise InvalidOption(f"'{level}' is not a valid level option")
-        if isinstance(level, int):  # logging.ERROR is also type of int
-            return level
+        return resolve_level(level)
 
-    def _get_formatter_args(self, formatter: Union[str, dict]) -> dict:
+    def _get_master_formatter(self, snapshot: LoggerSnapshot) -> Union[str, dict, FormatterConfig]:
         """
-        Get argument to be passed to logging.Formatter
+        The master formatter of the snapshot, resolved from the config once unless it has been changed
         """
-        if isinstance(formatter, dict):
-            return formatter
-        elif isinstance(formatter, str):
-            return {'fmt': formatter, 'style': '{'}
+        if snapshot.master_formatter is self._config.formatter.source:
+            return self._config.formatter
 
-        raise ValueError(f"Invalid formatter type: '{type(formatter)}', "
-                         f"formatter must be passed as either dict or string")
+        return snapshot.master_formatter
 
     def _set_formatter(self, handler: logging.Handler, formatter_class: type,
                        formatter: Union[str, dict]):
         """
         Set the formatter with the handler and formatter class specified
         """
-        args = self._get_formatter_args(formatter)
-        formatter_object = formatter_class(**args)
+        handler.setFormatter(self._build_formatter(formatter_class, formatter))
 
-        handler.setFormatter(formatter_object)
+    def _build_formatter(self, formatter_class: type,
+                         formatter: Union[str, dict, FormatterConfig]) -> logging.Formatter:
+        """
+        Get the formatter object, *formatter_class* is overridden if 'type' is specified in the formatter dict,
+        e.g. JsonFormatter
+        """
+        return FormatterConfig.from_config(formatter).build(formatter_class)
 
     def _handler_exist(self, handler: logging.Handler) -> bool:
         """
@@ -295,7 +755,7 @@ class LogmeLogger:
 
         return False
 
-    def add_handler(self, handler_name: str, handler_type: str, formatter: Union[str, dict]=None,
+    def add_handler(self, handler_name: str, handler_type: Union[str, type], formatter: Union[str, dict]=None,
                     level: Union[str, int]=None, allow_duplicate: bool=False, skip_duplicate: bool=False, **kwargs):
         """
         Add the handler to self.logger on adhoc basis
@@ -303,7 +763,7 @@ class LogmeLogger:
         :param handler_name: The name of the handler:
                                     - Same as handler_type.
                                     - key for handlers in ini file. *version >= 1.1.0*
-        :param handler_type: The type of handler, e.g. StreamHandler, SocketHandler
+        :param handler_type: The type of handler, e.g. StreamHandler, SocketHandler, or the handler class
         :param formatter: formatter to be passed to the handler
         :param level: Level for the handler
         :param allow_duplicate: *USE WITH CAUTION*, this allows duplication of handlers in the same logger
@@ -312,34 +772,105 @@ class LogmeLogger:
         :param kwargs: arguments to be passed to the handler class
 
         """
-        if self.handlers.get(handler_name):
-            raise LogmeError(f"Handler with name {handler_name} already exists!")
+        with self._configure():
+            if self.handlers.get(handler_name):
+                raise LogmeError(f"Handler with name {handler_name} already exists!")
 
-        try:
-            handler_class = getattr(logging, handler_type)
-        except AttributeError:
-            handler_class = getattr(logging_handlers, handler_type)
+            handler_class = self._get_handler_class(handler_type)
 
-        # Ensure filename for handlers are passed in and directory is created
-        self._ensure_filepath(handler_class, **kwargs)
+            # Handlers wrapping another handler, e.g. RingBufferHandler, MemoryHandler
+            built_target = None
+            if isinstance(kwargs.get('target'), str):
+                kwargs['target'] = built_target = self._build_target_handler(kwargs['target'])
 
-        handler = handler_class(**kwargs)
-        self._config_handler(handler, level=level,
-                             formatter=formatter, set_from_master=True)
+            index_options = self._pop_wrapper_options(kwargs, 'index', logme_handlers.IndexingHandler)
+            spool_options = self._pop_wrapper_options(kwargs, 'spool', SpoolingHandler)
+            concurrent_options = self._pop_wrapper_options(kwargs, 'concurrent', logme_handlers.ConcurrentHandler)
+
+            # Ensure filename for handlers are passed in and directory is created
+            self._ensure_filepath(handler_class, **kwargs)
+
+            handler = handler_class(**kwargs)
+            if index_options is not None:
+                handler = logme_handlers.IndexingHandler(handler, **index_options)
+            if spool_options is not None:
+                handler = SpoolingHandler(handler, **spool_options)
+            if concurrent_options is not None:
+                handler = logme_handlers.ConcurrentHandler(handler, **concurrent_options)
+
+            self._config_handler(handler, level=level,
+                                 formatter=formatter, set_from_master=True)
+
+            if self._handler_exist(handler) and not allow_duplicate:
+                # The discarded handler and the target built for it are not used by anything else
+                handler.close()
+                if built_target:
+                    built_target.close()
+
+                if skip_duplicate:
+                    return
 
-        if self._handler_exist(handler):
-            if allow_duplicate:
-                self.logger.addHandler(handler)
-                self.handlers[handler_name] = handler
-                return
-            if skip_duplicate:
-                return
-            else:
                 raise DuplicatedHandler(f"{handler_class} with the exact same configuration already exists, "
                                         f"add allow_duplicate=True to allow.")
-        else:
-            self.logger.addHandler(handler)
-            self.handlers[handler_name] = handler
+
+            self._add_handler_obj(handler_name, handler)
+            self._install_flush_signals(handler)
+
+    @staticmethod
+    def _install_flush_signals(handler: logging.Handler):
+        """
+        Install the flush signals of the ring buffer handlers, once the handler is added to the logger
+        """
+        for wrapped in logme_handlers.iter_handler_chain(handler):
+            if isinstance(wrapped, logme_handlers.RingBufferHandler) and wrapped.flush_signal:
+                wrapped.install_signal()
+
+    def _get_handler_class(self, handler_type: Union[str, type]) -> type:
+        """
+        Get the handler class by name from logging, logging.handlers, logme.handlers,
+        the registered handler types or the dotted path, see logme.handler_types
+        """
+        return handler_registry.get_class(handler_type)
+
+    def _pop_wrapper_options(self, kwargs: dict, mode: str, wrapper_class: type) -> Union[dict, None]:
+        """
+        Pop the options of a wrapping handler from the handler arguments, *This updates the original dict passed in*
+
+        :param mode: the option enabling the wrapping handler, e.g. 'index', 'spool', 'concurrent'
+        :param wrapper_class: IndexingHandler, SpoolingHandler or ConcurrentHandler
+
+        :return: arguments to be passed into *wrapper_class*, None if *mode* is not enabled
+        """
+        if not kwargs.pop(mode, False):
+            return
+
+        return {option: kwargs.pop(key) for key, option in wrapper_class.config_options.items()
+                if key in kwargs}
+
+    def _build_target_handler(self, handler_name: str) -> logging.Handler:
+        """
+        Build the handler declared in the config, *regardless of 'active'*, without adding it to the logger.
+        Used as the target of handlers wrapping another handler.
+
+        :param handler_name: key of the handler in the config
+        """
+        handler_config = self._config.handlers.get(handler_name)
+        if not handler_config:
+            raise InvalidLoggerConfig(f"target handler '{handler_name}' is not found in the config")
+
+        if handler_config.deprecated:
+            self._warn_deprecated_config()
+
+        handler_class = handler_config.get_handler_class()
+        kwargs = dict(handler_config.args)
+
+        self._ensure_filepath(handler_class, **kwargs)
+
+        handler = handler_class(**kwargs)
+        self._config_handler(handler, level=handler_config.level,
+                             formatter=handler_config.formatter, set_from_master=True)
+
+        return handler
 
     def _ensure_filepath(self, handler_class, **kwargs):
         """
@@ -350,9 +881,7 @@ class LogmeLogger:
         :param kwargs: arguments to be passed into the the class when instantiate an object
         """
 
-        required_args = str(inspect.signature(handler_class))
-
-        if 'filename,' in required_args:
+        if handler_registry.get(handler_class).requires_filename:
             try:
                 filename = kwargs['filename']
                 ensure_dir(filename)
@@ -387,19 +916,29 @@ class LogmeLogger:
 
         caller_file_path = inspect.getframeinfo(inspect.currentframe().f_back).filename
         if config:
-            self.config = get_logger_config(caller_file_path, config)
-        else:
-            self.config = config_dict
+            config_dict = load_logger_config(caller_file_path, config)
+
+        with self._configure():
+            self._config = LoggerConfig.from_dict(config_dict)
+
+            # Remove existing logger from Logger manager dict
+            with logging._lock:
+                logging.Logger.manager.loggerDict.pop(self.name, None)
+
+            logger_registry.unregister(self)
+            handler_index.unlink(self, self._snapshot.handlers.values())
 
-        # Remove existing logger from Logger manager dict
-        del logging.Logger.manager.loggerDict[self.name]
+            if name:
+                self._name = name
 
-        if name:
-            self._name = name
+            self._logger = logging.getLogger(self.name)
+            self.config_name = config
 
-        self.handlers = {}
-        self._set_master_properties()
-        self._set_handlers_from_conf()
+            self._set_master_properties()
+            self._set_context_filter()
+            self._set_handlers_from_conf()
+
+            logger_registry.register(self)
 
     def reconfig_handler(self, handler_name: str, level: Union[str, int]=None, formatter: Union[str, dict]=None):
         """
@@ -414,9 +953,14 @@ class LogmeLogger:
         if not level and not formatter:
             raise InvalidOption("Set at least one of 'level' or 'formatter' for reconfiguration.")
 
-        try:
-            handler_obj = self.handlers[handler_name]
-            self._config_handler(handler_obj, level=level,
-                                 formatter=formatter)
-        except KeyError:
-            raise LogmeError(f"{handler_name} is not found in this logger, either use add_handle() to add this handler")
+        with self._configure():
+            snapshot = self._snapshot
+
+            try:
+                handler_obj = snapshot.handlers[handler_name]
+            except KeyError:
+                raise LogmeError(f"{handler_name} is not found in this logger, "
+                                 f"either use add_handle() to add this handler")
+
+            handler_config = self._build_handler_config(handler_obj, level=level, formatter=formatter)
+            self._publish(snapshot.replace(handler_configs={**snapshot.handler_configs, handler_name: handler_config}))
@@ -0,0 +1,506 @@
+import re
+import bz2
+import glob
+import gzip
+import json
+import lzma
+import mmap
+import time
+import string
+import logging
+
+from pathlib import Path
+from datetime import datetime, timedelta
+from collections import Counter, deque
+from typing import Iterator, Iterable, Union
+
+from .index import TimeIndex
+from .config import FormatterConfig
+from .formatters import JsonFormatter
+from .exceptions import LogmeError
+
+
+COMPRESSED_OPENERS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+
+# Suffixes added by RotatingFileHandler (app.log.1) and TimedRotatingFileHandler (app.log.2024-01-01_00-00)
+_ROTATED_SUFFIX_RE = re.compile(r"\d[\d_-]*")
+
+_TIME_DIRECTIVES = {
+    'Y': r'\d{4}', 'y': r'\d{2}', 'm': r'\d{1,2}', 'd': r'\d{1,2}', 'H': r'\d{1,2}', 'I': r'\d{1,2}',
+    'M': r'\d{1,2}', 'S': r'\d{1,2}', 'f': r'\d{1,6}', 'j': r'\d{1,3}', 'p': r'[AaPp][Mm]',
+    'a': r'[A-Za-z]+', 'A': r'[A-Za-z]+', 'b': r'[A-Za-z]+', 'B': r'[A-Za-z]+', 'z': r'[+-]\d{2}:?\d{2}|Z',
+    'Z': r'[A-Za-z]*', '%': '%',
+}
+
+_FIELD_PATTERNS = {
+    'levelno': r'\d+', 'lineno': r'\d+', 'process': r'\d+', 'thread': r'\d+', 'msecs': r'\d+(?:\.\d+)?',
+    'created': r'\d+(?:\.\d+)?', 'relativeCreated': r'\d+(?:\.\d+)?', 'levelname': r'\S+', 'message': r'.*',
+}
+
+_PERCENT_FIELD_RE = re.compile(r"%\((?P<field>\w+)\)[#0+ -]*\d*(?:\.\d+)?[diouxXeEfFgGcrsa]|%%")
+_DOLLAR_FIELD_RE = re.compile(r"\$(?:(?P<field>\w+)|\{(?P<braced>\w+)\})|\$\$")
+
+_TIME_CACHE_SIZE = 4096
+
+_RELATIVE_TIME_RE = re.compile(r"(?P<amount>\d+(?:\.\d+)?)(?P<unit>[smhd])")
+_TIME_UNITS = {'s': 'seconds', 'm': 'minutes', 'h': 'hours', 'd': 'days'}
+
+
+class LogEntry:
+    """
+    A record read back from a log file, continuation lines (e.g. tracebacks) are part of the entry
+
+    :param fields: {formatter field: text}, e.g. {'asctime': '...', 'name': 'myapp', 'levelname': 'INFO'}
+    :param text: the lines of the record as written
+    :param source: path of the log file
+    :param offset: byte offset of the record in the file, in the decompressed content for compressed files
+    :param timestamp: epoch seconds parsed from 'created' or 'asctime', None if the format has neither
+    """
+    __slots__ = ['fields', 'text', 'source', 'offset', 'timestamp', 'name', 'levelname', 'levelno']
+
+    def __init__(self, fields: dict, text: str, source: str=None, offset: int=0, timestamp: float=None):
+        self.fields = fields
+        self.text = text
+        self.source = source
+        self.offset = offset
+        self.timestamp = timestamp
+
+        self.name = fields.get('name')
+        self.levelname = fields.get('levelname')
+
+        levelno = fields.get('levelno')
+        if levelno is not None:
+            self.levelno = int(levelno)
+        else:
+            self.levelno = logging._nameToLevel.get(self.levelname, logging.NOTSET) if self.levelname else None
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.levelname} {self.name} {self.source}:{self.offset}>"
+
+    @property
+    def message(self) -> str:
+        return self.fields.get('message', self.text)
+
+
+class LogParser:
+    """
+    Parse the lines written with a logme formatter back into LogEntry objects,
+    the format string is compiled into a regular expression once.
+
+    Usage:
+        >>> parser = LogParser.from_formatter('{asctime} - {name} - {levelname} - {message}')
+        >>> for entry in parser.parse(read_lines('logs/app.log')):
+        ...     print(entry.levelname, entry.message)
+
+    :param fmt: format string of the formatter, logging.Formatter default if None
+    :param datefmt: date format of asctime
+    :param style: '%', '{' or '$'
+    :param json_lines: the records are JSON objects written by JsonFormatter
+    """
+    def __init__(self, fmt: str=None, datefmt: str=None, style: str='%', json_lines: bool=False):
+        self.fmt = fmt or logging._STYLES[style][1]
+        self.datefmt = datefmt
+        self.style = style
+        self.json_lines = json_lines
+
+        self.pattern = None if json_lines else re.compile(self._build_pattern(self._tokenize(self.fmt, style)))
+
+        self._time_cache = {}
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.fmt!r}>"
+
+    @classmethod
+    def from_formatter(cls, formatter: Union[str, dict, FormatterConfig]) -> 'LogParser':
+        """
+        :param formatter: formatter config as in logme.ini, '{' style format string or dict
+        """
+        formatter = FormatterConfig.from_config(formatter)
+        args = formatter.args
+
+        json_lines = bool(formatter.formatter_class and issubclass(formatter.formatter_class, JsonFormatter))
+
+        return cls(fmt=args.get('fmt'), datefmt=args.get('datefmt'), style=args.get('style', '%'),
+                   json_lines=json_lines)
+
+    def parse_line(self, line: str) -> Union[dict, None]:
+        """
+        :return: {field: text}, None if the line is not the start of a record
+        """
+        if self.json_lines:
+            if not line.startswith('{'):
+                return
+            try:
+                fields = json.loads(line)
+            except ValueError:
+                return
+            return fields if isinstance(fields, dict) else None
+
+        match = self.pattern.match(line)
+        return match and match.groupdict()
+
+    def parse(self, lines: Iterable, source: str=None) -> Iterator[LogEntry]:
+        """
+        :param lines: (byte offset, line) pairs, see read_lines()
+
+        Lines not matching the format are appended to the previous entry, lines before the first record are
+        yielded as entries without fields.
+        """
+        pending = None  # [fields, lines, offset]
+
+        for offset, line in lines:
+            fields = self.parse_line(line)
+
+            if fields is None and pending is not None:
+                pending[1].append(line)
+                continue
+
+            if pending is not None:
+                yield self._build_entry(pending, source)
+
+            pending = [fields or {}, [line], offset]
+
+        if pending is not None:
+            yield self._build_entry(pending, source)
+
+    def parse_time(self, fields: dict) -> Union[float, None]:
+        created = fields.get('created')
+        if created is not None:
+            return float(created)
+
+        asctime = fields.get('asctime')
+        if not asctime:
+            return
+
+        if not self.datefmt:
+            # logging default: '%Y-%m-%d %H:%M:%S,%03d', the date is parsed once per second
+            second, _, msecs = asctime.rpartition(',')
+            timestamp = self._strptime(second, logging.Formatter.default_time_format)
+
+            return timestamp and timestamp + int(msecs or 0) / 1000
+
+        return self._strptime(asctime, self.datefmt)
+
+    def _strptime(self, value: str, datefmt: str) -> Union[float, None]:
+        cache = self._time_cache
+
+        try:
+            return cache[value]
+        except KeyError:
+            pass
+
+        try:
+            timestamp = datetime.strptime(value, datefmt).timestamp()
+        except ValueError:
+            timestamp = None
+
+        if len(cache) >= _TIME_CACHE_SIZE:
+            cache.clear()
+        cache[value] = timestamp
+
+        return timestamp
+
+    def _build_entry(self, pending: list, source: str) -> LogEntry:
+        fields, lines, offset = pending
+
+        if len(lines) > 1 and 'message' in fields:
+            fields['message'] = '\n'.join([fields['message']] + lines[1:])
+
+        return LogEntry(fields, '\n'.join(lines), source=source, offset=offset,
+                        timestamp=self.parse_time(fields) if fields else None)
+
+    @staticmethod
+    def _tokenize(fmt: str, style: str) -> list:
+        """
+        :return: [(literal text, field name or None, padded)]
+        """
+        if style == '{':
+            return [(literal, field.split('.')[0].split('[')[0] if field else None, bool(spec))
+                    for literal, field, spec, _ in string.Formatter().parse(fmt)]
+
+        field_re = {'%': _PERCENT_FIELD_RE, '$': _DOLLAR_FIELD_RE}.get(style)
+        if field_re is None:
+            raise LogmeError(f"'{style}' is not a valid formatter style")
+
+        tokens = []
+        literal = ''
+        position = 0
+
+        for match in field_re.finditer(fmt):
+            literal += fmt[position:match.start()]
+            position = match.end()
+
+            field = match.groupdict().get('field') or match.groupdict().get('braced')
+            if not field:  # escaped '%%' or '$$'
+                literal += style
+                continue
+
+            # Width or precision, e.g. %(levelname)-8s
+            padded = style == '%' and match.group() != f"%({field})s"
+            tokens.append((literal, field, padded))
+            literal = ''
+
+        tokens.append((literal + fmt[position:], None, False))
+
+        return tokens
+
+    def _build_pattern(self, tokens: list) -> str:
+        pattern = ''
+        seen = set()
+
+        for literal, field, padded in tokens:
+            pattern += re.escape(literal)
+
+            if not field:
+                continue
+
+            if field in seen:
+                pattern += f"(?P={field})"
+                continue
+            seen.add(field)
+
+            group = f"(?P<{field}>{self._get_field_pattern(field)})"
+            pattern += rf"\s*{group}\s*" if padded else group
+
+        return pattern + '$'
+
+    def _get_field_pattern(self, field: str) -> str:
+        if field == 'asctime':
+            if not self.datefmt:
+                return r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}'
+
+            return re.sub(r"%(.)", lambda match: f"(?:{_TIME_DIRECTIVES.get(match.group(1), '.+?')})",
+                          re.escape(self.datefmt).replace(r'\%', '%'))
+
+        return _FIELD_PATTERNS.get(field, r'.*?')
+
+
+def find_segments(file_path: Union[str, Path]) -> list:
+    """
+    Get the log file and its rotated segments, oldest first.
+    e.g. app.log.3.gz, app.log.2.gz, app.log.1, app.log
+    """
+    file_path = Path(file_path)
+    segments = []
+
+    for path in file_path.parent.glob(f"{glob.escape(file_path.name)}*"):
+        name = path.name
+        if path.suffix in COMPRESSED_OPENERS:
+            name = name[:-len(path.suffix)]
+
+        if name == file_path.name:
+            segments.append(((2, ''), path))
+            continue
+
+        suffix = name[len(file_path.name) + 1:]
+        if name[len(file_path.name)] != '.' or not _ROTATED_SUFFIX_RE.fullmatch(suffix):
+            continue
+
+        # Higher numbers are older for RotatingFileHandler, timestamps sort in order
+        segments.append(((0, -int(suffix), '') if suffix.isdigit() else (1, 0, suffix), path))
+
+    return [path for _, path in sorted(segments, key=lambda x: x[0])]
+
+
+def read_lines(file_path: Union[str, Path], start: int=0, end: int=None) -> Iterator[tuple]:
+    """
+    Read the lines of a log file without loading it into memory, plain files are memory mapped,
+    .gz, .bz2 and .xz files are decompressed as a stream.
+
+    :param start: byte offset to start from, the start of a line
+    :param end: byte offset to stop at, lines starting before *end* are read to their end
+
+    :return: iterator of (byte offset, line without the line break)
+    """
+    file_path = Path(file_path)
+    opener = COMPRESSED_OPENERS.get(file_path.suffix)
+
+    if opener:
+        yield from _read_compressed_lines(opener, file_path, start, end)
+        return
+
+    with open(file_path, 'rb') as file:
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return
+
+        with mapped:
+            size = len(mapped)
+            end = size if end is None else min(end, size)
+            position = start
+
+            while position < end:
+                newline = mapped.find(b'\n', position)
+                stop = size if newline == -1 else newline + 1
+
+                yield position, mapped[position:stop].rstrip(b'\r\n').decode('utf-8', 'replace')
+                position = stop
+
+
+def _read_compressed_lines(opener, file_path: Path, start: int, end: int=None) -> Iterator[tuple]:
+    position = 0
+
+    with opener(file_path, 'rb') as file:
+        for line in file:
+            if end is not None and position >= end:
+                return
+            if position >= start:
+                yield position, line.rstrip(b'\r\n').decode('utf-8', 'replace')
+
+            position += len(line)
+
+
+def read_entries(file_paths: Iterable, parser: LogParser, since: float=None, until: float=None,
+                 slack: float=1.0) -> Iterator[LogEntry]:
+    """
+    Parse the entries of the log files in order
+
+    With *since* or *until*, only the byte range of each file around the time range is read if the file has a
+    time index, see logme.index.TimeIndex. The entries still need to be filtered by time, see filter_entries().
+
+    :param slack: seconds the records can be written out of time order
+    """
+    for file_path in file_paths:
+        start, end = 0, None
+
+        if since is not None or until is not None:
+            index = TimeIndex.load(file_path)
+            if index:
+                start, end = index.seek(since=since, until=until, slack=slack)
+
+        yield from parser.parse(read_lines(file_path, start=start, end=end), source=str(file_path))
+
+
+def follow_entries(file_path: Union[str, Path], parser: LogParser, interval: float=1.0,
+                   start: int=None) -> Iterator[LogEntry]:
+    """
+    Yield the entries appended to a log file as it is written, *never returns*.
+    The file is reopened from the start when it is rotated or truncated.
+
+    :param interval: seconds between the checks for new content
+    :param start: byte offset to start from, the end of the file if None
+    """
+    file_path = Path(file_path)
+    stat = file_path.stat()
+
+    # The position is taken when called, not on the first next()
+    return _follow(file_path, parser, interval, stat.st_size if start is None else start, stat.st_ino)
+
+
+def _follow(file_path: Path, parser: LogParser, interval: float, position: int, inode: int) -> Iterator[LogEntry]:
+    partial = b''
+
+    while True:
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:  # in the middle of a rotation
+            time.sleep(interval)
+            continue
+
+        if stat.st_ino != inode or stat.st_size < position:
+            inode, position, partial = stat.st_ino, 0, b''
+
+        if stat.st_size == position:
+            time.sleep(interval)
+            continue
+
+        # Offset of the partial line kept from the last read
+        offset = position - len(partial)
+
+        with open(file_path, 'rb') as file:
+            file.seek(position)
+            content = partial + file.read(stat.st_size - position)
+
+        position = stat.st_size
+
+        # Only complete lines are parsed, records are written with a single write
+        content, newline, partial = content.rpartition(b'\n')
+        if not newline:
+            continue
+
+        lines = []
+        for line in content.split(b'\n'):
+            lines.append((offset, line.rstrip(b'\r').decode('utf-8', 'replace')))
+            offset += len(line) + 1
+
+        yield from parser.parse(lines, source=str(file_path))
+
+
+def filter_entries(entries: Iterable, level: Union[str, int]=None, names: list=None, since: float=None,
+                   until: float=None, pattern: str=None) -> Iterator[LogEntry]:
+    """
+    Filter the entries, all the conditions set must match.
+    Entries without a timestamp are left out when *since* or *until* is set.
+
+    :param level: minimum level
+    :param names: logger names, matching the logger with the exact name and all its children
+    :param since: epoch seconds, inclusive
+    :param until: epoch seconds, exclusive
+    :param pattern: regular expression searched in the message
+    """
+    conditions = []
+
+    if level is not None:
+        min_level = logging._nameToLevel[level.upper()] if isinstance(level, str) else level
+        conditions.append(lambda entry: entry.levelno is not None and entry.levelno >= min_level)
+
+    if names:
+        exact = set(names)
+        prefixes = tuple(f"{name}." for name in names)
+        conditions.append(lambda entry: entry.name is not None and
+                          (entry.name in exact or entry.name.startswith(prefixes)))
+
+    if since is not None:
+        conditions.append(lambda entry: entry.timestamp is not None and entry.timestamp >= since)
+
+    if until is not None:
+        conditions.append(lambda entry: entry.timestamp is not None and entry.timestamp < until)
+
+    if pattern:
+        search = re.compile(pattern).search
+        conditions.append(lambda entry: search(entry.message) is not None)
+
+    for entry in entries:
+        if all(condition(entry) for condition in conditions):
+            yield entry
+
+
+def tail_entries(entries: Iterable, count: int) -> list:
+    """
+    Get the last *count* entries, only *count* entries are kept in memory
+    """
+    return list(deque(entries, maxlen=count))
+
+
+def count_entries(entries: Iterable) -> dict:
+    """
+    :return: {'total': number of entries, 'levels': Counter of level names, 'loggers': Counter of logger names}
+    """
+    levels = Counter()
+    loggers = Counter()
+    total = 0
+
+    for entry in entries:
+        total += 1
+        levels[entry.levelname] += 1
+        loggers[entry.name] += 1
+
+    return {'total': total, 'levels': levels, 'loggers': loggers}
+
+
+def parse_time_option(value: str, now: float=None) -> float:
+    """
+    Parse a time range option to epoch seconds
+
+    :param value: ISO 8601 local time, e.g. '2024-01-01 12:00', or relative to now, e.g. '30s', '15m', '2h', '1d'
+    """
+    match = _RELATIVE_TIME_RE.fullmatch(value.strip())
+    if match:
+        delta = timedelta(**{_TIME_UNITS[match.group('unit')]: float(match.group('amount'))})
+        return (time.time() if now is None else now) - delta.total_seconds()
+
+    try:
+        return datetime.fromisoformat(value.strip()).timestamp()
+    except ValueError:
+        raise LogmeError(f"'{value}' is not a valid time, e.g. '2024-01-01 12:00' or '15m'")
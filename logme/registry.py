@@ -0,0 +1,303 @@
+import logging
+import threading
+
+from contextlib import contextmanager
+from weakref import WeakValueDictionary, WeakKeyDictionary, WeakSet
+from typing import Iterator, Iterable, Union
+
+
+class LoggerRegistry:
+    """
+    Lookup of LogmeLogger objects by logger name, or by logger name and config section
+
+    Usage:
+        >>> registry = logme.log_package('mypackage')
+        >>> logger = registry['mypackage.models']
+
+    - Bulk operations on all the loggers under a name prefix
+        >>> logme.logger_registry.set_level('ERROR', prefix='mypackage.db')
+
+    :param weak: only keep weak references of the loggers,
+                 loggers are removed from the registry once they are garbage collected
+    """
+    def __init__(self, weak: bool=False):
+        mapping_class = WeakValueDictionary if weak else dict
+
+        self._loggers = mapping_class()  # name -> logger
+        self._sections = mapping_class()  # (name, config section) -> logger
+
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} loggers={len(self)}>"
+
+    def __getitem__(self, name: str):
+        return self._loggers[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._loggers
+
+    def __iter__(self) -> Iterator:
+        """
+        Iterate through the registered LogmeLogger objects
+        """
+        with self._lock:
+            return iter(list(self._loggers.values()))
+
+    def __len__(self) -> int:
+        return len(self._loggers)
+
+    def get(self, name: str, config: str=None, default=None):
+        """
+        Get the logger by name, *config* narrows the lookup to loggers configured from that logme.ini section
+        """
+        if config:
+            return self._sections.get((name, config), default)
+
+        return self._loggers.get(name, default)
+
+    def names(self) -> list:
+        with self._lock:
+            return list(self._loggers.keys())
+
+    def register(self, logger):
+        """
+        Add a LogmeLogger object to the registry, replacing the logger registered with the same name
+        """
+        with self._lock:
+            self._loggers[logger.name] = logger
+            self._sections[(logger.name, logger.config_name)] = logger
+
+    def unregister(self, logger):
+        """
+        Remove a LogmeLogger object from the registry, loggers registered with the same name are left untouched
+        """
+        with self._lock:
+            if self._loggers.get(logger.name) is logger:
+                del self._loggers[logger.name]
+
+            key = (logger.name, logger.config_name)
+            if self._sections.get(key) is logger:
+                del self._sections[key]
+
+    def find(self, prefix: str=None, config: str=None) -> list:
+        """
+        Get the loggers matching the name prefix and the config section
+
+        :param prefix: logger name prefix, matching the logger with the exact name and all its children.
+                       e.g. 'myapp.db' matches 'myapp.db' and 'myapp.db.models', but not 'myapp.dbutils'
+        :param config: config section in logme.ini
+        """
+        return [logger for logger in self
+                if self._match(logger, prefix, config)]
+
+    def set_level(self, level: Union[str, int], prefix: str=None, config: str=None) -> int:
+        """
+        Set master_level on all the matching loggers
+
+        :return: number of loggers changed
+        """
+        loggers = self.find(prefix=prefix, config=config)
+
+        with handler_index.batch():
+            for logger in loggers:
+                logger.master_level = level
+
+        return len(loggers)
+
+    def reconfig_handler(self, handler_name: str, level: Union[str, int]=None, formatter: Union[str, dict]=None,
+                         prefix: str=None, config: str=None) -> int:
+        """
+        Reconfigure the handler on all the matching loggers, loggers without the handler are skipped
+
+        :return: number of loggers changed
+        """
+        loggers = [logger for logger in self.find(prefix=prefix, config=config)
+                   if handler_name in logger.handlers]
+
+        with handler_index.batch():
+            for logger in loggers:
+                logger.reconfig_handler(handler_name, level=level, formatter=formatter)
+
+        return len(loggers)
+
+    def dump(self, prefix: str=None, config: str=None) -> str:
+        """
+        Get the handler topology of the matching loggers for debugging,
+        handlers shared between loggers have the same id
+        """
+        lines = []
+        for logger in sorted(self.find(prefix=prefix, config=config), key=lambda x: x.name):
+            snapshot = logger.snapshot
+            lines.append(f"{logger.name} [config={logger.config_name}, level={snapshot.master_level}]")
+
+            for handler_name, handler in snapshot.handlers.items():
+                level, formatter = snapshot.handler_configs[handler_name]
+                fmt = formatter._fmt if formatter else None
+
+                lines.append(f"    {handler_name}: {type(handler).__name__} id={id(handler):#x} "
+                             f"level={level} formatter={fmt!r}")
+
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _match(logger, prefix: str=None, config: str=None) -> bool:
+        if config and logger.config_name != config:
+            return False
+
+        if prefix and not (logger.name == prefix or logger.name.startswith(f"{prefix}.")):
+            return False
+
+        return True
+
+
+class HandlerIndex:
+    """
+    Reverse map of the handlers to the LogmeLogger objects using them, so a change of a handler shared between
+    loggers, e.g. with logme.log_package(), only updates the loggers sharing it.
+
+    Configuration changes run within batch(), the loggers sharing the changed handlers are updated once,
+    at the end of the outermost batch. Bulk operations wrap all their changes in a single batch.
+    """
+    def __init__(self):
+        self._loggers = WeakKeyDictionary()  # handler -> WeakSet of loggers
+        self._lock = threading.Lock()
+
+        # Changes of the current batch, per thread
+        self._local = threading.local()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} handlers={len(self._loggers)}>"
+
+    def link(self, logger, handlers: Iterable):
+        with self._lock:
+            for handler in handlers:
+                loggers = self._loggers.get(handler)
+                if loggers is None:
+                    loggers = self._loggers[handler] = WeakSet()
+
+                loggers.add(logger)
+
+    def unlink(self, logger, handlers: Iterable):
+        with self._lock:
+            for handler in handlers:
+                loggers = self._loggers.get(handler)
+                if loggers is not None:
+                    loggers.discard(logger)
+
+    def get_loggers(self, handler: logging.Handler) -> list:
+        """
+        Get the loggers using the handler
+        """
+        with self._lock:
+            return list(self._loggers.get(handler, ()))
+
+    def count(self, handler: logging.Handler) -> int:
+        """
+        Get the number of loggers using the handler
+        """
+        return len(self._loggers.get(handler, ()))
+
+    def changed(self, handlers: Iterable, below: str=None):
+        """
+        Mark the handlers as changed, the other loggers using them are updated at the end of the batch.
+        *Called by LogmeLogger with its config lock acquired, so the other loggers can't be updated right away*
+
+        :param below: only update the loggers below this logger name, e.g. when the logger attaches a handler
+        """
+        pending = self._local.__dict__.get('handlers')
+        if pending is None:
+            return
+
+        with self._lock:
+            for handler in handlers:
+                if self.count(handler) > 1:
+                    pending.setdefault(handler, set()).add(below)
+
+    def raise_level(self, handler: logging.Handler):
+        """
+        Set the handler to the lowest master level of the loggers using it at the end of the batch,
+        once a logger using it raised its master level
+        """
+        levels = self._local.__dict__.get('levels')
+        if levels is not None:
+            levels[handler] = None
+
+    def set_logger_level(self, logger: logging.Logger, level: int):
+        """
+        Set the level of a logging.Logger. Within a batch, the level caches of the loggers are cleared once
+        at the end instead of on every level change
+        """
+        if self._local.__dict__.get('handlers') is None:
+            logger.setLevel(level)
+            return
+
+        logger.level = level
+        self._local.clear_cache = True
+
+    @contextmanager
+    def batch(self):
+        """
+        Update the loggers sharing the handlers changed within the with-block, once, at the end of the block.
+        *Nested batches are part of the outermost one*
+        """
+        local = self._local
+        if local.__dict__.get('handlers') is not None:
+            yield
+            return
+
+        pending = local.handlers = {}  # handler -> logger names the updated loggers are below, None for all
+        levels = local.levels = {}
+        local.clear_cache = False
+        try:
+            yield
+        finally:
+            try:
+                self._set_master_levels(levels)
+
+                # Updating a logger can change the handlers it attaches, which updates the loggers below it
+                while pending:
+                    changes = list(pending.items())
+                    pending.clear()
+
+                    loggers = {}
+                    for handler, scopes in changes:
+                        for logger in self.get_loggers(handler):
+                            if None in scopes or any(logger.name.startswith(f"{i}.") for i in scopes):
+                                loggers[id(logger)] = logger
+
+                    for logger in loggers.values():
+                        logger._update_level()
+            finally:
+                local.handlers = local.levels = None
+
+                if local.clear_cache:
+                    logging.Logger.manager._clear_cache()
+
+    def _set_master_levels(self, handlers: Iterable):
+        """
+        Set the handlers to the lowest master level of the loggers using them, *called at the end of a batch*
+        """
+        for handler in handlers:
+            loggers = self.get_loggers(handler)
+            if not loggers:
+                continue
+
+            level = min(logger.master_level for logger in loggers)
+            if handler.level == level:
+                continue
+
+            handler.acquire()
+            try:
+                handler.setLevel(level)
+            finally:
+                handler.release()
+
+            self.changed([handler])
+
+
+# Registry of all the live LogmeLogger objects
+logger_registry = LoggerRegistry(weak=True)
+
+# Handlers of the live LogmeLogger objects
+handler_index = HandlerIndex()
@@ -0,0 +1,43 @@
+class LoggerSnapshot:
+    """
+    Immutable effective configuration of a LogmeLogger: levels, formatters and the handler set.
+
+    LogmeLogger builds a new snapshot off to the side on every configuration change, then publishes it with
+    a single reference swap, so readers always get one consistent configuration without locking.
+
+    Usage:
+        >>> snapshot = logger.snapshot
+        >>> level, formatter = snapshot.handler_configs['file']
+
+    *The dicts are shared with the snapshots derived with replace(), they must not be modified*
+
+    :param master_level: level number of the logger
+    :param master_formatter: formatter config of the logger, string or dict
+    :param handlers: {handler name: handler object}
+    :param handler_configs: {handler name: (level number, formatter object)}
+    :param gate: LevelGate of the logger
+    """
+    __slots__ = ['master_level', 'master_formatter', 'handlers', 'handler_configs', 'gate']
+
+    def __init__(self, master_level: int, master_formatter, handlers: dict, handler_configs: dict, gate):
+        for attr, value in [('master_level', master_level),
+                            ('master_formatter', master_formatter),
+                            ('handlers', handlers),
+                            ('handler_configs', handler_configs),
+                            ('gate', gate)]:
+            object.__setattr__(self, attr, value)
+
+    def __setattr__(self, attr, value):
+        raise AttributeError(f"{self.__class__.__name__} is read only")
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} level={self.master_level} handlers={list(self.handlers)}>"
+
+    def replace(self, **changes) -> 'LoggerSnapshot':
+        """
+        Get a new snapshot with *changes* applied
+        """
+        attrs = {attr: getattr(self, attr) for attr in self.__slots__}
+        attrs.update(changes)
+
+        return LoggerSnapshot(**attrs)
@@ -0,0 +1,411 @@
+import queue
+import shutil
+import pickle
+import struct
+import logging
+import tempfile
+import threading
+import itertools
+
+from pathlib import Path
+from collections import deque
+from typing import Callable, Union
+
+from .utils import ensure_dir
+from .exceptions import InvalidOption
+
+
+class _Segment:
+    """
+    Append-only segment file of the spool, records are length prefixed
+    """
+    __slots__ = ['path', 'size', 'records', 'read_records', 'read_offset', 'write_file']
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.size = 0
+        self.records = 0
+        self.read_records = 0
+        self.read_offset = 0
+        self.write_file = path.open('ab')
+
+    def close_writer(self):
+        if self.write_file:
+            self.write_file.close()
+            self.write_file = None
+
+    def remove(self):
+        self.close_writer()
+        self.path.unlink()
+
+
+class SpoolQueue:
+    """
+    FIFO queue keeping a fixed window of items in memory,
+    overflowing items are appended to segment files on local disk and read back in order.
+
+    Once items overflow to disk, new items keep going to disk until the disk backlog is drained,
+    so the order of the items is always preserved.
+
+    :param directory: directory of the segment files, a temporary directory is created if not set,
+                      and removed on close()
+    :param memory_records: maximum number of items kept in memory
+    :param segment_bytes: size of a segment file before a new segment is started
+    :param max_disk_bytes: maximum size of all the segment files
+    :param drop_policy: what to do when *max_disk_bytes* is reached,
+                        - drop_new: drop the new item
+                        - drop_old: drop the oldest segment file
+                        - block: wait up to *block_timeout* seconds for disk space, then drop the new item
+    :param block_timeout: seconds to wait for disk space with 'block' drop policy
+    :param dumps: serializer of the items written to disk
+    :param loads: deserializer of the items read from disk
+    """
+    drop_policies = ['drop_new', 'drop_old', 'block']
+
+    _header = struct.Struct('>I')
+
+    def __init__(self, directory: Union[str, Path]=None, memory_records: int=10000, segment_bytes: int=4194304,
+                 max_disk_bytes: int=268435456, drop_policy: str='drop_new', block_timeout: float=1.0,
+                 dumps: Callable=pickle.dumps, loads: Callable=pickle.loads):
+
+        if drop_policy not in self.drop_policies:
+            raise InvalidOption(f"'{drop_policy}' is not a valid drop policy, "
+                                f"please use one of {self.drop_policies}")
+
+        if directory:
+            ensure_dir(directory, path_type='current')
+            self.directory = Path(directory)
+        else:
+            self.directory = Path(tempfile.mkdtemp(prefix='logme-spool-'))
+
+        self._temporary = not directory
+
+        self.memory_records = memory_records
+        self.segment_bytes = segment_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.drop_policy = drop_policy
+        self.block_timeout = block_timeout
+
+        self._dumps = dumps
+        self._loads = loads
+
+        self._memory = deque()
+        self._segments = deque()  # oldest first, the last segment is the one being written to
+        self._segment_seq = itertools.count()
+        self._disk_records = 0
+        self._disk_bytes = 0
+        self._unfinished = 0
+
+        self._condition = threading.Condition()
+        self._counters = {'spilled': 0, 'dropped': 0, 'consumed': 0}
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.directory} size={len(self)}>"
+
+    def __len__(self) -> int:
+        return len(self._memory) + self._disk_records
+
+    @property
+    def stats(self) -> dict:
+        """
+        spilled: items written to disk, dropped: items dropped by the drop policy, consumed: items taken by get()
+        """
+        with self._condition:
+            return {
+                'memory_records': len(self._memory),
+                'disk_records': self._disk_records,
+                'disk_bytes': self._disk_bytes,
+                'segments': len(self._segments),
+                **self._counters,
+            }
+
+    def put(self, item) -> bool:
+        """
+        :return: False if the item is dropped
+        """
+        with self._condition:
+            if not self._segments and len(self._memory) < self.memory_records:
+                self._memory.append(item)
+            elif not self._spill(item):
+                self._counters['dropped'] += 1
+                return False
+
+            self._unfinished += 1
+            self._condition.notify_all()
+
+        return True
+
+    def get(self, timeout: float=None):
+        """
+        :raises: queue.Empty, if no item is available before timeout
+        """
+        with self._condition:
+            if not self._condition.wait_for(self.__len__, timeout):
+                raise queue.Empty
+
+            if not self._memory:
+                self._load()
+
+            self._counters['consumed'] += 1
+            return self._memory.popleft()
+
+    def task_done(self):
+        """
+        Mark an item taken by get() as processed
+        """
+        with self._condition:
+            self._unfinished -= 1
+            self._condition.notify_all()
+
+    def join(self, timeout: float=None) -> bool:
+        """
+        Wait until all the items are processed
+
+        :return: False if timed out
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._unfinished <= 0, timeout)
+
+    def close(self):
+        """
+        Remove all the segment files, and the directory if it is a temporary one, items not consumed are lost
+        """
+        with self._condition:
+            while self._segments:
+                self._segments.popleft().remove()
+
+            self._disk_records = 0
+            self._disk_bytes = 0
+            self._memory.clear()
+
+            if self._temporary:
+                shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _spill(self, item) -> bool:
+        """
+        Append the item to the segment file, *must be called with self._condition acquired*
+
+        :return: False if there is no disk space for the item
+        """
+        data = self._dumps(item)
+        size = self._header.size + len(data)
+
+        waited = False
+        while self._disk_bytes + size > self.max_disk_bytes:
+            if self.drop_policy == 'drop_old' and self._segments:
+                self._drop_oldest()
+            elif self.drop_policy == 'block' and not waited:
+                waited = True
+                self._condition.wait_for(lambda: self._disk_bytes + size <= self.max_disk_bytes,
+                                         self.block_timeout)
+            else:
+                return False
+
+        if not self._segments or self._segments[-1].size >= self.segment_bytes:
+            self._new_segment()
+
+        segment = self._segments[-1]
+        segment.write_file.write(self._header.pack(len(data)))
+        segment.write_file.write(data)
+
+        segment.size += size
+        segment.records += 1
+
+        self._disk_bytes += size
+        self._disk_records += 1
+        self._counters['spilled'] += 1
+
+        return True
+
+    def _new_segment(self):
+        if self._segments:
+            self._segments[-1].close_writer()
+
+        path = self.directory / f"segment-{next(self._segment_seq):08d}.spool"
+        self._segments.append(_Segment(path))
+
+    def _load(self):
+        """
+        Read up to *memory_records* items from the oldest segments into memory
+        """
+        while self._segments and len(self._memory) < self.memory_records:
+            segment = self._segments[0]
+
+            if segment.write_file:
+                segment.write_file.flush()
+
+            with segment.path.open('rb') as file:
+                file.seek(segment.read_offset)
+
+                while segment.read_records < segment.records and len(self._memory) < self.memory_records:
+                    length, = self._header.unpack(file.read(self._header.size))
+                    self._memory.append(self._loads(file.read(length)))
+
+                    segment.read_records += 1
+                    self._disk_records -= 1
+
+                segment.read_offset = file.tell()
+
+            if segment.read_records == segment.records:
+                self._remove_oldest()
+
+    def _remove_oldest(self):
+        segment = self._segments.popleft()
+        segment.remove()
+
+        self._disk_bytes -= segment.size
+        self._condition.notify_all()
+
+    def _drop_oldest(self):
+        segment = self._segments[0]
+        dropped = segment.records - segment.read_records
+
+        self._disk_records -= dropped
+        self._unfinished -= dropped
+        self._counters['dropped'] += dropped
+
+        self._remove_oldest()
+
+
+class SpoolingHandler(logging.Handler):
+    """
+    Hand the records to the *target* handler from a background thread, through a SpoolQueue.
+    Producers are never slowed down by a slow target, and memory stays flat during log bursts,
+    as the records over the memory window are spooled to disk.
+
+    Records are prepared the same way as logging.handlers.QueueHandler, the message is merged with its arguments,
+    and exception info is rendered as text before the record is spooled.
+
+    Usage in logme.ini, any handler can opt into the spool:
+
+        file =
+            type: FileHandler
+            active: True
+            filename: mylogpath/foo.log
+            spool: True
+            spool_dir: /var/spool/myapp
+            spool_memory_records: 10000
+            spool_max_disk_bytes: 268435456
+            spool_drop_policy: drop_old
+
+    :param target: the handler the records are handed to
+    :param kwargs: arguments to be passed to SpoolQueue
+    """
+    # Handler options in logme.ini -> SpoolQueue arguments
+    config_options = {
+        'spool_dir': 'directory',
+        'spool_memory_records': 'memory_records',
+        'spool_segment_bytes': 'segment_bytes',
+        'spool_max_disk_bytes': 'max_disk_bytes',
+        'spool_drop_policy': 'drop_policy',
+        'spool_block_timeout': 'block_timeout',
+    }
+
+    def __init__(self, target: logging.Handler, **kwargs):
+        super().__init__(level=target.level)
+        self.formatter = target.formatter
+
+        self.target = target
+        self.spool = SpoolQueue(**kwargs)
+
+        self._worker = None
+        self._stopped = threading.Event()
+
+    def __repr__(self):
+        level = logging.getLevelName(self.level)
+        return f"<{self.__class__.__name__} ({level}) target={self.target!r}>"
+
+    @property
+    def stats(self) -> dict:
+        return self.spool.stats
+
+    def setLevel(self, level: Union[str, int]):
+        super().setLevel(level)
+        self.target.setLevel(level)
+
+    def setFormatter(self, fmt: logging.Formatter):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        """
+        Same as logging.Handler.handle(), without the handler lock. SpoolQueue is thread safe,
+        and the 'block' drop policy waits for disk space without holding up the other threads, flush() and close()
+        """
+        passed = self.filter(record)
+        if passed:
+            self.emit(record)
+
+        return passed
+
+    def emit(self, record: logging.LogRecord):
+        if not self._worker:
+            self._start()
+
+        try:
+            self.spool.put(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def prepare(self, record: logging.LogRecord) -> dict:
+        """
+        Get the picklable attributes of the record
+        """
+        data = dict(record.__dict__)
+
+        data['msg'] = record.getMessage()
+        data['args'] = None
+
+        if record.exc_info:
+            if not record.exc_text:
+                formatter = self.formatter or logging.Formatter()
+                data['exc_text'] = formatter.formatException(record.exc_info)
+            data['exc_info'] = None
+
+        return data
+
+    def flush(self, timeout: float=None):
+        """
+        Wait for the spooled records to be handed to the target
+        """
+        if self._worker and not self._stopped.is_set():
+            self.spool.join(timeout)
+
+        self.target.flush()
+
+    def close(self):
+        if self._stopped.is_set():
+            return
+
+        self.flush()
+        self._stopped.set()
+
+        if self._worker:
+            self._worker.join()
+
+        self.spool.close()
+        self.target.close()
+        super().close()
+
+    def _start(self):
+        with self.lock:
+            if not self._worker:
+                self._worker = threading.Thread(target=self._drain, daemon=True)
+                self._worker.start()
+
+    def _drain(self):
+        while True:
+            try:
+                data = self.spool.get(timeout=0.1)
+            except queue.Empty:
+                if self._stopped.is_set():
+                    return
+                continue
+
+            try:
+                record = logging.makeLogRecord(data)
+
+                if record.levelno >= self.target.level:
+                    self.target.handle(record)
+            finally:
+                self.spool.task_done()
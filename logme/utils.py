@@ -2,9 +2,9 @@ from typing import Union
 
 from pathlib import Path
 
-from bnmutils import ConfigParser
 from configparser import NoSectionError
 
+from .ini import get_section, get_sections
 from .exceptions import InvalidOption, LogmeError, InvalidLoggerConfig
 
 
@@ -91,14 +91,23 @@ def get_config_content(caller_file_path: Union[str, Path], name: str) -> dict:
 
     init_file_path = get_ini_file_path(caller_file_path)
 
-    config = ConfigParser.from_files(init_file_path)
-
     try:
-        return config.to_dict(section=name)
+        return get_section(init_file_path, name)
     except NoSectionError:
         raise NoSectionError(f"'{name}' is not a valid configuration in {init_file_path}")
 
 
+def read_config(init_file_path: Union[str, Path]) -> dict:
+    """
+    Read all the sections of a logme.ini file in one pass
+
+    :param init_file_path: path of the logme.ini file
+
+    :return: {section name: configuration dict}
+    """
+    return get_sections(init_file_path)
+
+
 def get_ini_file_path(caller_file_path: Union[str, Path]) -> Path:
     """
     Get the logme.ini config file path
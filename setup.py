@@ -31,7 +31,7 @@ setup(
     url='https://github.com/BNMetrics/logme',
     author_email='luna@bnmetrics.com',
     keywords=['logging', 'cli'],
-    python_requires='>=3.6',
+    python_requires='>=3.7',
     entry_points={'console_scripts': ['logme=logme:cli']},
     license='Apache 2.0',
 )
@@ -0,0 +1 @@
+"""Dummy package for bulk logger registration"""
@@ -0,0 +1,2 @@
+def dummy_model():
+    pass
@@ -0,0 +1,2 @@
+def dummy_view():
+    pass
@@ -0,0 +1,131 @@
+import pytest
+
+import gzip
+
+from datetime import datetime
+
+from logme.index import TimeIndexWriter
+from logme.reader import LogParser, read_lines, read_entries
+from logme.analysis import (LogSummary, get_message_template, summarize_entries, split_chunks, summarize_chunk,
+                            analyze_files)
+
+
+FMT = '{asctime} - {name} - {levelname} - {message}'
+
+
+def make_lines(count):
+    lines = []
+    for i in range(count):
+        level = 'ERROR' if i % 5 == 0 else 'INFO'
+        lines.append(f"2024-01-01 12:{i // 60:02d}:{i % 60:02d},000 - myapp.worker{i % 3} - {level} - "
+                     f"job {i} done in 0.{i:03d}s")
+        if level == 'ERROR':
+            lines += ['Traceback (most recent call last):', f"ValueError: bad input {i}"]
+
+    return lines
+
+
+@pytest.fixture
+def parser():
+    return LogParser.from_formatter(FMT)
+
+
+@pytest.fixture
+def log_file(tmpdir):
+    file_path = tmpdir.join('app.log')
+    file_path.write('\n'.join(make_lines(200)) + '\n')
+
+    return file_path
+
+
+@pytest.mark.parametrize('message, expected',
+                         [
+                             pytest.param("user 'bob' logged in after 3 attempts",
+                                          'user <STR> logged in after <N> attempts', id='quoted string and number'),
+                             pytest.param('fetched 12 rows in 0.840s', 'fetched <N> rows in <N>s', id='decimal'),
+                             pytest.param('request 3f2a1b4c-1111-2222-3333-444455556666 at 0xdeadBEEF',
+                                          'request <UUID> at <HEX>', id='uuid and hex'),
+                             pytest.param('worker2 said "hi" on v1.2\nTraceback', 'worker2 said <STR> on v1.2',
+                                          id='first line, words kept'),
+                         ])
+def test_get_message_template(message, expected):
+    assert get_message_template(message) == expected
+
+
+def test_summary_merge(log_file, parser):
+    entries = list(read_entries([log_file], parser))
+
+    summary = summarize_entries(entries[:50], bucket=60).merge(summarize_entries(entries[50:], bucket=60))
+    expected = summarize_entries(entries, bucket=60)
+
+    assert summary.total == expected.total == 200
+    assert summary.levels == expected.levels == {'INFO': 160, 'ERROR': 40}
+    assert summary.loggers == expected.loggers
+    assert summary.templates == expected.templates == {'job <N> done in <N>s': 200}
+    assert summary.timeline == expected.timeline
+    assert sorted(summary.timeline.values()) == [20, 60, 60, 60]
+
+
+def test_split_chunks(log_file, parser):
+    chunks = split_chunks(log_file, parser, chunk_bytes=1000)
+
+    assert len(chunks) > 5
+    assert chunks[0][0] == 0 and chunks[-1][1] == log_file.size()
+    assert all(end == next_start for (_, end), (next_start, _) in zip(chunks, chunks[1:]))
+
+    # Each chunk starts with a record, the continuation lines are never split from it
+    for start, end in chunks:
+        first_line = next(read_lines(log_file, start=start, end=end))[1]
+        assert parser.parse_line(first_line) is not None
+
+    total = sum(summarize_chunk(log_file, parser, start=start, end=end).total for start, end in chunks)
+    assert total == 200
+
+
+def test_split_chunks_compressed(tmpdir, parser):
+    file_path = tmpdir.join('app.log.1.gz')
+    with gzip.open(file_path, 'wt') as file:
+        file.write('\n'.join(make_lines(200)) + '\n')
+
+    assert split_chunks(file_path, parser, chunk_bytes=100) == [(0, None)]
+
+
+def test_analyze_files_processes(tmpdir, log_file, parser):
+    segment = tmpdir.join('app.log.1.gz')
+    with gzip.open(segment, 'wt') as file:
+        file.write('\n'.join(make_lines(20)) + '\n')
+
+    files = [(segment, parser), (log_file, parser)]
+
+    single = analyze_files(files, processes=1, chunk_bytes=1000, level='ERROR')
+    parallel = analyze_files(files, processes=2, chunk_bytes=1000, level='ERROR')
+
+    assert single.total == parallel.total == 44
+    assert single.levels == parallel.levels == {'ERROR': 44}
+    assert single.loggers == parallel.loggers
+    assert single.templates == parallel.templates
+
+
+def test_analyze_files_index(log_file, parser):
+    entries = list(read_entries([log_file], parser))
+
+    writer = TimeIndexWriter(log_file, every_records=10)
+    writer.open(0)
+    for entry, next_entry in zip(entries, entries[1:]):
+        writer.add(entry.timestamp, next_entry.offset)
+    writer.close()
+
+    since = datetime(2024, 1, 1, 12, 1, 0).timestamp()
+    until = datetime(2024, 1, 1, 12, 2, 0).timestamp()
+
+    summary = analyze_files([(log_file, parser)], processes=1, chunk_bytes=1000, since=since, until=until)
+
+    assert summary.total == 60
+    assert summary.levels == {'INFO': 48, 'ERROR': 12}
+
+
+def test_analyze_files_empty():
+    summary = analyze_files([])
+
+    assert isinstance(summary, LogSummary)
+    assert summary.total == 0
@@ -0,0 +1,238 @@
+import click
+import pytest
+
+import logging
+from pathlib import Path
+from unittest import mock
+
+from logme.exceptions import LogmeError
+from logme.cli._bench_utils import (parse_level_mix, get_bench_configs, prepare_config,
+                                    percentile, bench_config, format_report,
+                                    measure_import_time, format_import_time,
+                                    measure_parse_throughput, format_parse_throughput,
+                                    measure_logger_memory, format_logger_memory,
+                                    measure_analysis, format_analysis)
+from logme.reader import LogParser
+
+
+LOGME_INI = Path(__file__).parent / 'logme.ini'
+
+
+@pytest.mark.parametrize('level_mix, expected',
+                         [
+                             pytest.param('DEBUG=2,ERROR=1', [10, 10, 40], id='with weights'),
+                             pytest.param('info', [20], id='lower case level without weight'),
+                         ])
+def test_parse_level_mix(level_mix, expected):
+    assert parse_level_mix(level_mix) == expected
+
+
+@pytest.mark.parametrize('level_mix',
+                         [
+                             pytest.param('BLAH=1', id='invalid level'),
+                             pytest.param('DEBUG=a', id='invalid weight'),
+                             pytest.param('DEBUG=0', id='no positive weight'),
+                         ])
+def test_parse_level_mix_raise(level_mix):
+    with pytest.raises(LogmeError):
+        parse_level_mix(level_mix)
+
+
+def test_get_bench_configs():
+    configs = get_bench_configs(LOGME_INI)
+
+    assert 'colors' not in configs
+    assert 'logme' in configs
+
+    assert list(get_bench_configs(LOGME_INI, sections=['logme'])) == ['logme']
+
+    with pytest.raises(LogmeError):
+        get_bench_configs(LOGME_INI, sections=['colors'])
+
+
+def test_prepare_config(tmpdir):
+    config = {'level': 'DEBUG', 'file': {'type': 'FileHandler', 'filename': '/var/log/foo.log'}}
+
+    prepared = prepare_config(config, tmpdir)
+
+    assert prepared['file']['filename'] == str(Path(tmpdir) / 'file.log')
+    assert config['file']['filename'] == '/var/log/foo.log'
+
+
+def test_percentile():
+    samples = list(range(101))
+
+    assert percentile(samples, 0.5) == 50
+    assert percentile(samples, 0.99) == 99
+    assert percentile([], 0.5) == 0.0
+
+
+def test_bench_config(tmpdir):
+    config = {
+        'level': 'DEBUG',
+        'formatter': '{name} - {message}',
+        'stream': {'type': 'StreamHandler', 'active': True, 'level': 'INFO'},
+        'file': {'type': 'FileHandler', 'active': True, 'filename': 'foo.log'},
+    }
+
+    results = bench_config('bench_test', config, None, tmpdir, records=100, threads=2, processes=2,
+                           levels=[logging.DEBUG, logging.INFO])
+
+    assert list(results) == ['single thread', '2 threads', '2 processes']
+
+    single = results['single thread']
+    assert single['records'] == 100
+    assert len(single['latencies']['file']) == 100
+    assert len(single['latencies']['stream']) == 50  # DEBUG records are below the handler level
+    assert single['bytes_written']['file'] == len('logme.bench.bench_test.single - benchmark message argument\n') * 100
+
+    assert results['2 threads']['records'] == 200
+    assert len(results['2 processes']['latencies']['file']) == 200
+
+    report = format_report('bench_test', results)
+    assert report.splitlines()[0] == '[bench_test]'
+    assert '2 processes: 200 records' in report
+
+
+def test_bench_config_thread_counts(tmpdir):
+    config = {
+        'level': 'DEBUG',
+        'formatter': '{name} - {message}',
+        'file': {'type': 'FileHandler', 'active': True, 'filename': 'foo.log', 'concurrent': True},
+    }
+
+    results = bench_config('bench_concurrent', config, None, tmpdir, records=50, threads=[8, 32], processes=1,
+                           levels=[logging.INFO])
+
+    assert list(results) == ['single thread', '8 threads', '32 threads']
+
+    line_length = len('logme.bench.bench_concurrent.threads32 - benchmark message argument\n')
+    assert results['32 threads']['records'] == 1600
+    assert results['32 threads']['bytes_written']['file'] == line_length * 1600
+
+
+def test_format_report_scaling():
+    results = {
+        'single thread': {'records': 100, 'elapsed': 1.0, 'bytes_written': {}, 'latencies': {}},
+        '4 threads': {'records': 400, 'elapsed': 2.0, 'bytes_written': {}, 'latencies': {}},
+    }
+
+    assert format_report('scaling', results).splitlines() == [
+        '[scaling]',
+        '  single thread: 100 records in 1.000s, 100 records/s, 0 bytes written',
+        '  4 threads: 400 records in 2.000s, 200 records/s (2.0x single thread), 0 bytes written',
+    ]
+
+
+def test_import_time_runtime_path():
+    """
+    Logging only needs the runtime modules, the cli and the optional dependencies are imported on demand
+    """
+    timings = measure_import_time('logme')
+
+    assert 'logme.providers' in timings
+    for module in ['click', 'bnmutils', 'logme.cli', 'colorama', 'http.client']:
+        assert module not in timings
+
+
+def test_import_cli_command():
+    """
+    Importing the cli subpackage does not shadow the command exposed by logme
+    """
+    import logme.cli._bench_utils
+    from logme import cli
+
+    assert isinstance(cli, click.Group)
+    assert logme.cli is cli
+
+
+def test_patch_cli_command():
+    import logme
+
+    command = logme.cli
+    with mock.patch('logme.cli', 'patched'):
+        from logme import cli
+        assert cli == 'patched'
+
+    assert logme.cli is command
+
+    logme.cli = 'assigned'
+    assert logme.cli == 'assigned'
+
+    del logme.cli
+    assert logme.cli is command
+
+
+def test_measure_import_time_raise():
+    with pytest.raises(LogmeError):
+        measure_import_time('logme_blah')
+
+
+def test_format_import_time():
+    timings = {'logme.utils': (100, 1500), 'logme.providers': (200, 3000), 'logme': (500, 5000)}
+
+    assert format_import_time('logme', timings, top=1).splitlines() == [
+        'import logme: 5.0ms',
+        '    logme.providers: 3.0ms',
+    ]
+
+
+def test_measure_parse_throughput():
+    throughput = measure_parse_throughput(LOGME_INI, rounds=5)
+
+    assert list(throughput) == ['logme.ini', 'bnmutils']
+    assert all(rate > 0 for rate in throughput.values())
+
+
+def test_format_parse_throughput():
+    assert format_parse_throughput({'logme.ini': 5000, 'bnmutils': 1000}).splitlines() == [
+        'parse logme.ini:',
+        '    logme.ini: 5,000 parses/s (5.0x bnmutils)',
+        '    bnmutils: 1,000 parses/s',
+    ]
+
+
+def test_measure_logger_memory(tmpdir):
+    config = {
+        'level': 'DEBUG',
+        'formatter': '{name} - {message}',
+        'file': {'type': 'FileHandler', 'active': True, 'filename': str(tmpdir.join('memory.log'))},
+        'null': {'type': 'NullHandler', 'active': True},
+    }
+
+    shared = measure_logger_memory(config, loggers=50)
+    per_logger = measure_logger_memory(config, loggers=50, shared_config=False)
+
+    assert shared['loggers'] == 50
+    assert 0 < shared['bytes'] < per_logger['bytes']
+    assert shared['bytes_per_logger'] == shared['bytes'] / 50
+
+    assert not [i for i in logging.Logger.manager.loggerDict if i.startswith('logme.bench.memory.logger')]
+
+
+def test_format_logger_memory():
+    results = {'shared config': {'loggers': 10000, 'bytes': 15 * 1024 ** 2, 'bytes_per_logger': 1572.864}}
+
+    assert format_logger_memory('memory', results).splitlines() == [
+        '[memory] memory',
+        '  shared config: 10000 loggers, 15.0MiB, 1,573 bytes per logger',
+    ]
+
+
+def test_measure_analysis(tmpdir):
+    log_path = tmpdir.join('app.log')
+    log_path.write(''.join(f"2024-01-01 12:00:{i:02d},000 - myapp - INFO - job {i}\n" for i in range(60)))
+
+    files = [(log_path, LogParser.from_formatter('{asctime} - {name} - {levelname} - {message}'))]
+    results = measure_analysis(files, [1, 2], chunk_bytes=500)
+
+    assert list(results) == [1, 2]
+    assert [records for _, records in results.values()] == [60, 60]
+
+
+def test_format_analysis():
+    assert format_analysis({1: (2.0, 100000), 4: (0.5, 100000)}).splitlines() == [
+        'analysis:',
+        '    single process: 100,000 records in 2.00s, 50,000 records/s',
+        '    4 processes: 100,000 records in 0.50s, 200,000 records/s (4.0x)',
+    ]
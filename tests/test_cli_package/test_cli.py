@@ -1,5 +1,7 @@
 import pytest
 
+import gzip
+import json
 import shutil
 from pathlib import Path
 from click.testing import CliRunner
@@ -209,3 +211,138 @@ class TestCli:
             result = self.runner.invoke(cli, ['upgrade'])
 
             assert result.output.strip() == f"{tmpdir_file} has been updated to {__version__}"
+
+    # ---------------------------------------------------------------------------
+    # 'logme bench' test
+    # ---------------------------------------------------------------------------
+    def test_bench_command(self, tmpdir):
+
+        with cd(tmpdir):
+            self.runner.invoke(cli, ['init', '-lp', str(tmpdir.join('logs/foo.log'))])
+            self.runner.invoke(cli, ['add', 'blah'])
+
+            result = self.runner.invoke(cli, ['bench', '-c', 'blah', '-n', '50', '-t', '2', '-P', '1'])
+
+            assert result.exit_code == 0
+            assert result.output.splitlines()[0] == '[blah]'
+            assert '2 threads: 100 records' in result.output
+            assert 'processes' not in result.output
+
+            # The actual log file is not written to
+            assert not tmpdir.join('logs/foo.log').exists()
+
+    def test_bench_command_no_file(self, tmpdir):
+
+        with cd(tmpdir):
+            with pytest.raises(FileNotFoundError):
+                result = self.runner.invoke(cli, ['bench'])
+                raise result.exception
+
+    # ---------------------------------------------------------------------------
+    # 'logme profile' test
+    # ---------------------------------------------------------------------------
+    def test_profile_command(self, tmpdir):
+        profile_path = tmpdir.join('profile.json')
+        content = {
+            'sample_rate': 0.5,
+            'sites': [{'logger': 'my_logger', 'location': 'app.py:10', 'samples': 2, 'estimated_calls': 4,
+                       'total': 0.00002, 'level_check': 0.000002, 'record': 0.000008, 'format': 0.000004,
+                       'emit': 0.000006}],
+        }
+
+        with open(profile_path, 'w') as file:
+            json.dump(content, file)
+
+        result = self.runner.invoke(cli, ['profile', str(profile_path)])
+
+        assert result.exit_code == 0
+        assert result.output.splitlines() == [
+            'sample rate: 0.5, call sites: 1',
+            'app.py:10 [my_logger]',
+            '    ~4 calls, 10.0us per call (level_check 1.0us, record 4.0us, format 2.0us, emit 3.0us), '
+            'total sampled 0.020ms',
+        ]
+
+    # ---------------------------------------------------------------------------
+    # 'logme tail' and 'logme grep' test
+    # ---------------------------------------------------------------------------
+    @staticmethod
+    def _write_logs(tmpdir):
+        log_path = tmpdir.join('logs/foo.log')
+        log_path.dirpath().ensure(dir=True)
+
+        with gzip.open(str(log_path) + '.1.gz', 'wt') as file:
+            file.write('2024-01-01 12:00:00,000 - myapp - INFO - started\n'
+                       '2024-01-01 12:00:01,000 - myapp.db - ERROR - query failed\n'
+                       'TimeoutError: timed out\n')
+
+        log_path.write('2024-01-01 12:00:02,000 - myapp.db - DEBUG - retrying\n'
+                       '2024-01-01 12:00:03,000 - myapp.http - ERROR - timed out\n')
+
+    def test_tail_command(self, tmpdir):
+
+        with cd(tmpdir):
+            self.runner.invoke(cli, ['init', '-lp', 'logs/foo.log'])
+            self._write_logs(tmpdir)
+
+            result = self.runner.invoke(cli, ['tail', '-H', 'file', '-n', '2', '-l', 'ERROR'])
+
+            assert result.exit_code == 0
+            assert result.output.splitlines() == [
+                '2024-01-01 12:00:01,000 - myapp.db - ERROR - query failed',
+                'TimeoutError: timed out',
+                '2024-01-01 12:00:03,000 - myapp.http - ERROR - timed out',
+            ]
+
+    def test_grep_command(self, tmpdir):
+
+        with cd(tmpdir):
+            self.runner.invoke(cli, ['init', '-lp', 'logs/foo.log'])
+            self._write_logs(tmpdir)
+
+            result = self.runner.invoke(cli, ['grep', 'timed out', '-H', 'file', '-L', 'myapp.db'])
+            assert result.exit_code == 0
+            assert result.output.splitlines() == [
+                '2024-01-01 12:00:01,000 - myapp.db - ERROR - query failed',
+                'TimeoutError: timed out',
+            ]
+
+            result = self.runner.invoke(cli, ['grep', '-H', 'file', '--count', '--since', '2024-01-01 12:00:01'])
+            assert result.exit_code == 0
+            assert result.output.splitlines() == ['total: 3', 'levels:', '    ERROR: 2', '    DEBUG: 1',
+                                                  'loggers:', '    myapp.db: 2', '    myapp.http: 1']
+
+    def test_stats_command(self, tmpdir):
+
+        with cd(tmpdir):
+            self.runner.invoke(cli, ['init', '-lp', 'logs/foo.log'])
+            self._write_logs(tmpdir)
+
+            result = self.runner.invoke(cli, ['stats', '-H', 'file', '-P', '1', '-l', 'ERROR'])
+            assert result.exit_code == 0
+            assert result.output.splitlines() == ['total: 2', 'levels:', '    ERROR: 2',
+                                                  'loggers:', '    myapp.db: 1', '    myapp.http: 1',
+                                                  'templates:', '    1: query failed', '    1: timed out']
+
+    def test_stats_command_bench(self, tmpdir):
+
+        with cd(tmpdir):
+            self.runner.invoke(cli, ['init', '-lp', 'logs/foo.log'])
+            self._write_logs(tmpdir)
+
+            result = self.runner.invoke(cli, ['stats', '-H', 'file', '--bench', '2'])
+            assert result.exit_code == 0
+
+            lines = result.output.splitlines()
+            assert lines[0] == 'analysis:'
+            assert lines[1].startswith('    single process: 4 records in ')
+            assert lines[2].startswith('    2 processes: 4 records in ')
+
+    def test_grep_command_invalid_level(self, tmpdir):
+
+        with cd(tmpdir):
+            self.runner.invoke(cli, ['init', '-lp', 'logs/foo.log'])
+
+            with pytest.raises(LogmeError):
+                result = self.runner.invoke(cli, ['grep', '-l', 'LOUD'])
+                raise result.exception
@@ -0,0 +1,126 @@
+import pytest
+
+import time
+
+from collections import Counter
+
+from logme.exceptions import LogmeError
+from logme.analysis import LogSummary
+from logme.cli._reader_utils import get_log_sources, format_source, format_counts, format_summary
+
+
+CONF = """
+[colors]
+ERROR = RED
+
+[logme]
+level = DEBUG
+formatter = {asctime} - {name} - {levelname} - {message}
+file =
+	type: FileHandler
+	filename: logs/app.log
+errors =
+	type: FileHandler
+	level: ERROR
+	formatter: {asctime}::{levelname}::{message}
+	filename: logs/errors.log
+archive =
+	type: FileHandler
+	active: False
+	filename: logs/archive.log
+stream =
+	type: StreamHandler
+
+[other]
+level = INFO
+formatter = {name}: {message}
+file =
+	type: FileHandler
+	filename: logs/app.log
+"""
+
+
+@pytest.fixture
+def conf_path(tmpdir):
+    conf_path = tmpdir.join('logme.ini')
+    conf_path.write(CONF)
+
+    return conf_path
+
+
+def test_get_log_sources(conf_path, tmpdir):
+    sources = get_log_sources(conf_path)
+
+    # logs/app.log is listed once, with the formatter of the first config
+    assert [(i.config_name, i.handler_name, i.file_path) for i in sources] == [
+        ('logme', 'file', tmpdir / 'logs/app.log'),
+        ('logme', 'errors', tmpdir / 'logs/errors.log'),
+    ]
+    assert sources[0].parser.fmt == '{asctime} - {name} - {levelname} - {message}'
+    assert sources[1].parser.fmt == '{asctime}::{levelname}::{message}'
+
+
+def test_get_log_sources_selected(conf_path):
+    sources = get_log_sources(conf_path, configs=['other'])
+    assert [(i.config_name, i.parser.fmt) for i in sources] == [('other', '{name}: {message}')]
+
+    # Inactive handlers can be selected by name
+    sources = get_log_sources(conf_path, handlers=['archive'])
+    assert [i.handler_name for i in sources] == ['archive']
+
+
+@pytest.mark.parametrize('kwargs, message',
+                         [
+                             pytest.param({'configs': ['colors']}, "'colors' is not a logger config", id='colors'),
+                             pytest.param({'handlers': ['stream']}, 'No file handler found', id='no file handler'),
+                         ])
+def test_get_log_sources_raise(conf_path, kwargs, message):
+    with pytest.raises(LogmeError) as e_info:
+        get_log_sources(conf_path, **kwargs)
+
+    assert message in e_info.value.args[0]
+
+
+def test_format_source(conf_path, tmpdir):
+    source = get_log_sources(conf_path)[0]
+
+    assert format_source(source) == f"==> [logme] file: {tmpdir / 'logs/app.log'} <=="
+
+
+def test_format_counts():
+    counts = {'total': 6, 'levels': Counter({'INFO': 3, 'ERROR': 2, 'DEBUG': 1}),
+              'loggers': Counter({'myapp': 1, 'myapp.db': 4, 'other': 1})}
+
+    assert format_counts(counts, top=2).splitlines() == [
+        'total: 6',
+        'levels:',
+        '    ERROR: 2',
+        '    INFO: 3',
+        '    DEBUG: 1',
+        'loggers:',
+        '    myapp.db: 4',
+        '    myapp: 1',
+    ]
+
+
+def test_format_summary():
+    summary = LogSummary(bucket=60)
+    summary.total = 3
+    summary.levels.update({'ERROR': 1, 'INFO': 2})
+    summary.loggers.update({'myapp': 3})
+    summary.templates.update({'job <N> done': 2, 'job <N> failed': 1})
+    summary.timeline.update({120: 1, 60: 2})
+
+    assert format_summary(summary, top=1).splitlines() == [
+        'total: 3',
+        'levels:',
+        '    ERROR: 1',
+        '    INFO: 2',
+        'loggers:',
+        '    myapp: 3',
+        'templates:',
+        '    2: job <N> done',
+        'timeline (60s):',
+        f"    {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(60))}: 2",
+        f"    {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(120))}: 1",
+    ]
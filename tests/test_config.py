@@ -0,0 +1,165 @@
+import pytest
+
+import logging
+
+from logme.providers import LogmeLogger, ModuleLogger
+from logme.formatters import LogmeFormatter, JsonFormatter
+from logme.handlers import RingBufferHandler
+from logme.utils import get_logger_config, get_color_config
+from logme.exceptions import InvalidOption, InvalidLoggerConfig, InvalidColorConfig
+from logme.config import (LoggerConfig, FormatterConfig, ColorConfig,
+                          load_logger_config, load_color_config)
+
+
+def test_logger_config():
+    config = LoggerConfig.from_dict(get_logger_config(__file__, 'ver13_config'))
+
+    assert config.level == logging.DEBUG
+    assert config.formatter.args == {'fmt': '{asctime} - {name} - {levelname} - {message}',
+                                     'datefmt': '%Y/%m/%d', 'style': '{'}
+    assert list(config.handlers) == ['stream', 'file', 'null']
+    assert [i.name for i in config.active_handlers] == ['stream', 'file']
+
+    file_config = config.handlers['file']
+    assert file_config.handler_class is logging.FileHandler
+    assert file_config.level == logging.DEBUG
+    assert file_config.formatter is None
+    assert file_config.args == {'filename': 'mylogpath/foo.log'}
+    assert file_config.deprecated is False
+
+    # Inactive handler classes are not resolved
+    assert config.handlers['null'].handler_class is None
+    assert config.handlers['null'].get_handler_class() is logging.NullHandler
+
+
+def test_logger_config_deprecated():
+    handler_config = LoggerConfig.from_dict(get_logger_config(__file__)).handlers['StreamHandler']
+
+    assert handler_config.deprecated is True
+    assert handler_config.handler_type == 'StreamHandler'
+
+
+def test_logger_config_source_copied():
+    config_dict = get_logger_config(__file__, 'ver13_config')
+    config = LoggerConfig.from_dict(config_dict)
+
+    config_dict['stream']['level'] = 'ERROR'
+
+    assert config.source['stream']['level'] == 'DEBUG'
+    assert LoggerConfig.from_dict(config) is config
+
+
+@pytest.mark.parametrize('config, exception',
+                         [
+                             pytest.param({'formatter': '{message}'}, InvalidLoggerConfig, id='missing level'),
+                             pytest.param({'level': 'DEBUG'}, InvalidLoggerConfig, id='missing formatter'),
+                             pytest.param({'level': 'DEBUG', 'formatter': '{message}', 'stream': 'StreamHandler'},
+                                          InvalidLoggerConfig, id='handler config not a dict'),
+                             pytest.param({'level': 'BLAH', 'formatter': '{message}'}, InvalidOption,
+                                          id='invalid level'),
+                             pytest.param({'level': 'DEBUG', 'formatter': '{message}',
+                                           'stream': {'type': 'BlahHandler', 'active': True}}, InvalidOption,
+                                          id='invalid active handler type'),
+                         ])
+def test_logger_config_raise(config, exception):
+    with pytest.raises(exception):
+        LoggerConfig.from_dict(config)
+
+
+def test_config_read_only():
+    config = LoggerConfig.from_dict(get_logger_config(__file__, 'ver13_config'))
+
+    with pytest.raises(AttributeError):
+        config.level = logging.INFO
+
+    with pytest.raises(AttributeError):
+        config.handlers['stream'].level = logging.INFO
+
+    with pytest.raises(AttributeError):
+        config.__dict__
+
+
+@pytest.mark.parametrize('formatter, formatter_class, args',
+                         [
+                             pytest.param('{message}', None, {'fmt': '{message}', 'style': '{'}, id='string'),
+                             pytest.param({'type': 'JsonFormatter', 'fields': ['message']}, JsonFormatter,
+                                          {'fields': ['message']}, id='dict with type'),
+                         ])
+def test_formatter_config(formatter, formatter_class, args):
+    formatter_config = FormatterConfig.from_config(formatter)
+
+    assert formatter_config.formatter_class is formatter_class
+    assert formatter_config.args == args
+    assert isinstance(formatter_config.build(LogmeFormatter), formatter_class or LogmeFormatter)
+
+
+def test_color_config():
+    color_config = ColorConfig.from_dict(get_color_config(__file__))
+
+    assert color_config.codes['ERROR'] == ('\033[0;35m', '\033[0;0m')
+    assert color_config.get('ERROR') == 'PURPLE'
+    assert ColorConfig.from_dict({'INFO': None}).codes == {'INFO': None}
+
+    with pytest.raises(InvalidColorConfig):
+        ColorConfig.from_dict({'INFO': 'blah'})
+
+
+def test_load_config_shared():
+    assert load_logger_config(__file__, 'ver13_config') is load_logger_config(__file__, 'ver13_config')
+    assert load_color_config(__file__) is load_color_config(__file__)
+
+    with pytest.raises(InvalidLoggerConfig):
+        load_logger_config(__file__, 'blah')
+
+    with pytest.raises(InvalidLoggerConfig):
+        load_logger_config(__file__, 'colors')
+
+
+def test_loggers_share_config(tmp_path, monkeypatch):
+    # The file handler of ver13_config writes to a relative path
+    monkeypatch.chdir(tmp_path)
+
+    logger_1 = ModuleLogger(frame=1, name='shared_config_1', config='ver13_config')
+    logger_2 = ModuleLogger(frame=1, name='shared_config_2', config='ver13_config')
+
+    assert logger_1.logger_config is logger_2.logger_config
+    assert logger_1.color_config is logger_2.color_config
+    assert logger_1.config == get_logger_config(__file__, 'ver13_config')
+    assert logger_1.handler_names == ['stream', 'file', 'null']
+
+    for name in ['shared_config_1', 'shared_config_2']:
+        for handler in logging.getLogger(name).handlers:
+            handler.close()
+        del logging.Logger.manager.loggerDict[name]
+
+
+def test_handler_notset_level(tmpdir):
+    """
+    NOTSET set on a handler is not overridden by the master level
+    """
+    config = {
+        'level': 'INFO',
+        'formatter': '{message}',
+        'null': {'type': 'NullHandler', 'active': True, 'level': 'NOTSET'},
+    }
+    logger = LogmeLogger('notset_handler_logger', config)
+
+    assert logger.handlers['null'].level == logging.NOTSET
+
+    del logging.Logger.manager.loggerDict['notset_handler_logger']
+
+
+def test_target_handler_config(tmpdir):
+    config = {
+        'level': 'DEBUG',
+        'formatter': '{message}',
+        'buffer': {'type': 'RingBufferHandler', 'active': True, 'capacity': 10, 'target': 'file'},
+        'file': {'type': 'FileHandler', 'active': False, 'filename': str(tmpdir.join('target.log'))},
+    }
+    logger = LogmeLogger('config_target_logger', config)
+
+    assert isinstance(logger.handlers['buffer'], RingBufferHandler)
+    assert isinstance(logger.handlers['buffer'].target, logging.FileHandler)
+
+    logger.handlers['buffer'].close()
+    del logging.Logger.manager.loggerDict['config_target_logger']
@@ -0,0 +1,179 @@
+import pytest
+
+import json
+import pickle
+import asyncio
+import logging
+import logging.handlers
+import threading
+
+from logme import context
+from logme.providers import LogmeLogger
+from logme.formatters import JsonFormatter
+from logme.utils import get_logger_config
+from logme.exceptions import InvalidOption
+
+
+@pytest.fixture(autouse=True)
+def clear_context():
+    context.clear()
+
+    yield
+
+    context.clear()
+
+
+@pytest.fixture
+def context_logger():
+    logger = LogmeLogger('context_logger', get_logger_config(__file__))
+
+    yield logger
+
+    del logging.Logger.manager.loggerDict['context_logger']
+
+
+def test_bind_unbind():
+    context.bind(request_id='abc', tenant_id=1)
+    assert dict(context.get_context()) == {'request_id': 'abc', 'tenant_id': 1}
+
+    context.unbind('tenant_id')
+    assert dict(context.get_context()) == {'request_id': 'abc'}
+
+    context.clear()
+    assert dict(context.get_context()) == {}
+
+
+@pytest.mark.parametrize('fields',
+                         [
+                             pytest.param({'args': 1}, id='args'),
+                             pytest.param({'msg': 'replaced', 'request_id': 'abc'}, id='msg'),
+                             pytest.param({'message': 'replaced'}, id='message'),
+                             pytest.param({'context': {}}, id='context'),
+                         ])
+def test_bind_reserved_fields(fields):
+    with pytest.raises(InvalidOption):
+        context.bind(**fields)
+
+    with pytest.raises(InvalidOption):
+        with context.scope(**fields):
+            pass
+
+    assert dict(context.get_context()) == {}
+
+
+def test_bound_mapping_not_mutated():
+    context.bind(request_id='abc')
+    fields = context.get_context()
+
+    context.bind(request_id='def')
+
+    assert fields['request_id'] == 'abc'
+    assert context.get_context()['request_id'] == 'def'
+
+    with pytest.raises(TypeError):
+        fields['request_id'] = 'ghi'
+
+
+def test_scope():
+    context.bind(tenant_id=1)
+
+    with context.scope(request_id='abc'):
+        assert dict(context.get_context()) == {'tenant_id': 1, 'request_id': 'abc'}
+
+    assert dict(context.get_context()) == {'tenant_id': 1}
+
+
+def test_thread_isolation():
+    context.bind(request_id='main')
+    results = {}
+
+    def worker():
+        results['before'] = dict(context.get_context())
+        context.bind(request_id='thread')
+        results['after'] = dict(context.get_context())
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    assert results == {'before': {}, 'after': {'request_id': 'thread'}}
+    assert dict(context.get_context()) == {'request_id': 'main'}
+
+
+def test_asyncio_task_isolation():
+    async def handle(request_id):
+        context.bind(request_id=request_id)
+        await asyncio.sleep(0)
+
+        return context.get_context()['request_id']
+
+    async def main():
+        return await asyncio.gather(*[handle(i) for i in range(10)])
+
+    assert asyncio.run(main()) == list(range(10))
+
+
+def test_logger_record_enrichment(context_logger, caplog):
+    with context.scope(request_id='abc'):
+        context_logger.info('with context')
+
+    context_logger.info('without context')
+
+    with_context, without_context = caplog.records
+
+    assert with_context.request_id == 'abc'
+    assert dict(with_context.context) == {'request_id': 'abc'}
+
+    assert not hasattr(without_context, 'request_id')
+    assert dict(without_context.context) == {}
+
+
+def test_logger_record_pickle(context_logger, caplog):
+    with context.scope(request_id='abc'):
+        context_logger.info('with context')
+
+    context_logger.info('without context')
+
+    # Same as SocketHandler.makePickle(), used by the pickling handlers
+    for record in caplog.records:
+        data = pickle.loads(logging.handlers.SocketHandler('localhost', None).makePickle(record)[4:])
+        assert data['context'] == record.context
+
+    assert caplog.records[0].context == {'request_id': 'abc'}
+
+
+def test_logger_brace_formatter(context_logger):
+    context_logger.reconfig_handler('StreamHandler', formatter='{request_id} - {message}')
+    formatter = context_logger.handlers['StreamHandler'].formatter
+
+    records = []
+    context_logger.logger.addFilter(lambda record: records.append(record) or True)
+
+    with context.scope(request_id='abc'):
+        context_logger.info('my logging message')
+
+    assert formatter.format(records[0]) == 'abc - my logging message'
+
+
+def test_json_formatter():
+    formatter = JsonFormatter(fields=['name', 'levelname', 'message'])
+
+    record = logging.LogRecord('logger_name', logging.INFO, 'pathname', 10, 'hello %s', ('world',), None)
+    context.bind(request_id='abc')
+    context.context_filter.filter(record)
+
+    assert json.loads(formatter.format(record)) == {'name': 'logger_name', 'levelname': 'INFO',
+                                                    'message': 'hello world', 'request_id': 'abc'}
+
+
+def test_json_formatter_from_config(context_logger):
+    context_logger.reconfig_handler('StreamHandler', formatter={'type': 'JsonFormatter', 'fields': 'name, message'})
+    formatter = context_logger.handlers['StreamHandler'].formatter
+
+    assert type(formatter) == JsonFormatter
+    assert formatter.fields == ['name', 'message']
+
+
+def test_invalid_formatter_type(context_logger):
+    with pytest.raises(InvalidOption):
+        context_logger.reconfig_handler('StreamHandler', formatter={'type': 'Color', 'fmt': '{message}'})
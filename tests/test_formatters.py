@@ -0,0 +1,335 @@
+import pytest
+
+import io
+import sys
+import time
+import pickle
+import logging
+import traceback
+import logging.handlers
+
+from logme.formatters import (LogmeFormatter, JsonFormatter, MonotonicClock, TracebackCache, clock_filter,
+                              _render_caches)
+from logme.color_provider import ColorFormatter
+from logme.providers import LogmeLogger
+from logme.exceptions import InvalidOption
+
+
+def make_record(created: float=None, msg: str='my logging message') -> logging.LogRecord:
+    record = logging.LogRecord('logger_name', logging.INFO, 'pathname', 10, msg, [], None)
+
+    if created is not None:
+        record.created = created
+        record.msecs = (created - int(created)) * 1000
+
+    return record
+
+
+def make_exc_record(exc_info) -> logging.LogRecord:
+    return logging.LogRecord('logger_name', logging.ERROR, 'pathname', 10, 'retry failed', [], exc_info)
+
+
+@pytest.mark.parametrize('datefmt',
+                         [
+                             pytest.param(None, id='default date format'),
+                             pytest.param('%Y/%m/%d %H:%M:%S', id='custom date format'),
+                         ])
+def test_cached_time_parity(datefmt):
+    plain = LogmeFormatter('{asctime} - {message}', datefmt=datefmt, style='{')
+    cached = LogmeFormatter('{asctime} - {message}', datefmt=datefmt, style='{', cache_time=True)
+
+    base = time.time()
+    for offset in [0, 0.123, 0.5, 0.999, 1.001, 1.5, 62.25]:
+        record = make_record(base + offset)
+
+        assert cached.format(record) == plain.format(make_record(base + offset))
+
+
+def test_cached_time_reuses_prefix(monkeypatch):
+    formatter = LogmeFormatter('{asctime}', style='{', cache_time=True)
+
+    calls = []
+    original = time.strftime
+
+    def counting_strftime(*args):
+        calls.append(args)
+        return original(*args)
+
+    monkeypatch.setattr(time, 'strftime', counting_strftime)
+
+    base = int(time.time())
+    for msecs in range(0, 1000, 100):
+        formatter.format(make_record(base + msecs / 1000))
+
+    assert len(calls) == 1
+
+    formatter.format(make_record(base + 1.5))
+    assert len(calls) == 2
+
+
+def test_monotonic_clock():
+    clock = MonotonicClock()
+
+    stamps = [clock.time() for _ in range(100)]
+
+    assert stamps == sorted(stamps)
+    assert abs(stamps[0] - time.time()) < 1
+
+
+def test_monotonic_clock_formatter():
+    formatter = LogmeFormatter('{created}', style='{', clock='monotonic')
+    record = make_record(created=0)
+
+    formatter.format(record)
+    stamped = record.created
+
+    assert abs(stamped - time.time()) < 1
+
+    # The record is only stamped once
+    formatter.format(record)
+    assert record.created == stamped
+
+
+def test_monotonic_clock_stamped_at_creation():
+    config = {
+        'level': 'DEBUG',
+        'formatter': {'fmt': '{created}', 'style': '{', 'clock': 'monotonic'},
+        'null': {'type': 'NullHandler', 'active': True},
+    }
+    logger = LogmeLogger('monotonic_clock_logger', config)
+    assert clock_filter in logger.logger.filters
+
+    buffer = logging.handlers.BufferingHandler(capacity=10)
+    logger.logger.addHandler(buffer)
+
+    logged_at = time.time()
+    logger.info('buffered')
+    time.sleep(0.2)
+
+    # Formatted later, e.g. by a RingBufferHandler flush, the record keeps its creation time
+    record = buffer.buffer[0]
+    LogmeFormatter('{created}', style='{', clock='monotonic').format(record)
+
+    assert record._logme_clock_stamped
+    assert abs(record.created - logged_at) < 0.1
+
+    logger.master_formatter = '{message}'
+    assert clock_filter not in logger.logger.filters
+
+    logger.logger.removeHandler(buffer)
+    del logging.Logger.manager.loggerDict['monotonic_clock_logger']
+
+
+def test_invalid_clock():
+    with pytest.raises(InvalidOption):
+        LogmeFormatter('{message}', style='{', clock='atomic')
+
+
+def test_render_cache(monkeypatch):
+    calls = []
+    original = logging.Formatter.format
+
+    def counting_format(self, record):
+        calls.append(self)
+        return original(self, record)
+
+    monkeypatch.setattr(logging.Formatter, 'format', counting_format)
+
+    plain = LogmeFormatter('{name} - {message}', style='{')
+    color = ColorFormatter('{name} - {message}', style='{', color_config={'INFO': 'green'})
+    other = LogmeFormatter('{message}', style='{')
+
+    record = make_record()
+
+    assert plain.format(record) == 'logger_name - my logging message'
+    assert color.format(record) == '\033[0;32mlogger_name - my logging message\033[0;0m'
+    assert other.format(record) == 'my logging message'
+
+    assert calls == [plain, other]
+    assert plain.render_key == color.render_key
+    assert JsonFormatter('{message}', style='{').render_key != other.render_key
+
+
+def test_render_cache_disabled():
+    formatter = LogmeFormatter('{message}', style='{', render_cache=False)
+    record = make_record()
+
+    formatter.format(record)
+    record.msg = 'changed message'
+
+    assert formatter.format(record) == 'changed message'
+    assert record not in _render_caches
+
+
+def test_render_cache_not_pickled():
+    formatter = LogmeFormatter('{name} - {message}', style='{')
+    record = make_record()
+
+    assert formatter.format(record) == 'logger_name - my logging message'
+    assert record in _render_caches
+
+    # Pickling handlers, e.g. SocketHandler after a StreamHandler, do not ship the cache
+    payload = logging.handlers.SocketHandler('localhost', None).makePickle(record)
+    assert b'logme' not in payload
+    assert pickle.loads(payload[4:]).keys() == record.__dict__.keys() - {'message'}
+
+    # The cache goes away with the record
+    cached = len(_render_caches)
+    del record
+    assert len(_render_caches) == cached - 1
+
+
+def test_render_cache_logger_handlers(tmpdir, monkeypatch):
+    config = {
+        'level': 'DEBUG',
+        'formatter': '{name} - {message}',
+        'stream': {'type': 'StreamHandler', 'active': True},
+        'file': {'type': 'FileHandler', 'active': True, 'filename': str(tmpdir.join('render_cache.log'))},
+    }
+    logger = LogmeLogger('render_cache_logger', config)
+
+    calls = []
+    original = LogmeFormatter._render
+
+    def counting_render(self, record):
+        calls.append(self)
+        return original(self, record)
+
+    monkeypatch.setattr(LogmeFormatter, '_render', counting_render)
+
+    logger.info('rendered once')
+
+    for handler in logger.handlers.values():
+        handler.close()
+
+    assert len(calls) == 1
+    assert tmpdir.join('render_cache.log').read() == 'render_cache_logger - rendered once\n'
+
+    del logging.Logger.manager.loggerDict['render_cache_logger']
+
+
+def raise_error(attempt: int, chained: str=None):
+    try:
+        try:
+            {}['missing']
+        except KeyError as exc:
+            if chained == 'cause':
+                raise ValueError(f"bad input {attempt}") from exc
+            if chained == 'suppressed':
+                raise ValueError(f"bad input {attempt}") from None
+
+            raise ValueError(f"bad input {attempt}")
+    except ValueError:
+        return sys.exc_info()
+
+
+@pytest.mark.parametrize('exc_info',
+                         [
+                             pytest.param(raise_error(1), id='context'),
+                             pytest.param(raise_error(1, chained='cause'), id='cause'),
+                             pytest.param(raise_error(1, chained='suppressed'), id='suppressed context'),
+                             pytest.param((ValueError, ValueError('not raised'), None), id='no traceback'),
+                         ])
+def test_exc_cache_parity(exc_info):
+    formatter = LogmeFormatter('{message}', style='{', exc_cache=True)
+
+    assert formatter.exc_cache == LogmeFormatter.default_exc_cache_size
+    assert formatter.formatException(exc_info) == logging.Formatter().formatException(exc_info)
+    assert formatter.formatException(exc_info) == logging.Formatter().formatException(exc_info)
+
+
+def test_exc_cache_reuses_stacks(monkeypatch):
+    formatter = LogmeFormatter('{message}', style='{', exc_cache=8)
+
+    calls = []
+    original = traceback.extract_tb
+
+    def counting_extract_tb(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(traceback, 'extract_tb', counting_extract_tb)
+
+    outputs = [formatter.formatException(raise_error(attempt)) for attempt in range(5)]
+
+    # Once for each exception in the chain
+    assert len(calls) == 2
+    assert outputs[3].splitlines()[-1] == 'ValueError: bad input 3'
+
+    formatter.formatException(raise_error(1, chained='cause'))
+    assert len(calls) == 4
+
+
+def test_traceback_cache_bounded():
+    cache = TracebackCache(maxsize=2)
+
+    assert [cache.add(key, ()) for key in ['a', 'b', 'c']] == [1, 2, 3]
+    assert len(cache) == 2
+    assert cache.get('a') is None
+
+    cache.get('b')
+    cache.add('d', ())
+
+    # 'c' is the least recently used
+    assert cache.get('c') is None
+    assert cache.get('b') == (2, ())
+
+
+def test_exc_collapse():
+    formatter = LogmeFormatter('{message}', style='{', exc_cache=8, exc_collapse=True)
+
+    first = formatter.format(make_exc_record(raise_error(1)))
+    assert first.splitlines()[0] == 'retry failed'
+    assert first.splitlines()[-1] == 'ValueError: bad input 1 (traceback #1)'
+
+    assert formatter.format(make_exc_record(raise_error(2))) == ('retry failed\n'
+                                                                 'ValueError: bad input 2 (same traceback as #1)')
+
+    other = formatter.format(make_exc_record(raise_error(3, chained='cause')))
+    assert other.splitlines()[-1] == 'ValueError: bad input 3 (traceback #2)'
+
+    assert formatter.render_key != LogmeFormatter('{message}', style='{', exc_cache=8, exc_collapse=True).render_key
+    assert LogmeFormatter('{message}', style='{', exc_cache=8).render_key == \
+        LogmeFormatter('{message}', style='{').render_key
+
+
+def test_exc_collapse_other_handlers():
+    parent = logging.getLogger('exc_collapse_logger')
+    logger = logging.getLogger('exc_collapse_logger.child')
+
+    streams = {}
+    for name, target, formatter in [
+        ('collapsed', logger, LogmeFormatter('{message}', style='{', exc_cache=8, exc_collapse=True)),
+        ('plain', logger, logging.Formatter('{message}', style='{')),
+        ('collapsed_after_plain', logger, LogmeFormatter('{message}', style='{', exc_cache=8, exc_collapse=True)),
+        ('parent', parent, logging.Formatter('{message}', style='{')),
+    ]:
+        streams[name] = io.StringIO()
+        handler = logging.StreamHandler(streams[name])
+        handler.setFormatter(formatter)
+        target.addHandler(handler)
+
+    try:
+        for _ in range(2):
+            try:
+                {}['missing']
+            except KeyError:
+                logger.exception('retry failed')
+    finally:
+        for target in [logger, parent]:
+            for handler in list(target.handlers):
+                target.removeHandler(handler)
+
+    for name in ['collapsed', 'collapsed_after_plain']:
+        assert streams[name].getvalue().splitlines()[-1] == "KeyError: 'missing' (same traceback as #1)"
+
+    # The handlers without exc_collapse get the full traceback
+    for name in ['plain', 'parent']:
+        output = streams[name].getvalue()
+        assert 'traceback #' not in output
+        assert output.count('Traceback (most recent call last):') == 2
+
+
+def test_exc_collapse_without_cache():
+    with pytest.raises(InvalidOption):
+        LogmeFormatter('{message}', style='{', exc_collapse=True)
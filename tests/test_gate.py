@@ -0,0 +1,105 @@
+import pytest
+
+import logging
+
+import logme
+from logme.gate import LevelGate
+from logme.registry import logger_registry
+from logme.providers import LogmeLogger
+from logme.utils import get_logger_config
+
+
+@pytest.fixture
+def gate_logger():
+    logger = LogmeLogger('gate_logger', get_logger_config(__file__), config_name='logme')
+
+    yield logger
+
+    del logging.Logger.manager.loggerDict['gate_logger']
+
+
+@pytest.mark.parametrize('level, expected',
+                         [pytest.param(logging.DEBUG, [True, True, True, True, True], id='debug'),
+                          pytest.param(logging.WARNING, [False, False, True, True, True], id='warning'),
+                          pytest.param(None, [False, False, False, False, False], id='disabled')])
+def test_level_gate(level, expected):
+    gate = LevelGate(level)
+
+    assert [gate.debug, gate.info, gate.warning, gate.error, gate.critical] == expected
+    assert gate.enabled_for(25) == (level is not None and 25 >= level)
+
+
+def test_level_gate_read_only():
+    gate = LevelGate(logging.INFO)
+
+    with pytest.raises(AttributeError):
+        gate.debug = True
+
+    assert repr(gate) == '<LevelGate (INFO)>'
+
+
+def test_logger_gate(gate_logger):
+    assert gate_logger.gate.debug is True
+
+    gate_logger.master_level = 'ERROR'
+
+    assert gate_logger.gate.warning is False
+    assert gate_logger.gate.error is True
+    assert gate_logger.logger.level == logging.ERROR
+
+
+def test_logger_gate_invalid_level(gate_logger):
+    gate = gate_logger.gate
+
+    with pytest.raises(logme.exceptions.InvalidOption):
+        gate_logger.master_level = 'NOTALEVEL'
+
+    assert gate_logger.gate is gate
+    assert gate_logger.master_level == logging.DEBUG
+
+
+def test_logger_gate_disabled(gate_logger):
+    gate_logger.disabled = True
+    assert gate_logger.gate.critical is False
+
+    gate_logger.disabled = False
+    assert gate_logger.gate.debug is True
+
+
+def test_logger_gate_registry(gate_logger):
+    logger_registry.set_level('WARNING', prefix='gate_logger')
+
+    assert gate_logger.gate.info is False
+    assert gate_logger.gate.warning is True
+
+
+def test_logger_gate_logging_disable(gate_logger):
+    gate_logger.master_level = 'DEBUG'
+
+    logging.disable(logging.CRITICAL)
+    try:
+        # logging.disable() is not cached in the gate, the logging call still drops the record
+        assert gate_logger.gate.debug is True
+        assert gate_logger.logger.isEnabledFor(logging.CRITICAL) is False
+    finally:
+        logging.disable(logging.NOTSET)
+
+    assert gate_logger.gate.debug is True
+    assert gate_logger.logger.isEnabledFor(logging.DEBUG) is True
+
+
+def test_logger_gate_matches_is_enabled_for(gate_logger):
+    for level in ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']:
+        gate_logger.master_level = level
+
+        for level_no in [10, 20, 30, 40, 50]:
+            assert gate_logger.gate.enabled_for(level_no) == gate_logger.logger.isEnabledFor(level_no)
+
+
+def test_module_logger_gate():
+    module_logger = logme.log(scope='module', name='gate_module_logger')
+
+    assert module_logger.gate is module_logger.logger.gate
+    assert module_logger.gate.debug is True
+
+    del logging.Logger.manager.loggerDict['gate_module_logger']
@@ -0,0 +1,103 @@
+import pytest
+
+import logging
+
+from logme.providers import LogmeLogger
+from logme.handlers import RingBufferHandler
+from logme.exceptions import InvalidOption
+from logme import handler_types
+from logme.handler_types import HandlerRegistry, handler_registry
+
+
+class FastHandler(logging.NullHandler):
+    pass
+
+
+class FastFileHandler(logging.Handler):
+    def __init__(self, filename, level=logging.NOTSET):
+        super().__init__(level)
+        self.filename = filename
+
+
+class DummyEntryPoint:
+    name = 'EntryPointHandler'
+
+    def load(self):
+        return FastHandler
+
+
+@pytest.fixture
+def registry():
+    return HandlerRegistry()
+
+
+@pytest.mark.parametrize('handler_type, handler_class',
+                         [
+                             pytest.param('StreamHandler', logging.StreamHandler, id='from logging'),
+                             pytest.param('SocketHandler', logging.handlers.SocketHandler,
+                                          id='from logging.handlers'),
+                             pytest.param('RingBufferHandler', RingBufferHandler, id='from logme.handlers'),
+                             pytest.param('tests.test_handler_types.FastHandler', FastHandler, id='dotted path'),
+                         ])
+def test_get_class(registry, handler_type, handler_class):
+    assert registry.get_class(handler_type) is handler_class
+    assert handler_type in registry
+
+
+def test_get_cached(registry):
+    handler_type = registry.get('FileHandler')
+
+    assert registry.get('FileHandler') is handler_type
+    assert registry.get(logging.FileHandler) is handler_type
+
+
+@pytest.mark.parametrize('handler_class, requires_filename',
+                         [
+                             pytest.param(logging.FileHandler, True, id='FileHandler'),
+                             pytest.param(logging.handlers.TimedRotatingFileHandler, True,
+                                          id='TimedRotatingFileHandler'),
+                             pytest.param(FastFileHandler, True, id='custom handler, filename as the last argument'),
+                             pytest.param(logging.StreamHandler, False, id='StreamHandler'),
+                         ])
+def test_requires_filename(registry, handler_class, requires_filename):
+    assert registry.get(handler_class).requires_filename is requires_filename
+
+
+def test_register(registry):
+    registry.register('StreamHandler', FastHandler)
+    assert registry.get_class('StreamHandler') is FastHandler
+
+    registry.unregister('StreamHandler')
+    assert registry.get_class('StreamHandler') is logging.StreamHandler
+
+
+def test_entry_point(registry, monkeypatch):
+    monkeypatch.setattr(handler_types, '_iter_entry_points', lambda: [DummyEntryPoint()])
+
+    assert registry.get_class('EntryPointHandler') is FastHandler
+
+
+@pytest.mark.parametrize('handler_type',
+                         [
+                             pytest.param('BlahHandler', id='not found'),
+                             pytest.param('basicConfig', id='not a handler class'),
+                             pytest.param('blah.BlahHandler', id='module not found'),
+                             pytest.param('tests.test_handler_types.BlahHandler', id='class not found'),
+                         ])
+def test_get_raise(registry, handler_type):
+    with pytest.raises(InvalidOption):
+        registry.get(handler_type)
+
+
+def test_dotted_path_handler_config():
+    config = {
+        'level': 'DEBUG',
+        'formatter': '{message}',
+        'fast': {'type': 'tests.test_handler_types.FastHandler', 'active': True},
+    }
+    logger = LogmeLogger('dotted_handler_logger', config)
+
+    assert type(logger.handlers['fast']) is FastHandler
+    assert 'tests.test_handler_types.FastHandler' in handler_registry
+
+    del logging.Logger.manager.loggerDict['dotted_handler_logger']
@@ -0,0 +1,623 @@
+import pytest
+
+import os
+import gzip
+import time
+import shutil
+import signal
+import threading
+import logging
+import weakref
+
+from logme.providers import LogmeLogger
+from logme.color_provider import ColorFormatter
+from logme.collector import LocalCollector
+from logme.handlers import RingBufferHandler, ShippingHandler, ConcurrentHandler, IndexingHandler
+from logme.index import TimeIndex, get_index_path
+from logme.exceptions import InvalidLoggerConfig, InvalidOption
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_record(level: int, msg: str) -> logging.LogRecord:
+    return logging.LogRecord('logger_name', level, 'pathname', 10, msg, [], None)
+
+
+# ---------------------------------------------------------------------------
+# RingBufferHandler
+# ---------------------------------------------------------------------------
+def test_ring_buffer_bounded():
+    target = ListHandler()
+    handler = RingBufferHandler(capacity=3, target=target)
+
+    for i in range(10):
+        handler.handle(make_record(logging.DEBUG, f"debug {i}"))
+
+    assert len(handler.buffer) == 3
+    assert target.records == []
+
+    handler.handle(make_record(logging.ERROR, 'error'))
+
+    assert [i.msg for i in target.records] == ['debug 8', 'debug 9', 'error']
+    assert len(handler.buffer) == 0
+
+
+def test_ring_buffer_flush_on_demand():
+    target = ListHandler()
+    handler = RingBufferHandler(capacity=5, flush_level='CRITICAL', target=target)
+
+    handler.handle(make_record(logging.ERROR, 'error'))
+    assert target.records == []
+
+    handler.flush()
+    assert [i.msg for i in target.records] == ['error']
+
+
+def test_ring_buffer_target_level():
+    target = ListHandler()
+    target.setLevel(logging.INFO)
+    handler = RingBufferHandler(capacity=5, target=target)
+
+    handler.handle(make_record(logging.DEBUG, 'debug'))
+    handler.handle(make_record(logging.INFO, 'info'))
+    handler.handle(make_record(logging.ERROR, 'error'))
+
+    assert [i.msg for i in target.records] == ['info', 'error']
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGUSR1'), reason='SIGUSR1 is not available')
+def test_ring_buffer_flush_signal():
+    previous = signal.getsignal(signal.SIGUSR1)
+
+    target = ListHandler()
+    handler = RingBufferHandler(capacity=5, target=target, flush_signal='SIGUSR1')
+
+    # Only installed once the handler is in use
+    assert signal.getsignal(signal.SIGUSR1) is previous
+    handler.install_signal()
+
+    try:
+        handler.handle(make_record(logging.DEBUG, 'debug'))
+
+        # The flush is handed over to the flusher thread, the signal handler never takes the handler lock
+        with handler.lock:
+            os.kill(os.getpid(), signal.SIGUSR1)
+            time.sleep(0.05)
+            assert target.records == []
+
+        for _ in range(100):
+            if target.records:
+                break
+            time.sleep(0.01)
+
+        assert [i.msg for i in target.records] == ['debug']
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
+        handler.close()
+
+
+def test_ring_buffer_from_config(tmpdir):
+    log_file = tmpdir.join('ring.log')
+    config = {
+        'level': 'DEBUG',
+        'formatter': '{levelname}::{message}',
+        'ring': {'type': 'RingBufferHandler', 'active': True, 'capacity': 2,
+                 'flush_level': 'ERROR', 'target': 'file'},
+        'file': {'type': 'FileHandler', 'active': False, 'filename': str(log_file)},
+    }
+
+    logger = LogmeLogger('ring_buffer_logger', config)
+    handler = logger.handlers['ring']
+
+    assert list(logger.handlers) == ['ring']
+    assert type(handler.target) == logging.FileHandler
+
+    for i in range(5):
+        logger.debug(f"debug {i}")
+    logger.error('error')
+
+    with open(log_file) as file:
+        assert file.readlines() == ['DEBUG::debug 4\n', 'ERROR::error\n']
+
+    del logging.Logger.manager.loggerDict['ring_buffer_logger']
+
+
+def test_ring_buffer_reconfig_target(tmpdir):
+    config = {
+        'level': 'DEBUG',
+        'formatter': '{levelname}::{message}',
+        'ring': {'type': 'RingBufferHandler', 'active': True, 'flush_level': 'ERROR', 'target': 'stream'},
+        'stream': {'type': 'StreamHandler', 'active': False},
+    }
+
+    logger = LogmeLogger('ring_buffer_reconfig', config)
+    target = logger.handlers['ring'].target
+
+    logger.master_level = 'INFO'
+    logger.master_formatter = '{message}'
+
+    assert target.level == logging.INFO
+    assert target.formatter._fmt == '{message}'
+    assert isinstance(target.formatter, ColorFormatter)
+
+    del logging.Logger.manager.loggerDict['ring_buffer_reconfig']
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGUSR1'), reason='SIGUSR1 is not available')
+def test_ring_buffer_duplicate_discarded(tmpdir, monkeypatch):
+    previous = signal.getsignal(signal.SIGUSR1)
+
+    config = {
+        'level': 'DEBUG',
+        'formatter': '{message}',
+        'file': {'type': 'FileHandler', 'active': False, 'filename': str(tmpdir.join('ring.log'))},
+    }
+    logger = LogmeLogger('ring_buffer_duplicate', config)
+    logger.add_handler('ring', 'RingBufferHandler', target='file', flush_signal='SIGUSR1')
+
+    installed = signal.getsignal(signal.SIGUSR1)
+    assert installed is not previous
+
+    built = []
+    original = LogmeLogger._build_target_handler
+
+    def recording_build_target_handler(self, handler_name):
+        built.append(original(self, handler_name))
+        return built[-1]
+
+    monkeypatch.setattr(LogmeLogger, '_build_target_handler', recording_build_target_handler)
+
+    logger.add_handler('ring_2', 'RingBufferHandler', target='file', flush_signal='SIGUSR1', skip_duplicate=True)
+
+    assert list(logger.handlers) == ['ring']
+    assert built[0].stream is None  # closed
+    assert signal.getsignal(signal.SIGUSR1) is installed
+
+    signal.signal(signal.SIGUSR1, previous)
+    for handler in logger.handlers.values():
+        handler.close()
+    del logging.Logger.manager.loggerDict['ring_buffer_duplicate']
+
+
+def test_ring_buffer_invalid_target():
+    config = {
+        'level': 'DEBUG',
+        'formatter': '{message}',
+        'ring': {'type': 'RingBufferHandler', 'active': True, 'target': 'file'},
+    }
+
+    with pytest.raises(InvalidLoggerConfig):
+        LogmeLogger('ring_buffer_invalid', config)
+
+    del logging.Logger.manager.loggerDict['ring_buffer_invalid']
+
+
+# ---------------------------------------------------------------------------
+# ShippingHandler
+# ---------------------------------------------------------------------------
+@pytest.fixture
+def collector():
+    with LocalCollector() as collector:
+        yield collector
+
+
+def make_shipping_handler(url, **kwargs) -> ShippingHandler:
+    options = {'batch_size': 10, 'flush_interval': 0.05, 'backoff': 0.01, 'max_backoff': 0.05}
+    options.update(kwargs)
+
+    handler = ShippingHandler(url, **options)
+    handler.setFormatter(logging.Formatter('{levelname}::{message}', style='{'))
+
+    return handler
+
+
+def test_shipping_batches(collector):
+    handler = make_shipping_handler(collector.url, pool_size=1)
+
+    for i in range(25):
+        handler.handle(make_record(logging.INFO, f"message {i}"))
+
+    handler.flush(timeout=5)
+
+    assert collector.wait_for(25)
+    assert [i['message'] for i in collector.records] == [f"INFO::message {i}" for i in range(25)]
+    assert collector.batches == 3
+    assert len(collector.connections) == 1  # persistent connection
+    assert handler.stats['sent_records'] == 25
+
+    handler.close()
+
+
+def test_shipping_flush_interval(collector):
+    handler = make_shipping_handler(collector.url, batch_size=1000)
+
+    handler.handle(make_record(logging.INFO, 'message'))
+
+    assert collector.wait_for(1)
+    assert collector.records[0]['levelname'] == 'INFO'
+
+    handler.close()
+
+
+def test_shipping_spool_unreachable(collector, tmpdir):
+    spool_dir = tmpdir.join('spool')
+    handler = make_shipping_handler(collector.url, max_retries=1, pool_size=1, spool_dir=str(spool_dir))
+
+    collector.available = False
+    for i in range(20):
+        handler.handle(make_record(logging.INFO, f"message {i}"))
+    handler.flush(timeout=5)
+
+    assert collector.records == []
+    assert len(spool_dir.listdir()) == 2
+    assert handler.stats['spooled_batches'] == 2
+
+    collector.available = True
+    assert collector.wait_for(20)
+
+    handler.handle(make_record(logging.INFO, 'message 20'))
+    handler.flush(timeout=5)
+
+    assert collector.wait_for(21)
+    assert [i['message'] for i in collector.records] == [f"INFO::message {i}" for i in range(21)]
+
+    # The spool may still be drained by the flush thread, the file is removed after the batch is accepted
+    for _ in range(100):
+        if not spool_dir.listdir() and handler.stats['sent_records'] == 21:
+            break
+        time.sleep(0.01)
+
+    assert spool_dir.listdir() == []
+
+    # Replayed batches are counted
+    assert handler.stats['sent_records'] == 21
+
+    handler.close()
+
+
+def test_shipping_spool_max_bytes(collector, tmpdir):
+    spool_dir = tmpdir.join('spool')
+    handler = make_shipping_handler(collector.url, max_retries=0, compress=False, spool_dir=str(spool_dir),
+                                    spool_max_bytes=2500)
+
+    collector.available = False
+    for i in range(50):
+        handler.handle(make_record(logging.INFO, f"message {i:02d}"))
+    handler.flush(timeout=5)
+
+    # Each batch of 10 records is about 1.1 KB, the oldest are dropped
+    spooled = sorted(spool_dir.listdir())
+    assert len(spooled) == 2
+    assert sum(i.size() for i in spooled) <= 2500
+    assert handler.stats['spooled_batches'] == 5
+    assert handler.stats['dropped_batches'] == 3
+    assert b'message 49' in spooled[-1].read_binary()
+
+    handler.close()
+
+
+def test_shipping_drop_without_spool(tmpdir):
+    collector = LocalCollector()
+    collector._server.server_close()  # connection refused
+
+    handler = make_shipping_handler(collector.url, max_retries=1)
+
+    handler.handle(make_record(logging.INFO, 'message'))
+    handler.flush(timeout=5)
+
+    assert handler.stats['dropped_batches'] == 1
+
+    handler.close()
+
+
+def test_shipping_shutdown_after_close(collector):
+    handler = make_shipping_handler(collector.url)
+    handler.close()
+
+    # logging.shutdown() flushes and closes the handler again at exit
+    logging.shutdown([weakref.ref(handler)])
+
+
+def test_shipping_invalid_url():
+    with pytest.raises(InvalidOption):
+        ShippingHandler('udp://127.0.0.1:9020')
+
+
+def test_shipping_from_config(collector):
+    config = {
+        'level': 'DEBUG',
+        'formatter': '{message}',
+        'ship': {'type': 'ShippingHandler', 'active': True, 'url': collector.url,
+                 'batch_size': 2, 'flush_interval': 0.05},
+    }
+
+    logger = LogmeLogger('shipping_logger', config)
+    logger.info('first')
+    logger.info('second')
+
+    assert collector.wait_for(2)
+    assert [(i['name'], i['message']) for i in collector.records] == [('shipping_logger', 'first'),
+                                                                     ('shipping_logger', 'second')]
+
+    logger.handlers['ship'].close()
+    del logging.Logger.manager.loggerDict['shipping_logger']
+
+
+# ---------------------------------------------------------------------------
+# ConcurrentHandler
+# ---------------------------------------------------------------------------
+def test_concurrent_handler_thread_order():
+    target = ListHandler()
+    handler = ConcurrentHandler(target, shards=4, flush_interval=0.01, batch_size=10)
+
+    def log(thread_index):
+        for i in range(500):
+            handler.handle(make_record(logging.INFO, f"{thread_index}:{i}"))
+
+    threads = [threading.Thread(target=log, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    handler.flush()
+
+    assert len(target.records) == 4000
+
+    # Records of each thread are written in order
+    for thread_index in range(8):
+        messages = [i.msg for i in target.records if i.msg.startswith(f"{thread_index}:")]
+        assert messages == [f"{thread_index}:{i}" for i in range(500)]
+
+    handler.close()
+
+
+def test_concurrent_handler_creation_order():
+    target = ListHandler()
+    handler = ConcurrentHandler(target, shards=2, flush_interval=60)
+
+    records = [make_record(logging.INFO, str(i)) for i in range(6)]
+    for i, record in enumerate(records):
+        record.created += i
+
+    def log(thread_records):
+        for record in thread_records:
+            handler.handle(record)
+
+    for thread_records in [records[::2], records[1::2]]:
+        thread = threading.Thread(target=log, args=(thread_records,))
+        thread.start()
+        thread.join()
+
+    handler.close()
+
+    assert target.records == records
+
+
+def test_concurrent_handler_shared_shard_order():
+    target = ListHandler()
+    handler = ConcurrentHandler(target, shards=1, flush_interval=60)
+
+    records = [make_record(logging.INFO, str(i)) for i in range(6)]
+    for i, record in enumerate(records):
+        record.created += i
+
+    def log(thread_records):
+        for record in thread_records:
+            handler.handle(record)
+
+    # Both threads append to the same shard, the records of the second thread are appended first
+    for thread_records in [records[1::2], records[::2]]:
+        thread = threading.Thread(target=log, args=(thread_records,))
+        thread.start()
+        thread.join()
+
+    handler.close()
+
+    assert target.records == records
+
+
+def test_concurrent_handler_emit_after_close():
+    target = ListHandler()
+    handler = ConcurrentHandler(target, shards=1, flush_interval=60)
+
+    handler.handle(make_record(logging.INFO, 'before'))
+    handler.close()
+
+    handler.handle(make_record(logging.INFO, 'after'))
+    handler.handle(make_record(logging.INFO, 'after'))
+
+    assert [i.msg for i in target.records] == ['before']
+    assert handler.dropped_records == 2
+
+
+def test_concurrent_handler_formats_once():
+    target = ListHandler()
+    handler = ConcurrentHandler(target, shards=1, flush_interval=60, max_pending=3)
+    handler.setFormatter(logging.Formatter('{levelname}::{message}', style='{'))
+
+    assert target.formatter is handler.formatter
+
+    for i in range(5):
+        handler.handle(make_record(logging.INFO, str(i)))
+
+    # The logging thread writes the pending records itself once max_pending is reached
+    assert [i.msg for i in target.records] == ['0', '1', '2']
+
+    handler.close()
+
+    assert [i.message for i in target.records] == ['0', '1', '2', '3', '4']
+
+
+def test_concurrent_handler_from_config(tmpdir):
+    log_file = tmpdir.join('concurrent.log')
+    config = {
+        'level': 'DEBUG',
+        'formatter': '{levelname}::{message}',
+        'file': {'type': 'FileHandler', 'active': True, 'level': 'INFO', 'filename': str(log_file),
+                 'concurrent': True, 'concurrent_shards': 2, 'spool': True},
+    }
+
+    logger = LogmeLogger('concurrent_logger', config)
+    handler = logger.handlers['file']
+
+    assert type(handler) == ConcurrentHandler
+    assert len(handler.shards) == 2
+    assert type(handler.target.target) == logging.FileHandler
+    assert handler.target.target.level == logging.INFO
+
+    for i in range(10):
+        logger.info(f"message {i}")
+    logger.debug('filtered')
+
+    handler.close()
+
+    with open(log_file) as file:
+        assert file.readlines() == [f"INFO::message {i}\n" for i in range(10)]
+
+    del logging.Logger.manager.loggerDict['concurrent_logger']
+
+
+# ---------------------------------------------------------------------------
+# IndexingHandler
+# ---------------------------------------------------------------------------
+def emit_timed(handler: logging.Handler, count: int, start: float=1000.0):
+    for i in range(count):
+        record = make_record(logging.INFO, f"message {i}")
+        record.created = start + i
+        handler.handle(record)
+
+
+def test_indexing_handler(tmpdir):
+    log_file = tmpdir.join('app.log')
+    target = logging.FileHandler(str(log_file))
+    target.setFormatter(logging.Formatter('%(message)s'))
+
+    handler = IndexingHandler(target, every_records=3)
+    emit_timed(handler, 10)
+    handler.close()
+
+    offsets = [len(''.join(f"message {i}\n" for i in range(n))) for n in [3, 6, 9]]
+    assert TimeIndex.load(log_file).checkpoints == [(1002.0, offsets[0]), (1005.0, offsets[1]), (1008.0, offsets[2])]
+
+    # Appended to when the file is opened again
+    handler = IndexingHandler(logging.FileHandler(str(log_file)), every_records=3)
+    emit_timed(handler, 3, start=2000.0)
+    handler.close()
+
+    assert len(TimeIndex.load(log_file)) == 4
+
+    # Started over when the file is truncated
+    handler = IndexingHandler(logging.FileHandler(str(log_file), mode='w'), every_records=3)
+    emit_timed(handler, 3, start=3000.0)
+    handler.close()
+
+    assert [i[0] for i in TimeIndex.load(log_file).checkpoints] == [3002.0]
+
+
+def test_indexing_handler_every_bytes(tmpdir):
+    log_file = tmpdir.join('app.log')
+
+    handler = IndexingHandler(logging.FileHandler(str(log_file)), every_records=1000, every_bytes=30)
+    emit_timed(handler, 10)
+    handler.close()
+
+    assert len(TimeIndex.load(log_file)) == 3
+
+
+def test_indexing_handler_invalid_target():
+    with pytest.raises(InvalidOption):
+        IndexingHandler(ListHandler())
+
+
+def test_indexing_handler_rotation(tmpdir):
+    log_file = tmpdir.join('app.log')
+    target = logging.handlers.RotatingFileHandler(str(log_file), maxBytes=100, backupCount=2)
+
+    handler = IndexingHandler(target, every_records=2)
+    emit_timed(handler, 30)
+    handler.close()
+
+    names = sorted(i.basename for i in tmpdir.listdir())
+    assert names == ['.app.log.1.idx', '.app.log.2.idx', '.app.log.idx', 'app.log', 'app.log.1', 'app.log.2']
+
+    # Each index is moved along with its file
+    for name in ['app.log.2', 'app.log.1', 'app.log']:
+        with open(tmpdir.join(name)) as file:
+            lines = file.read().splitlines()
+
+        first = int(lines[0].split()[-1])
+        checkpoints = TimeIndex.load(tmpdir.join(name)).checkpoints
+
+        assert checkpoints[0] == (1000.0 + first + 1, len(''.join(f"{i}\n" for i in lines[:2])))
+
+
+def test_indexing_handler_rotation_namer(tmpdir):
+    log_file = tmpdir.join('app.log')
+    target = logging.handlers.RotatingFileHandler(str(log_file), maxBytes=100, backupCount=3)
+
+    def rotator(source, dest):
+        with open(source, 'rb') as file, gzip.open(dest, 'wb') as compressed:
+            shutil.copyfileobj(file, compressed)
+        os.remove(source)
+
+    target.namer = lambda name: f"{name}.gz"
+    target.rotator = rotator
+
+    handler = IndexingHandler(target, every_records=2)
+    emit_timed(handler, 20)
+    handler.close()
+
+    assert get_index_path(tmpdir.join('app.log.1.gz')).exists()
+    assert get_index_path(tmpdir.join('app.log.2.gz')).exists()
+
+
+def test_indexing_handler_removed_segments(tmpdir):
+    log_file = tmpdir.join('app.log')
+    target = logging.handlers.TimedRotatingFileHandler(str(log_file), when='S', backupCount=1)
+
+    handler = IndexingHandler(target, every_records=1)
+    for i in range(3):
+        emit_timed(handler, 1, start=1000.0 + i)
+        target.rolloverAt = 0
+    emit_timed(handler, 1, start=1010.0)
+    handler.close()
+
+    segments = sorted(i.basename for i in tmpdir.listdir() if not i.basename.endswith('.idx'))
+    indexes = sorted(i.basename[1:-len('.idx')] for i in tmpdir.listdir() if i.basename.endswith('.idx'))
+
+    assert len(segments) == 2
+    assert indexes == segments
+
+
+def test_indexing_handler_from_config(tmpdir):
+    log_file = tmpdir.join('indexed.log')
+    config = {
+        'level': 'DEBUG',
+        'formatter': '{message}',
+        'file': {'type': 'FileHandler', 'active': True, 'level': 'INFO', 'filename': str(log_file),
+                 'index': True, 'index_every_records': 5, 'spool': True},
+    }
+
+    logger = LogmeLogger('indexed_logger', config)
+    handler = logger.handlers['file']
+
+    assert type(handler.target) == IndexingHandler
+    assert handler.target.writer.every_records == 5
+    assert handler.target.target.level == logging.INFO
+
+    for i in range(10):
+        logger.info(f"message {i}")
+
+    handler.close()
+
+    assert len(TimeIndex.load(log_file)) == 2
+
+    del logging.Logger.manager.loggerDict['indexed_logger']
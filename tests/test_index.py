@@ -0,0 +1,71 @@
+import pytest
+
+from logme.index import TimeIndex, TimeIndexWriter, get_index_path, remove_orphan_indexes
+
+
+@pytest.fixture
+def index():
+    return TimeIndex([(10.0, 100), (20.0, 200), (30.0, 300), (40.0, 400)])
+
+
+def test_get_index_path(tmpdir):
+    assert get_index_path(tmpdir.join('app.log.1.gz')) == tmpdir / '.app.log.1.gz.idx'
+
+
+@pytest.mark.parametrize('kwargs, expected',
+                         [
+                             pytest.param({}, (0, None), id='no range'),
+                             pytest.param({'since': 25.0}, (200, None), id='since'),
+                             pytest.param({'since': 20.0}, (100, None), id='since at a checkpoint'),
+                             pytest.param({'since': 5.0}, (0, None), id='since before the first checkpoint'),
+                             pytest.param({'since': 50.0}, (400, None), id='since after the last checkpoint'),
+                             pytest.param({'until': 25.0}, (0, 300), id='until'),
+                             pytest.param({'until': 45.0}, (0, None), id='until after the last checkpoint'),
+                             pytest.param({'since': 20.5, 'until': 29.0, 'slack': 1.0}, (100, 300), id='slack'),
+                         ])
+def test_seek(index, kwargs, expected):
+    kwargs.setdefault('slack', 0)
+
+    assert index.seek(**kwargs) == expected
+
+
+def test_writer(tmpdir):
+    log_file = tmpdir.join('app.log')
+
+    writer = TimeIndexWriter(log_file, every_records=2, every_bytes=1000)
+    writer.open(0)
+    for i in range(5):
+        writer.add(float(i), (i + 1) * 10)
+    writer.close()
+
+    assert TimeIndex.load(log_file).checkpoints == [(1.0, 20), (3.0, 40)]
+
+    # A partially written checkpoint is left out
+    with open(get_index_path(log_file), 'ab') as file:
+        file.write(b'\x00' * 5)
+
+    assert len(TimeIndex.load(log_file)) == 2
+
+    # Started over if the file is smaller than the index
+    writer.open(30)
+    writer.close()
+
+    assert len(TimeIndex.load(log_file)) == 0
+
+
+def test_load_invalid(tmpdir):
+    log_file = tmpdir.join('app.log')
+    assert TimeIndex.load(log_file) is None
+
+    get_index_path(log_file).write_bytes(b'not an index')
+    assert TimeIndex.load(log_file) is None
+
+
+def test_remove_orphan_indexes(tmpdir):
+    for name in ['app.log', 'app.log.1', '.app.log.idx', '.app.log.1.idx', '.app.log.2.idx', '.other.log.idx']:
+        tmpdir.join(name).write('')
+
+    remove_orphan_indexes(tmpdir.join('app.log'))
+
+    assert sorted(i.basename for i in tmpdir.listdir()) == ['.app.log.1.idx', '.app.log.idx', '.other.log.idx',
+                                                           'app.log', 'app.log.1']
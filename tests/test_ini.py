@@ -0,0 +1,118 @@
+import pytest
+
+from pathlib import Path
+from configparser import NoSectionError, DuplicateSectionError, DuplicateOptionError, MissingSectionHeaderError
+
+from bnmutils import ConfigParser
+from bnmutils.novelty import str_eval
+
+from logme.exceptions import InvalidLoggerConfig
+from logme.ini import parse_value, parse_ini, read_ini, get_section, get_sections
+
+
+LOGME_INI = Path(__file__).parent / 'logme.ini'
+
+
+CONTENT = """\
+# comment
+[DEFAULT]
+shared = 1
+
+[my_config]
+level = DEBUG
+formatter =
+    fmt: {asctime} - {name} - {levelname} - {message}
+    ; comment within the option
+    style: {
+Stream.Handler : 
+	type: StreamHandler
+	active: True
+	level: INFO
+	port: 3000
+	args: (1, 'a')
+file =
+    type: FileHandler
+    filename: None
+
+empty =
+"""
+
+
+@pytest.mark.parametrize('ini_path', [LOGME_INI, Path(__file__).parent / 'test_cli_package' / 'logme.ini'])
+def test_read_ini_parity(ini_path):
+    assert get_sections(ini_path) == ConfigParser.from_files(ini_path).to_dict()
+
+
+def test_parse_ini_parity(tmpdir):
+    ini_path = tmpdir.join('logme.ini')
+    ini_path.write(CONTENT)
+
+    expected = ConfigParser.from_files(ini_path)
+    parsed = parse_ini(CONTENT)
+
+    assert {k: v for k, v in parsed.items() if k != 'DEFAULT'} == expected.to_dict()
+    assert parsed['DEFAULT'] == expected.to_dict(section='DEFAULT')
+    assert parsed['my_config']['Stream.Handler'] == {'type': 'StreamHandler', 'active': True, 'level': 'INFO',
+                                                     'port': 3000, 'args': (1, 'a')}
+
+
+@pytest.mark.parametrize('value',
+                         ['True', 'None', ' 12 ', '-1.5', '1e3', '0x10', "'quoted'", 'b"bytes"', "f'{a}'",
+                          '[1, 2]', '{asctime}::{message}', '(1, ', '%Y/%m/%d', 'DEBUG', 'mylogpath/foo.log',
+                          '...', '', 'rb"\\d"', 'True or False'])
+def test_parse_value_parity(value):
+    assert parse_value(value) == str_eval(value)
+
+
+@pytest.mark.parametrize('content, exception',
+                         [
+                             pytest.param('[a]\nb = 1\n[a]\n', DuplicateSectionError, id='duplicate section'),
+                             pytest.param('[a]\nb = 1\nb = 2\n', DuplicateOptionError, id='duplicate option'),
+                             pytest.param('b = 1\n[a]\n', MissingSectionHeaderError, id='missing section'),
+                         ])
+def test_parse_ini_raise(tmpdir, content, exception):
+    ini_path = tmpdir.join('logme.ini')
+    ini_path.write(content)
+
+    with pytest.raises(exception):
+        ConfigParser.from_files(ini_path)
+
+    with pytest.raises(exception):
+        parse_ini(content)
+
+
+def test_parse_ini_invalid_option():
+    with pytest.raises(InvalidLoggerConfig):
+        parse_ini('[a]\nhandler =\n    active True\n')
+
+
+def test_read_ini_cached(tmpdir):
+    ini_path = tmpdir.join('logme.ini')
+    ini_path.write('[a]\nlevel = DEBUG\n')
+
+    assert read_ini(ini_path) is read_ini(ini_path)
+
+    ini_path.write('[a]\nlevel = INFO\n[b]\nlevel = ERROR\n')
+
+    assert get_sections(ini_path) == {'a': {'level': 'INFO'}, 'b': {'level': 'ERROR'}}
+
+
+def test_get_section_copy():
+    section = get_section(LOGME_INI, 'logme')
+    section['StreamHandler']['level'] = 'ERROR'
+
+    assert get_section(LOGME_INI, 'logme')['StreamHandler']['level'] == 'DEBUG'
+
+
+def test_get_section_raise():
+    with pytest.raises(NoSectionError):
+        get_section(LOGME_INI, 'blah')
+
+
+@pytest.mark.parametrize('content', ['', '# comment only\n'])
+def test_read_ini_no_section(tmpdir, content):
+    ini_path = tmpdir.join('logme.ini')
+    ini_path.write(content)
+
+    with pytest.raises(InvalidLoggerConfig):
+        read_ini(ini_path)
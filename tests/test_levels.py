@@ -0,0 +1,140 @@
+import pytest
+
+import logging
+
+from logme.providers import LogmeLogger
+from logme.exceptions import InvalidOption
+from logme.levels import LevelRules, level_rules
+from logme.registry import logger_registry
+
+
+@pytest.fixture
+def rules(monkeypatch):
+    monkeypatch.delenv('LOGME_LEVELS', raising=False)
+    return LevelRules()
+
+
+@pytest.fixture
+def global_rules(monkeypatch):
+    monkeypatch.delenv('LOGME_LEVELS', raising=False)
+    level_rules.load_env()
+
+    yield level_rules
+
+    level_rules.clear()
+
+
+@pytest.mark.parametrize('name, expected',
+                         [
+                             pytest.param('myapp', logging.WARNING, id='exact'),
+                             pytest.param('myapp.models', logging.WARNING, id='prefix'),
+                             pytest.param('myapp.db', logging.INFO, id='deeper prefix'),
+                             pytest.param('myapp.db.models', logging.DEBUG, id='descendants'),
+                             pytest.param('myapp.db.models.user', logging.DEBUG, id='descendants, nested'),
+                             pytest.param('myapp.db.cache', logging.ERROR, id='literal over descendants'),
+                             pytest.param('myapp.worker_1', logging.CRITICAL, id='glob'),
+                             pytest.param('myapp.worker_1.db', logging.INFO, id='glob in the middle'),
+                             pytest.param('myappx', None, id='not a prefix'),
+                             pytest.param('other.myapp', None, id='no match'),
+                         ])
+def test_resolve(rules, name, expected):
+    rules.update({
+        'myapp': 'WARNING',
+        'myapp.db': 'INFO',
+        'myapp.db.*': 'DEBUG',
+        'myapp.db.cache': 'ERROR',
+        'myapp.worker_?': 'CRITICAL',
+        'myapp.*.db': logging.INFO,
+    })
+
+    assert rules.resolve(name) == expected
+
+
+def test_resolve_default(rules):
+    assert rules.resolve('myapp', default=logging.ERROR) == logging.ERROR
+
+
+def test_resolve_latest_rule(rules):
+    rules.set('myapp.*.db', 'DEBUG')
+    rules.set('myapp.core.*', 'ERROR')
+
+    assert rules.resolve('myapp.core.db') == logging.ERROR
+
+
+def test_resolve_cache_cleared(rules):
+    rules.set('myapp', 'DEBUG')
+    assert rules.resolve('myapp.db') == logging.DEBUG
+
+    rules.set('myapp.db', 'ERROR')
+    assert rules.resolve('myapp.db') == logging.ERROR
+
+    rules.remove('myapp.db')
+    assert rules.resolve('myapp.db') == logging.DEBUG
+
+
+def test_env_rules(rules, monkeypatch):
+    monkeypatch.setenv('LOGME_LEVELS', 'myapp.db=DEBUG; myapp.http.*=warning,')
+    rules.set('myapp.db', 'ERROR')
+
+    assert rules.resolve('myapp.db') == logging.DEBUG
+    assert rules.resolve('myapp.http.client') == logging.WARNING
+
+    rules.clear()
+    assert rules.rules == {'myapp.db': logging.DEBUG, 'myapp.http.*': logging.WARNING}
+
+    monkeypatch.delenv('LOGME_LEVELS')
+    rules.load_env()
+    assert rules.resolve('myapp.db') is None
+
+
+@pytest.mark.parametrize('rule',
+                         [
+                             pytest.param('myapp.db', id='missing level'),
+                             pytest.param('myapp.db=LOUD', id='invalid level'),
+                             pytest.param('=DEBUG', id='missing pattern'),
+                         ])
+def test_parse_raise(rule):
+    with pytest.raises(InvalidOption):
+        LevelRules.parse(rule)
+
+
+def test_applied_at_construction(global_rules):
+    global_rules.set('level_rules_test.*', 'WARNING')
+
+    logger = LogmeLogger('level_rules_test.db', config={'level': 'DEBUG', 'formatter': '{message}'})
+
+    assert logger.master_level == logging.WARNING
+    assert logger.logger_config.level == logging.DEBUG
+    assert not logger.isEnabledFor(logging.INFO)
+
+    logger_registry.unregister(logger)
+    del logging.Logger.manager.loggerDict['level_rules_test.db']
+
+
+def test_applied_on_change(global_rules):
+    logger = LogmeLogger('level_rules_test.http', config={'level': 'DEBUG', 'formatter': '{message}',
+                                                          'stream': {'type': 'StreamHandler'}})
+    assert logger.master_level == logging.DEBUG
+
+    global_rules.set('level_rules_test', 'ERROR')
+    assert logger.master_level == logging.ERROR
+    assert logger.handlers['stream'].level == logging.ERROR
+    assert not logger.isEnabledFor(logging.WARNING)
+
+    # The level of the config is restored once no rule matches
+    global_rules.remove('level_rules_test')
+    assert logger.master_level == logging.DEBUG
+
+    logger_registry.unregister(logger)
+    del logging.Logger.manager.loggerDict['level_rules_test.http']
+
+
+def test_unmatched_loggers_untouched(global_rules):
+    logger = LogmeLogger('level_rules_test.cache', config={'level': 'DEBUG', 'formatter': '{message}'})
+    logger.master_level = 'INFO'
+
+    global_rules.set('level_rules_test.db', 'ERROR')
+    assert logger.master_level == logging.INFO
+
+    logger_registry.unregister(logger)
+    del logging.Logger.manager.loggerDict['level_rules_test.cache']
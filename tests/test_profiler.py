@@ -0,0 +1,114 @@
+import pytest
+
+import json
+import logging
+
+from logme.providers import LogmeLogger
+from logme.profiler import LoggingProfiler, format_profile, PHASES
+from logme.utils import get_logger_config
+from logme.exceptions import InvalidOption
+
+
+@pytest.fixture
+def profiled_logger():
+    config = get_logger_config(__file__, 'ver11_config')
+    logger = LogmeLogger('profiled_logger', config)
+
+    profiler = LoggingProfiler(sample_rate=1)
+    profiler.attach(logger)
+
+    yield logger, profiler
+
+    profiler.detach()
+    del logging.Logger.manager.loggerDict['profiled_logger']
+
+
+def log_from_two_sites(logger):
+    for i in range(3):
+        logger.info('first call site')
+    logger.warning('second call site')
+    logger.debug('disabled for the handler, not for the logger')
+
+
+def test_profiler_call_sites(profiled_logger):
+    logger, profiler = profiled_logger
+
+    log_from_two_sites(logger)
+
+    profile = profiler.dump()
+    samples = {site['location'].rsplit(':', 1)[1]: site['samples'] for site in profile}
+
+    assert len(profile) == 3
+    assert sorted(samples.values()) == [1, 1, 3]
+
+    for site in profile:
+        assert site['logger'] == 'profiled_logger'
+        assert site['location'].startswith(__file__)
+        assert site['total'] == pytest.approx(sum(site[phase] for phase in PHASES))
+        assert site['record'] > 0
+
+    info_site = [site for site in profile if site['samples'] == 3][0]
+    assert info_site['format'] > 0
+    assert info_site['emit'] > 0
+
+
+def test_profiler_sampling(profiled_logger):
+    logger, sample_all_profiler = profiled_logger
+    sample_all_profiler.detach()
+
+    profiler = LoggingProfiler(sample_rate=0.25)
+    profiler.attach(logger.logger)
+
+    for i in range(100):
+        logger.info('sampled call site')
+
+    profile = profiler.dump()
+
+    assert profile[0]['samples'] == 25
+    assert profile[0]['estimated_calls'] == 100
+
+    profiler.detach()
+
+
+def test_profiler_disabled_level(profiled_logger):
+    logger, profiler = profiled_logger
+    logger.master_level = 'ERROR'
+
+    logger.info('disabled')
+
+    assert profiler.dump() == []
+
+
+def test_profiler_detach(profiled_logger):
+    logger, profiler = profiled_logger
+
+    profiler.detach()
+    logger.info('not profiled')
+
+    assert profiler.dump() == []
+    assert 'handle' not in logger.logger.__dict__
+    assert 'emit' not in logger.handlers['stream'].__dict__
+
+
+def test_profiler_save(profiled_logger, tmpdir):
+    logger, profiler = profiled_logger
+    log_from_two_sites(logger)
+
+    profile_path = tmpdir.join('profile.json')
+    profiler.save(profile_path)
+
+    with open(profile_path) as file:
+        content = json.load(file)
+
+    assert content['sample_rate'] == 1
+    assert len(content['sites']) == 3
+
+    report = format_profile(content, top=1).splitlines()
+
+    assert report[0] == 'sample rate: 1, call sites: 3'
+    assert len(report) == 3
+
+
+def test_profiler_invalid_rate():
+    with pytest.raises(InvalidOption):
+        LoggingProfiler(sample_rate=0)
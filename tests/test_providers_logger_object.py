@@ -1,6 +1,8 @@
 import pytest
 
+import io
 import logging
+import threading
 from datetime import datetime
 from pathlib import Path
 
@@ -119,6 +121,24 @@ class TestLogmeLogger:
         # This would raise an error if the time format was not correct
         datetime.strptime(timestamp, '%Y/%m/%d')
 
+    def test_formatter_cache_time(self, tmpdir):
+        config = get_logger_config(__file__, 'ver13_config')
+        config['formatter'].update({'cache_time': True, 'clock': 'monotonic'})
+        config['file']['filename'] = tmpdir.join(config['file']['filename'])
+
+        logger = LogmeLogger('formatter_cache_time', config=config)
+
+        for handler in logger.handlers.values():
+            assert handler.formatter.cache_time is True
+            assert handler.formatter.clock == 'monotonic'
+
+        logger.info('test info')
+
+        with open(config['file']['filename']) as log_file:
+            timestamp = log_file.readline().split('-')[0].strip()
+
+        datetime.strptime(timestamp, '%Y/%m/%d')
+
     # ---------------------------------------------------------------------------
     # Test individual methods
     # ---------------------------------------------------------------------------
@@ -361,6 +381,159 @@ class TestLogmeLogger:
         with pytest.raises(LogmeError):
             logger_from_provider.reconfig_handler('RotatingFileHandler', level=10)
 
+    def test_min_level_pruning(self, file_config_content):
+        logger = LogmeLogger('min_level_pruning', file_config_content)
+        logger.propagate = False
+
+        assert logger.gate.level == 10
+
+        logger.reconfig_handler('StreamHandler', level='WARNING')
+        logger.reconfig_handler('FileHandler', level='ERROR')
+
+        assert logger.gate.level == 30
+        assert logger.gate.info is False
+        assert logger.gate.warning is True
+        assert logger.master_level == 10
+
+        # Loggers below it inherit master_level, the records below the handler levels are not created
+        assert logger.logger.level == 10
+        assert logger.info is not logger.logger.info
+        assert logger.warning == logger.logger.warning
+
+        logger.reconfig_handler('FileHandler', level='INFO')
+
+        assert logger.gate.level == 20
+
+        del logging.Logger.manager.loggerDict['min_level_pruning']
+
+    def test_min_level_pruning_propagate(self, file_config_content):
+        logger = LogmeLogger('min_level_pruning_propagate', file_config_content)
+
+        logger.reconfig_handler('StreamHandler', level='ERROR')
+        logger.reconfig_handler('FileHandler', level='ERROR')
+
+        # Handlers of the ancestors, e.g. pytest caplog, still receive the records
+        assert logger.gate.level == 10
+
+        logger.propagate = False
+        assert logger.gate.level == 40
+
+        logger.propagate = True
+        assert logger.gate.level == 10
+
+        del logging.Logger.manager.loggerDict['min_level_pruning_propagate']
+
+    def test_min_level_pruning_add_handler(self, file_config_content):
+        logger = LogmeLogger('min_level_pruning_add_handler', file_config_content)
+        logger.propagate = False
+        logger.master_level = 'WARNING'
+
+        assert logger.gate.level == 30
+
+        logger.master_level = 'DEBUG'
+        logger.reconfig_handler('StreamHandler', level='ERROR')
+        logger.reconfig_handler('FileHandler', level='ERROR')
+
+        assert logger.gate.level == 40
+
+        logger.add_handler('socket', 'SocketHandler', level='INFO', host='127.0.0.7', port=8080)
+
+        assert logger.gate.level == 20
+
+        null_handler = logging.NullHandler()
+        logger.addHandler(null_handler)
+
+        assert logger.gate.level == 10
+
+        logger.removeHandler(null_handler)
+
+        assert logger.gate.level == 20
+
+        del logging.Logger.manager.loggerDict['min_level_pruning_add_handler']
+
+    def test_min_level_pruning_child_logger(self, file_config_content):
+        logger = LogmeLogger('min_level_pruning_child', file_config_content)
+        logger.propagate = False
+        logger.reconfig_handler('StreamHandler', level='ERROR')
+        logger.reconfig_handler('FileHandler', level='ERROR')
+
+        stream = io.StringIO()
+        child = logging.getLogger('min_level_pruning_child.stdlib')
+        child.addHandler(logging.StreamHandler(stream))
+        child.propagate = False
+
+        assert logger.gate.level == 40
+        assert child.getEffectiveLevel() == 10
+
+        child.debug('child message')
+
+        assert stream.getvalue() == 'child message\n'
+
+        del logging.Logger.manager.loggerDict['min_level_pruning_child']
+        del logging.Logger.manager.loggerDict['min_level_pruning_child.stdlib']
+
+    def test_concurrent_reconfiguration(self, tmpdir):
+        config = {
+            'level': 'DEBUG',
+            'formatter': '{name} - {message}',
+            'file': {'type': 'FileHandler', 'active': True, 'filename': str(tmpdir.join('concurrent.log'))},
+        }
+        logger = LogmeLogger('concurrent_reconfiguration', config)
+        logging_logger = logger.logger
+
+        errors = []
+        done = threading.Event()
+
+        def log():
+            try:
+                while not done.is_set():
+                    logger.info('message')
+                    assert list(logger.handlers) in [['file'], ['file', 'extra']]
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=log) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for i in range(50):
+                logger.master_level = ['DEBUG', 'ERROR'][i % 2]
+                logger.master_formatter = ['{message}', '{name} - {message}'][i % 2]
+                logger.reconfig_handler('file', level=['INFO', 'WARNING'][i % 2])
+
+            logger.add_handler('extra', 'NullHandler')
+        finally:
+            done.set()
+            for thread in threads:
+                thread.join()
+
+        assert errors == []
+        assert logger.logger is logging_logger
+        assert logger.logger.level == logger.master_level == logging.ERROR
+
+        for handler in logger.handlers.values():
+            handler.close()
+
+        del logging.Logger.manager.loggerDict['concurrent_reconfiguration']
+
+    def test_fixed_attributes(self, logger_from_provider):
+        with pytest.raises(AttributeError):
+            object.__getattribute__(logger_from_provider, '__dict__')
+
+        with pytest.raises(AttributeError):
+            logger_from_provider.blah = 'blah'
+
+    def test_shared_config_and_gate(self):
+        logger_1 = LogmeLogger('shared_config_logger_1', self.config)
+        logger_2 = LogmeLogger('shared_config_logger_2', logger_1.logger_config)
+
+        assert logger_2.logger_config is logger_1.logger_config
+        assert logger_2.gate is logger_1.gate
+
+        for name in ['shared_config_logger_1', 'shared_config_logger_2']:
+            del logging.Logger.manager.loggerDict[name]
+
     # ---------------------------------------------------------------------------
     # Helpers
     # ---------------------------------------------------------------------------
@@ -0,0 +1,109 @@
+import pytest
+
+import io
+import logging
+
+import logme
+from logme.registry import LoggerRegistry
+from logme.providers import PackageLogProvider, LogmeLogger
+from logme.exceptions import LogmeError, InvalidLoggerConfig
+
+from . import dummy_package
+
+
+MODULE_NAMES = [
+    'tests.dummy_package',
+    'tests.dummy_package.models',
+    'tests.dummy_package.views',
+    'tests.dummy_package.views.detail',
+]
+
+
+@pytest.fixture
+def package_provider():
+    provider = PackageLogProvider(dummy_package, config='my_test_logger')
+
+    yield provider
+
+    for name in MODULE_NAMES:
+        logging.Logger.manager.loggerDict.pop(name, None)
+
+
+def test_package_loggers(package_provider):
+    registry = package_provider.registry
+
+    assert type(registry) == LoggerRegistry
+    assert sorted(registry.names()) == MODULE_NAMES
+    assert len(registry) == 4
+
+    for logger in registry:
+        assert type(logger) == LogmeLogger
+        assert logger.master_level == logging.INFO
+
+
+def test_package_loggers_shared_handlers(package_provider):
+    registry = package_provider.registry
+
+    handlers = {id(logger.handlers['StreamHandler']) for logger in registry}
+
+    assert len(handlers) == 1
+    assert len(package_provider._configs) == 1
+
+
+def test_package_loggers_logging(package_provider, caplog):
+    package_provider.registry['tests.dummy_package.views.detail'].info('bulk logger message')
+
+    assert caplog.record_tuples[0] == ('tests.dummy_package.views.detail', 20, 'bulk logger message')
+
+
+def test_package_loggers_emit_once(package_provider):
+    stream = io.StringIO()
+    package_provider.registry['tests.dummy_package'].handlers['StreamHandler'].setStream(stream)
+
+    package_provider.registry['tests.dummy_package.views.detail'].info('nested module message')
+    package_provider.registry['tests.dummy_package'].info('package message')
+
+    assert len(stream.getvalue().splitlines()) == 2
+
+
+def test_package_loggers_master_level(package_provider):
+    registry = package_provider.registry
+    stream = io.StringIO()
+    handler = registry['tests.dummy_package'].handlers['StreamHandler']
+    handler.setStream(stream)
+
+    registry['tests.dummy_package.models'].master_level = 'ERROR'
+    registry.set_level('ERROR', prefix='tests.dummy_package.views')
+
+    assert handler.level == logging.INFO
+
+    registry['tests.dummy_package'].info('package message')
+    registry['tests.dummy_package.models'].info('models message')
+    registry['tests.dummy_package.views.detail'].info('detail message')
+
+    assert len(stream.getvalue().splitlines()) == 1
+
+
+def test_log_package():
+    registry = logme.log_package('tests.dummy_package')
+
+    assert 'tests.dummy_package.models' in registry
+    assert registry.get('tests.dummy_package.models').master_level == logging.DEBUG
+    assert registry.get('tests.dummy_package.foo') is None
+
+    for name in MODULE_NAMES:
+        del logging.Logger.manager.loggerDict[name]
+
+
+@pytest.mark.parametrize('package, config, error',
+                         [
+                             pytest.param('tests.dummy_package.models', None, LogmeError,
+                                          id='when a module is passed instead of package'),
+                             pytest.param(dummy_package, 'colors', InvalidLoggerConfig,
+                                          id='colors passed as configuration'),
+                             pytest.param(dummy_package, 'bunny', InvalidLoggerConfig,
+                                          id='none existent config section'),
+                         ])
+def test_package_provider_raise(package, config, error):
+    with pytest.raises(error):
+        PackageLogProvider(package, config=config)
@@ -0,0 +1,241 @@
+import pytest
+
+import bz2
+import gzip
+import lzma
+import logging
+
+from datetime import datetime
+
+from logme.exceptions import LogmeError
+from logme.index import TimeIndexWriter
+from logme.reader import (LogParser, find_segments, read_lines, read_entries, follow_entries, filter_entries,
+                          tail_entries, count_entries, parse_time_option)
+
+
+FMT = '{asctime} - {name} - {levelname} - {message}'
+
+LINES = [
+    '2024-01-01 12:00:00,100 - myapp - INFO - started',
+    '2024-01-01 12:00:01,200 - myapp.db - DEBUG - connected',
+    '2024-01-01 12:00:02,300 - myapp.db - ERROR - query failed',
+    'Traceback (most recent call last):',
+    'TimeoutError: timed out',
+    '2024-01-01 12:00:03,400 - myapp.http - WARNING - slow response',
+    '2024-01-01 12:00:04,500 - other - INFO - done',
+]
+
+
+def write_log(file_path, lines, opener=open):
+    with opener(file_path, 'wt') as file:
+        file.write('\n'.join(lines) + '\n')
+
+
+@pytest.fixture
+def log_file(tmpdir):
+    file_path = tmpdir.join('app.log')
+    write_log(file_path, LINES)
+
+    return file_path
+
+
+@pytest.mark.parametrize('fmt, style, datefmt, line, expected',
+                         [
+                             pytest.param(FMT, '{', None,
+                                          '2024-01-01 12:00:00,100 - myapp.db - INFO - a - b',
+                                          {'asctime': '2024-01-01 12:00:00,100', 'name': 'myapp.db',
+                                           'levelname': 'INFO', 'message': 'a - b'},
+                                          id='{ style'),
+                             pytest.param('%(asctime)s|%(levelname)-8s|%(name)s|%(message)s', '%', '%d/%m/%Y %H:%M',
+                                          '01/02/2024 12:30|ERROR   |myapp|failed 100%',
+                                          {'asctime': '01/02/2024 12:30', 'name': 'myapp',
+                                           'levelname': 'ERROR', 'message': 'failed 100%'},
+                                          id='% style, padded'),
+                             pytest.param('$levelname ${name}: $message', '$', None,
+                                          'DEBUG myapp: $5 paid',
+                                          {'levelname': 'DEBUG', 'name': 'myapp', 'message': '$5 paid'},
+                                          id='$ style'),
+                         ])
+def test_parse_line(fmt, style, datefmt, line, expected):
+    parser = LogParser(fmt, datefmt=datefmt, style=style)
+
+    assert parser.parse_line(line) == expected
+    assert parser.parse_line('Traceback (most recent call last):') is None
+
+
+def test_from_formatter():
+    parser = LogParser.from_formatter({'fmt': '{levelname}::{message}', 'style': '{', 'datefmt': '%H:%M'})
+    assert (parser.fmt, parser.style, parser.datefmt, parser.json_lines) == ('{levelname}::{message}', '{',
+                                                                               '%H:%M', False)
+
+    parser = LogParser.from_formatter({'type': 'JsonFormatter'})
+    assert parser.json_lines
+    assert parser.parse_line('{"name": "myapp", "levelname": "INFO", "message": "hi"}')['message'] == 'hi'
+    assert parser.parse_line('not json') is None
+
+
+def test_parse(log_file):
+    parser = LogParser.from_formatter(FMT)
+    entries = list(parser.parse(read_lines(log_file), source=str(log_file)))
+
+    assert [(i.name, i.levelname, i.levelno) for i in entries] == [
+        ('myapp', 'INFO', logging.INFO),
+        ('myapp.db', 'DEBUG', logging.DEBUG),
+        ('myapp.db', 'ERROR', logging.ERROR),
+        ('myapp.http', 'WARNING', logging.WARNING),
+        ('other', 'INFO', logging.INFO),
+    ]
+
+    # Continuation lines are part of the entry
+    assert entries[2].message == 'query failed\nTraceback (most recent call last):\nTimeoutError: timed out'
+    assert entries[2].text == '\n'.join(LINES[2:5])
+    assert entries[2].offset == len('\n'.join(LINES[:2])) + 1
+    assert entries[2].source == str(log_file)
+
+    assert entries[0].timestamp == datetime(2024, 1, 1, 12, 0, 0, 100000).timestamp()
+
+
+def test_parse_leading_lines():
+    parser = LogParser.from_formatter(FMT)
+    entries = list(parser.parse(enumerate(['partial line'] + LINES[:1])))
+
+    assert entries[0].fields == {}
+    assert entries[0].text == 'partial line'
+    assert entries[0].levelno is None
+    assert entries[1].name == 'myapp'
+
+
+def test_parse_time_datefmt():
+    parser = LogParser('%(asctime)s %(message)s', datefmt='%Y/%m/%d %H:%M:%S')
+    entry = next(parser.parse([(0, '2024/03/01 08:15:00 hi')]))
+
+    assert entry.timestamp == datetime(2024, 3, 1, 8, 15).timestamp()
+
+
+@pytest.mark.parametrize('opener, suffix',
+                         [
+                             pytest.param(gzip.open, '.gz', id='gzip'),
+                             pytest.param(bz2.open, '.bz2', id='bz2'),
+                             pytest.param(lzma.open, '.xz', id='xz'),
+                         ])
+def test_read_lines_compressed(tmpdir, opener, suffix):
+    file_path = tmpdir.join(f"app.log.1{suffix}")
+    write_log(file_path, LINES, opener=opener)
+
+    assert [line for _, line in read_lines(file_path)] == LINES
+
+
+def test_read_lines_range(log_file):
+    offset = len(LINES[0]) + 1
+    lines = list(read_lines(log_file, start=offset, end=offset + 1))
+
+    assert lines == [(offset, LINES[1])]
+
+
+def test_read_lines_empty(tmpdir):
+    file_path = tmpdir.join('app.log')
+    file_path.write('')
+
+    assert list(read_lines(file_path)) == []
+
+
+def test_find_segments(tmpdir):
+    for name in ['app.log', 'app.log.1', 'app.log.2.gz', 'app.log.10.bz2', 'app.log.bak', 'app.logs', 'other.log']:
+        tmpdir.join(name).write('')
+
+    assert [i.name for i in find_segments(tmpdir.join('app.log'))] == ['app.log.10.bz2', 'app.log.2.gz',
+                                                                        'app.log.1', 'app.log']
+
+
+def test_find_segments_timed(tmpdir):
+    for name in ['app.log', 'app.log.2024-01-02', 'app.log.2024-01-01.gz']:
+        tmpdir.join(name).write('')
+
+    assert [i.name for i in find_segments(tmpdir.join('app.log'))] == ['app.log.2024-01-01.gz',
+                                                                        'app.log.2024-01-02', 'app.log']
+
+
+def test_read_entries_segments(tmpdir):
+    write_log(tmpdir.join('app.log.1.gz'), LINES[:3], opener=gzip.open)
+    write_log(tmpdir.join('app.log'), LINES[5:])
+
+    entries = read_entries(find_segments(tmpdir.join('app.log')), LogParser.from_formatter(FMT))
+
+    assert [i.message for i in entries] == ['started', 'connected', 'query failed', 'slow response', 'done']
+
+
+def test_read_entries_index(log_file):
+    parser = LogParser.from_formatter(FMT)
+    entries = list(read_entries([log_file], parser))
+
+    writer = TimeIndexWriter(log_file, every_records=1)
+    writer.open(0)
+    for entry, next_entry in zip(entries, entries[1:]):
+        writer.add(entry.timestamp, next_entry.offset)
+    writer.close()
+
+    since = datetime(2024, 1, 1, 12, 0, 2).timestamp()
+    until = datetime(2024, 1, 1, 12, 0, 3).timestamp()
+
+    # Only the records between the checkpoints around the time range are read
+    indexed = read_entries([log_file], parser, since=since, until=until, slack=0)
+    assert [i.message.split('\n')[0] for i in indexed] == ['query failed', 'slow response']
+
+
+@pytest.mark.parametrize('filters, expected',
+                         [
+                             pytest.param({'level': 'WARNING'}, ['query failed', 'slow response'], id='level'),
+                             pytest.param({'names': ['myapp.db', 'other']}, ['connected', 'query failed', 'done'],
+                                          id='logger names'),
+                             pytest.param({'names': ['myap']}, [], id='not a prefix'),
+                             pytest.param({'since': datetime(2024, 1, 1, 12, 0, 1, 200000).timestamp(),
+                                           'until': datetime(2024, 1, 1, 12, 0, 4).timestamp()},
+                                          ['connected', 'query failed', 'slow response'], id='time range'),
+                             pytest.param({'pattern': r'^(?:s|c)'}, ['started', 'connected', 'slow response'],
+                                          id='pattern'),
+                             pytest.param({'pattern': 'TimeoutError', 'level': logging.ERROR}, ['query failed'],
+                                          id='pattern in continuation lines'),
+                         ])
+def test_filter_entries(log_file, filters, expected):
+    entries = read_entries([log_file], LogParser.from_formatter(FMT))
+
+    assert [i.message.split('\n')[0] for i in filter_entries(entries, **filters)] == expected
+
+
+def test_tail_and_count_entries(log_file):
+    parser = LogParser.from_formatter(FMT)
+
+    assert [i.name for i in tail_entries(read_entries([log_file], parser), 2)] == ['myapp.http', 'other']
+
+    counts = count_entries(read_entries([log_file], parser))
+    assert counts['total'] == 5
+    assert counts['levels'] == {'INFO': 2, 'DEBUG': 1, 'ERROR': 1, 'WARNING': 1}
+    assert counts['loggers'] == {'myapp': 1, 'myapp.db': 2, 'myapp.http': 1, 'other': 1}
+
+
+def test_follow_entries(log_file):
+    entries = follow_entries(log_file, LogParser.from_formatter(FMT), interval=0.01)
+
+    with open(log_file, 'a') as file:
+        file.write(LINES[0] + '\n' + LINES[1][:10])
+
+    assert next(entries).message == 'started'
+
+    # The partial line is parsed once it is complete
+    with open(log_file, 'a') as file:
+        file.write(LINES[1][10:] + '\n')
+
+    assert next(entries).message == 'connected'
+
+    # Rotated
+    write_log(log_file, LINES[-1:])
+    assert next(entries).message == 'done'
+
+
+def test_parse_time_option():
+    assert parse_time_option('15m', now=1000.0) == 100.0
+    assert parse_time_option('1h', now=7200.0) == 3600.0
+    assert parse_time_option('2024-01-01 12:00') == datetime(2024, 1, 1, 12).timestamp()
+
+    with pytest.raises(LogmeError):
+        parse_time_option('yesterday')
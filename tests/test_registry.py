@@ -0,0 +1,141 @@
+import pytest
+
+import gc
+import threading
+import logging
+
+from logme.registry import LoggerRegistry, logger_registry
+from logme.providers import LogmeLogger
+from logme.utils import get_logger_config
+
+
+@pytest.fixture
+def registry_loggers():
+    config = get_logger_config(__file__)
+    names = ['myapp', 'myapp.db', 'myapp.db.models', 'myapp.dbutils', 'otherapp']
+
+    loggers = [LogmeLogger(name, config, config_name='logme') for name in names]
+
+    yield loggers
+
+    for name in names:
+        del logging.Logger.manager.loggerDict[name]
+
+
+def test_logger_registered(registry_loggers):
+    for logger in registry_loggers:
+        assert logger_registry[logger.name] is logger
+        assert logger_registry.get(logger.name, config='logme') is logger
+
+    assert logger_registry.get('myapp', config='my_test_logger') is None
+
+
+def test_registry_weak_reference():
+    logger = LogmeLogger('weak_ref_logger', get_logger_config(__file__))
+
+    assert 'weak_ref_logger' in logger_registry
+
+    del logger
+    gc.collect()
+
+    assert 'weak_ref_logger' not in logger_registry
+
+    del logging.Logger.manager.loggerDict['weak_ref_logger']
+
+
+def test_registry_reset_config(registry_loggers):
+    logger = registry_loggers[-1]
+
+    logger.reset_config(config='my_test_logger', name='otherapp_renamed')
+
+    assert 'otherapp' not in logger_registry
+    assert logger_registry.get('otherapp_renamed', config='my_test_logger') is logger
+
+    # Rename back for the fixture clean up
+    logger.reset_config(config='logme', name='otherapp')
+
+
+@pytest.mark.parametrize('prefix, expected',
+                         [
+                             pytest.param('myapp.db', ['myapp.db', 'myapp.db.models'],
+                                          id='prefix matching children only'),
+                             pytest.param('myapp', ['myapp', 'myapp.db', 'myapp.db.models', 'myapp.dbutils'],
+                                          id='top level prefix'),
+                         ])
+def test_registry_find(registry_loggers, prefix, expected):
+    assert sorted(i.name for i in logger_registry.find(prefix=prefix)) == expected
+
+
+def test_registry_set_level(registry_loggers):
+    assert logger_registry.set_level('ERROR', prefix='myapp.db') == 2
+
+    levels = {logger.name: logger.master_level for logger in registry_loggers}
+
+    assert levels == {'myapp': 10, 'myapp.db': 40, 'myapp.db.models': 40,
+                      'myapp.dbutils': 10, 'otherapp': 10}
+    assert registry_loggers[1].logger.level == 40
+
+
+def test_registry_reconfig_handler(registry_loggers):
+    changed = logger_registry.reconfig_handler('StreamHandler', level='WARNING', prefix='myapp.db')
+
+    assert changed == 2
+    assert registry_loggers[2].handlers['StreamHandler'].level == 30
+    assert registry_loggers[0].handlers['StreamHandler'].level == 10
+
+
+def test_registry_dump(registry_loggers):
+    dump = logger_registry.dump(prefix='myapp.db.models')
+    handler_id = f"{id(registry_loggers[2].handlers['StreamHandler']):#x}"
+
+    assert dump.splitlines() == [
+        'myapp.db.models [config=logme, level=10]',
+        f"    StreamHandler: StreamHandler id={handler_id} level=10 "
+        f"formatter='{{asctime}} - {{name}} - {{levelname}} - {{module}}::{{funcName}}::{{message}}'",
+    ]
+
+
+def test_registry_strong_reference(registry_loggers):
+    registry = LoggerRegistry()
+
+    for logger in registry_loggers:
+        registry.register(logger)
+
+    assert len(registry) == 5
+    assert registry.names() == ['myapp', 'myapp.db', 'myapp.db.models', 'myapp.dbutils', 'otherapp']
+
+    registry.unregister(registry_loggers[0])
+    assert 'myapp' not in registry
+
+
+def test_registry_concurrent_register():
+    registry = LoggerRegistry(weak=True)
+    config = get_logger_config(__file__)
+
+    errors = []
+    done = threading.Event()
+
+    def iterate():
+        try:
+            while not done.is_set():
+                for logger in registry:
+                    assert logger.name in registry.names() or logger.name.startswith('concurrent_registry')
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=iterate)
+    thread.start()
+
+    try:
+        for i in range(20):
+            logger = LogmeLogger(f"concurrent_registry.{i}", config)
+            registry.register(logger)
+            registry.unregister(logger)
+            registry.register(logger)
+
+            del logging.Logger.manager.loggerDict[f"concurrent_registry.{i}"]
+    finally:
+        done.set()
+        thread.join()
+
+    assert errors == []
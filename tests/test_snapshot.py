@@ -0,0 +1,123 @@
+import pytest
+
+import logging
+import threading
+
+from logme.providers import LogmeLogger
+from logme.snapshot import LoggerSnapshot
+from logme.exceptions import InvalidOption
+
+
+@pytest.fixture
+def snapshot_logger(tmpdir):
+    config = {
+        'level': 'DEBUG',
+        'formatter': '{name} - {message}',
+        'stream': {'type': 'StreamHandler', 'active': True},
+        'file': {'type': 'FileHandler', 'active': True, 'filename': str(tmpdir.join('snapshot.log'))},
+        'error_file': {'type': 'FileHandler', 'active': True, 'level': 'ERROR', 'formatter': '{message}',
+                       'filename': str(tmpdir.join('snapshot_error.log'))},
+    }
+    logger = LogmeLogger('snapshot_logger', config)
+
+    yield logger
+
+    for handler in logger.handlers.values():
+        handler.close()
+
+    del logging.Logger.manager.loggerDict['snapshot_logger']
+
+
+def test_snapshot_read_only(snapshot_logger):
+    snapshot = snapshot_logger.snapshot
+
+    with pytest.raises(AttributeError):
+        snapshot.master_level = logging.ERROR
+
+    replaced = snapshot.replace(master_level=logging.ERROR)
+
+    assert isinstance(replaced, LoggerSnapshot)
+    assert replaced.master_level == logging.ERROR
+    assert snapshot.master_level == logging.DEBUG
+    assert replaced.handlers is snapshot.handlers
+
+
+def test_snapshot_handler_configs(snapshot_logger):
+    snapshot = snapshot_logger.snapshot
+
+    assert list(snapshot.handlers) == ['stream', 'file', 'error_file']
+    assert snapshot.handlers is snapshot_logger.handlers
+
+    for handler_name, (level, formatter) in snapshot.handler_configs.items():
+        handler = snapshot.handlers[handler_name]
+
+        assert handler.level == level
+        assert handler.formatter is formatter
+
+
+def test_snapshot_published_on_change(snapshot_logger):
+    old_snapshot = snapshot_logger.snapshot
+
+    snapshot_logger.master_level = 'WARNING'
+    snapshot_logger.master_formatter = '{message}'
+
+    snapshot = snapshot_logger.snapshot
+
+    assert snapshot is not old_snapshot
+    assert snapshot.master_level == logging.WARNING
+    assert snapshot.handler_configs['file'][0] == logging.WARNING
+    assert snapshot.handler_configs['file'][1]._fmt == '{message}'
+
+    # Handlers with their own level and formatter are unaffected
+    assert snapshot.handler_configs['error_file'][0] == logging.ERROR
+    assert snapshot.handler_configs['error_file'][1]._fmt == '{message}'
+
+    # The old snapshot is left as it was
+    assert old_snapshot.master_level == logging.DEBUG
+    assert old_snapshot.handler_configs['file'][1]._fmt == '{name} - {message}'
+
+
+def test_snapshot_invalid_change(snapshot_logger):
+    snapshot = snapshot_logger.snapshot
+
+    with pytest.raises(InvalidOption):
+        snapshot_logger.master_formatter = {'fmt': '{message}', 'style': '{', 'type': 'NotAFormatter'}
+
+    with pytest.raises(InvalidOption):
+        snapshot_logger.master_level = 'NOTALEVEL'
+
+    assert snapshot_logger.snapshot is snapshot
+    assert snapshot_logger.master_formatter == '{name} - {message}'
+
+    for handler_name, (level, formatter) in snapshot.handler_configs.items():
+        assert snapshot.handlers[handler_name].formatter is formatter
+
+
+def test_snapshot_consistent_while_reconfigured(snapshot_logger):
+    errors = []
+    done = threading.Event()
+
+    def read():
+        try:
+            while not done.is_set():
+                snapshot = snapshot_logger.snapshot
+                stream_config = snapshot.handler_configs['stream']
+                file_config = snapshot.handler_configs['file']
+
+                assert stream_config[0] == file_config[0] == snapshot.master_level
+                assert stream_config[1]._fmt == file_config[1]._fmt == snapshot.master_formatter
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=read)
+    thread.start()
+
+    try:
+        for i in range(100):
+            snapshot_logger.master_formatter = ['{message}', '{name} - {message}'][i % 2]
+            snapshot_logger.master_level = ['INFO', 'DEBUG'][i % 2]
+    finally:
+        done.set()
+        thread.join()
+
+    assert errors == []
@@ -0,0 +1,236 @@
+import pytest
+
+import sys
+import time
+import queue
+import logging
+import weakref
+import threading
+
+from logme.providers import LogmeLogger
+from logme.spool import SpoolQueue, SpoolingHandler
+from logme.exceptions import InvalidOption
+
+
+def make_record(level: int, msg: str, *args) -> logging.LogRecord:
+    return logging.LogRecord('logger_name', level, 'pathname', 10, msg, args, None)
+
+
+# ---------------------------------------------------------------------------
+# SpoolQueue
+# ---------------------------------------------------------------------------
+def test_spool_queue_order(tmpdir):
+    spool = SpoolQueue(tmpdir, memory_records=3, segment_bytes=30)
+
+    for i in range(20):
+        assert spool.put(i)
+
+    stats = spool.stats
+    assert stats['memory_records'] == 3
+    assert stats['disk_records'] == 17
+    assert stats['segments'] > 1
+
+    # Items put while the disk backlog is being drained keep their order
+    items = [spool.get() for _ in range(10)]
+    for i in range(20, 25):
+        spool.put(i)
+
+    items += [spool.get() for _ in range(15)]
+
+    assert items == list(range(25))
+    assert len(spool) == 0
+    assert spool.stats['segments'] == 0
+    assert tmpdir.listdir() == []
+
+
+def test_spool_queue_memory_only(tmpdir):
+    spool = SpoolQueue(tmpdir, memory_records=10)
+
+    for i in range(10):
+        spool.put(i)
+
+    assert spool.stats['spilled'] == 0
+    assert tmpdir.listdir() == []
+
+
+def test_spool_queue_drop_new(tmpdir):
+    spool = SpoolQueue(tmpdir, memory_records=2, max_disk_bytes=50)
+
+    results = [spool.put(i) for i in range(10)]
+
+    assert results.count(False) == spool.stats['dropped']
+    assert spool.stats['disk_bytes'] <= 50
+    assert [spool.get() for _ in range(len(spool))] == list(range(results.index(False)))
+
+
+def test_spool_queue_drop_old(tmpdir):
+    spool = SpoolQueue(tmpdir, memory_records=2, segment_bytes=20, max_disk_bytes=60, drop_policy='drop_old')
+
+    assert all(spool.put(i) for i in range(20))
+    assert spool.stats['disk_bytes'] <= 60
+
+    items = [spool.get() for _ in range(len(spool))]
+
+    assert items[:2] == [0, 1]
+    assert items[-1] == 19
+    assert items == sorted(items)
+    assert len(items) + spool.stats['dropped'] == 20
+
+
+def test_spool_queue_block(tmpdir):
+    spool = SpoolQueue(tmpdir, memory_records=1, segment_bytes=10, max_disk_bytes=40, drop_policy='block',
+                       block_timeout=5)
+
+    for i in range(4):
+        spool.put(i)
+
+    consumer = threading.Timer(0.1, lambda: [spool.get() for _ in range(3)])
+    consumer.start()
+
+    assert spool.put(4)  # Blocks until the consumer frees disk space
+    consumer.join()
+
+    assert spool.stats['dropped'] == 0
+
+
+def test_spool_queue_temporary_directory(tmpdir):
+    spool = SpoolQueue(memory_records=1)
+    spool.put('a')
+    spool.put('b')
+
+    directory = spool.directory
+    assert directory.exists()
+
+    spool.close()
+    assert not directory.exists()
+
+    # A directory which is passed in is kept
+    spool = SpoolQueue(tmpdir, memory_records=1)
+    spool.close()
+    assert tmpdir.exists()
+
+
+def test_spool_queue_get_timeout(tmpdir):
+    spool = SpoolQueue(tmpdir)
+
+    with pytest.raises(queue.Empty):
+        spool.get(timeout=0.01)
+
+
+def test_spool_queue_invalid_policy(tmpdir):
+    with pytest.raises(InvalidOption):
+        SpoolQueue(tmpdir, drop_policy='drop_random')
+
+
+# ---------------------------------------------------------------------------
+# SpoolingHandler
+# ---------------------------------------------------------------------------
+class SlowListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.unblocked = threading.Event()
+
+    def emit(self, record):
+        self.unblocked.wait()
+        self.messages.append(self.format(record))
+
+
+def test_spooling_handler(tmpdir):
+    target = SlowListHandler()
+    handler = SpoolingHandler(target, directory=tmpdir, memory_records=5)
+    handler.setFormatter(logging.Formatter('{levelname}::{message}', style='{'))
+
+    for i in range(50):
+        handler.handle(make_record(logging.INFO, 'message %s', i))
+
+    assert handler.stats['memory_records'] <= 5
+    assert handler.stats['spilled'] > 0
+
+    target.unblocked.set()
+    handler.flush(timeout=5)
+
+    assert target.messages == [f"INFO::message {i}" for i in range(50)]
+
+    handler.close()
+
+
+def test_spooling_handler_exception(tmpdir):
+    target = SlowListHandler()
+    target.unblocked.set()
+    handler = SpoolingHandler(target, directory=tmpdir)
+
+    try:
+        raise ValueError('spooled error')
+    except ValueError:
+        record = logging.LogRecord('logger_name', logging.ERROR, 'pathname', 10, 'error', [], sys.exc_info())
+
+    handler.handle(record)
+    handler.flush(timeout=5)
+
+    assert 'ValueError: spooled error' in target.messages[0]
+
+    handler.close()
+
+
+def test_spooling_handler_shutdown_after_close(tmpdir):
+    target = SlowListHandler()
+    target.unblocked.set()
+
+    handler = SpoolingHandler(target, directory=tmpdir)
+    handler.close()
+
+    # logging.shutdown() flushes and closes the handler again at exit
+    logging.shutdown([weakref.ref(handler)])
+
+
+def test_spooling_handler_block_without_lock(tmpdir):
+    target = SlowListHandler()
+    handler = SpoolingHandler(target, directory=tmpdir, memory_records=1, max_disk_bytes=1,
+                              drop_policy='block', block_timeout=2)
+
+    def log_burst():
+        for i in range(3):
+            handler.handle(make_record(logging.INFO, 'message %s', i))
+
+    producer = threading.Thread(target=log_burst)
+    producer.start()
+    time.sleep(0.3)
+
+    # The producer is waiting for disk space, the handler lock is free for the other threads
+    assert handler.lock.acquire(timeout=0.1)
+    handler.lock.release()
+
+    target.unblocked.set()
+    producer.join()
+    handler.close()
+
+
+def test_spooling_handler_from_config(tmpdir):
+    log_file = tmpdir.join('spool.log')
+    config = {
+        'level': 'DEBUG',
+        'formatter': '{levelname}::{message}',
+        'file': {'type': 'FileHandler', 'active': True, 'level': 'INFO', 'filename': str(log_file),
+                 'spool': True, 'spool_dir': str(tmpdir.join('spool')), 'spool_memory_records': 2},
+    }
+
+    logger = LogmeLogger('spooling_logger', config)
+    handler = logger.handlers['file']
+
+    assert type(handler) == SpoolingHandler
+    assert type(handler.target) == logging.FileHandler
+    assert handler.target.level == logging.INFO
+    assert handler.spool.memory_records == 2
+
+    for i in range(10):
+        logger.info(f"message {i}")
+    logger.debug('filtered')
+
+    handler.flush(timeout=5)
+
+    with open(log_file) as file:
+        assert file.readlines() == [f"INFO::message {i}\n" for i in range(10)]
+
+    handler.close()
+    del logging.Logger.manager.loggerDict['spooling_logger']